@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+
+
+def _parse_lines(data: bytes) -> tuple[list[dict[str, Any]], int]:
+    """Tra ve (cac record hop le, so byte hop le). Dung o dong dau tien bi cat/hong (crash giua chung)."""
+    records: list[dict[str, Any]] = []
+    valid_bytes = 0
+    for line in data.splitlines(keepends=True):
+        if not line.endswith(b"\n"):
+            break
+        try:
+            record = json.loads(line.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            break
+        if not isinstance(record, dict):
+            break
+        records.append(record)
+        valid_bytes += len(line)
+    return records, valid_bytes
+
+
+def read_jsonl_checkpoint(path: str | Path) -> list[dict[str, Any]]:
+    """Doc cac record da hoan thanh (bo header va dong cuoi bi cat) cua checkpoint dang ghi do."""
+    checkpoint_path = Path(path)
+    if not checkpoint_path.exists():
+        return []
+    records, _ = _parse_lines(checkpoint_path.read_bytes())
+    return [record for record in records if record.get("type") != "header"]
+
+
+class JsonlCheckpoint:
+    """
+    File JSONL append-only: dong dau {"type": "header", "key": {...}}, moi dong sau la mot record ghi
+    ngay khi co ket qua (flush tung dong).
+
+    Checkpoint chi duoc resume khi key (nguon + cau hinh model) trung; dong cuoi bi cat do crash duoc
+    cat bo truoc khi ghi tiep.
+    """
+
+    def __init__(self, path: str | Path, key: dict[str, Any], label: str = "Checkpoint"):
+        self.path = Path(path)
+        self.key = key
+        self.label = label
+        self.records: list[dict[str, Any]] = []
+        self._handle: Any = None
+
+    def resume(self) -> list[dict[str, Any]]:
+        """Nap record da co (neu key trung) va mo file de ghi tiep; tra ve cac record da hoan thanh."""
+        self.records = []
+        if self.path.exists():
+            records, valid_bytes = _parse_lines(self.path.read_bytes())
+            if records and records[0].get("type") == "header" and records[0].get("key") == self.key:
+                self.records = records[1:]
+                with open(self.path, "r+b") as handle:
+                    handle.truncate(valid_bytes)
+                self._handle = open(self.path, "a", encoding="utf-8")
+                return list(self.records)
+            print(f"({self.label} {self.path.name} does not match this run; starting over)")
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = open(self.path, "w", encoding="utf-8")
+        self._write({"type": "header", "key": self.key})
+        return []
+
+    def append(self, record: dict[str, Any]) -> None:
+        self._write(record)
+        self.records.append(record)
+
+    def _write(self, record: dict[str, Any]) -> None:
+        if self._handle is None:
+            raise RuntimeError(f"CHECKPOINT_CLOSED: {self.path}")
+        self._handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        # flush moi dong: process chet van giu duoc record da ghi
+        self._handle.flush()
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def remove(self) -> None:
+        self.close()
+        self.path.unlink(missing_ok=True)
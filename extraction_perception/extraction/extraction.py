@@ -1,44 +1,434 @@
 import os
 import json
+import math
 import subprocess
+import threading
+import time
+import wave
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import timedelta
 from pathlib import Path
+from typing import Callable
 
 import cv2
-from scenedetect import open_video, SceneManager
-from scenedetect.detectors import ContentDetector
+import numpy as np
+from scenedetect import FrameTimecode, open_video, SceneManager, StatsManager
+from scenedetect.detectors import ContentDetector, HashDetector, HistogramDetector
+from scenedetect.scene_manager import compute_downscale_factor, get_scenes_from_cuts
+
+from extraction_perception.extraction.extraction_cache import video_fingerprint
+from extraction_perception.extraction.frame_budget import plan_keyframe_budget
+from extraction_perception.extraction.keyframe_store import (
+    KEYFRAME_STORES,
+    PACKED_KEYFRAMES_FILE,
+    PackedKeyframeWriter,
+    keyframe_loader,
+    write_store_descriptor,
+)
+from extraction_perception.extraction.scene_cuts import (
+    DEFAULT_MIN_SCENE_LEN,
+    default_scene_threshold,
+    plan_chunks,
+    stitch_chunk_cuts,
+)
+from extraction_perception.extraction.scene_stats import (
+    SCENE_STATS_FILE,
+    cuts_from_scores,
+    read_scene_stats,
+    stats_match,
+    write_scene_stats,
+)
+
+AUDIO_SAMPLE_RATE = 16000
+
+SCENE_METADATA_FILE = "scene_metadata.json"
+# Keyframe chi nam trong bo nho (write_keyframes=False): frame khong co file_path nen khong ghi deliverable v1
+MEMORY_METADATA_FILE = "scene_metadata.memory.json"
+
+# Vung overlap moi chunk doc them truoc/sau khoang so huu de detector co du ngu canh
+CHUNK_OVERLAP_FRAMES = 4 * DEFAULT_MIN_SCENE_LEN
+MIN_CHUNK_FRAMES = 20 * CHUNK_OVERLAP_FRAMES
+
+# Target cach nhau trung binh tu muc nay tro len (giay) thi seek toi gan target thay vi grab tuan tu
+SEEK_MIN_GAP_SECONDS = 4.0
+
+# Fused lookback: tang frame decode goc (chua resize) gioi han theo byte de video do phan giai cao khong an het RAM
+LOOKBACK_RAW_MAX_BYTES = 128 * 1024 * 1024
+# Cut co the duoc bao tre sau frame cut (FlashFilter cua ContentDetector gop cut trong min_scene_len)
+CUT_REPORT_LAG_FRAMES = 2 * DEFAULT_MIN_SCENE_LEN
+
+def _build_detector(detector: str, threshold: float | None):
+    if threshold is None:
+        threshold = default_scene_threshold(detector)
+    if detector == "content":
+        return ContentDetector(threshold=threshold)
+    if detector == "hash":
+        return HashDetector(threshold=threshold)
+    if detector == "histogram":
+        return HistogramDetector(threshold=threshold)
+    raise ValueError(f"SCENE_DETECTOR_UNKNOWN: {detector}")
+
+
+def _attach_stats_manager(scene_detector):
+    """Gan StatsManager cua scenedetect vao detector (nhu SceneManager.add_detector) de doc diem tung frame."""
+    stats_manager = StatsManager()
+    stats_manager.register_metrics(scene_detector.get_metrics())
+    scene_detector.stats_manager = stats_manager
+    return stats_manager
+
+
+def _recorded_scores(stats_manager, scene_detector, frame_nums):
+    """
+    Diem detector cho cac frame da phan tich, doc tu StatsManager; NaN neu detector chua bao diem (frame dau).
+    Co StatsManager thi ContentDetector tinh them edge moi frame nen chi gan khi can ghi sidecar.
+    """
+    metric_key = scene_detector.get_metrics()[0]
+    scores = []
+    for frame_num in frame_nums:
+        value = stats_manager.get_metrics(frame_num, [metric_key])[0] if stats_manager.metrics_exist(frame_num, [metric_key]) else None
+        scores.append(math.nan if value is None else float(value))
+    return scores
+
+
+def _analysis_downscale(frame_size, analysis_width: int | None):
+    if analysis_width is None:
+        return compute_downscale_factor(max(frame_size))
+    # SceneManager.downscale chi nhan so nguyen
+    return max(1, int(max(frame_size) / max(1, int(analysis_width))))
+
+
+def _build_scene_manager(video, detector: str, threshold: float | None, analysis_width: int | None, record_scores: bool = False):
+    """
+    Tra ve (scene_manager, scene_detector). record_scores: gan StatsManager de doc diem tung frame
+    (scenedetect chi cho dung StatsManager khi frame_skip = 0).
+    """
+    scene_manager = SceneManager(stats_manager=StatsManager() if record_scores else None)
+    scene_detector = _build_detector(detector, threshold)
+    scene_manager.add_detector(scene_detector)
+    if analysis_width is not None:
+        scene_manager.auto_downscale = False
+        scene_manager.downscale = _analysis_downscale(video.frame_size, analysis_width)
+    return scene_manager, scene_detector
+
+
+def _scene_manager_scores(scene_manager, scene_detector, first_frame, last_frame):
+    """(frame_nums, scores) cua moi frame [first_frame, last_frame] SceneManager da phan tich; rong neu khong ghi diem."""
+    if scene_manager.stats_manager is None:
+        return [], []
+    frame_nums = list(range(int(first_frame), int(last_frame) + 1))
+    return frame_nums, _recorded_scores(scene_manager.stats_manager, scene_detector, frame_nums)
+
+
+def _detect_chunk_cuts(video_path, start, end, detector, threshold, analysis_width, frame_skip, record_scores=False):
+    """Worker cho process pool: detect cut trong [start - overlap, end + overlap)."""
+    video = open_video(video_path)
+    read_from = max(0, start - CHUNK_OVERLAP_FRAMES)
+    if read_from > 0:
+        video.seek(read_from)
+
+    scene_manager, scene_detector = _build_scene_manager(video, detector, threshold, analysis_width, record_scores)
+    end_time = None
+    if end is not None:
+        end_time = video.base_timecode + (end + CHUNK_OVERLAP_FRAMES)
+    scene_manager.detect_scenes(video, end_time=end_time, frame_skip=max(0, int(frame_skip)))
+
+    scene_list = scene_manager.get_scene_list(start_in_scene=True)
+    # Diem trong khoang so huu da co ngu canh tu vung overlap nen ghep lai bang ket qua chay 1 process
+    frame_nums, scores = _scene_manager_scores(scene_manager, scene_detector, read_from, video.position.get_frames())
+    owned = [
+        (frame_num, score)
+        for frame_num, score in zip(frame_nums, scores)
+        if frame_num >= start and (end is None or frame_num < end)
+    ]
+    return {
+        "start": start,
+        "end": end,
+        "cuts": [scene[0].get_frames() for scene in scene_list[1:]],
+        "last_frame": video.position.get_frames(),
+        "frame_nums": [frame_num for frame_num, _ in owned],
+        "scores": [score for _, score in owned],
+    }
+
+
+class _KeyframeWriterPool:
+    """Thread pool resize + encode keyframe; hang doi gioi han de decode bi chan lai khi encode khong kip."""
+
+    def __init__(self, workers: int, queue_size: int):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="keyframe_writer")
+        self._slots = threading.BoundedSemaphore(queue_size)
+        self._futures = []
+        self._error = None
+
+    def submit(self, fn, *args):
+        # Writer da loi thi dung decode ngay, khong doi toi drain o cuoi video
+        if self._error is not None:
+            raise self._error
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(self._on_done)
+        self._futures.append(future)
+
+    def _on_done(self, future):
+        if self._error is None and not future.cancelled() and future.exception() is not None:
+            self._error = future.exception()
+        self._slots.release()
+
+    def drain(self):
+        futures, self._futures = self._futures, []
+        for future in futures:
+            future.result()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
 
 class VideoPreprocessor:
-    def __init__(self, video_path: str, output_root: str, resize: int = 448):
+    def __init__(
+        self,
+        video_path: str,
+        output_root: str,
+        resize: int = 448,
+        write_keyframes: bool = True,
+        handoff_size: int | None = None,
+        keyframe_writers: int = 0,
+        keyframe_queue_size: int | None = None,
+        scene_stats: bool = False,
+        keyframe_store: str = "files",
+        max_keyframes_per_minute: float | None = None,
+        long_scene_seconds: float | None = None,
+        keyframe_sink: Callable[[dict, np.ndarray], None] | None = None,
+    ):
+        """
+        write_keyframes: ghi `keyframes/*.jpg` (tat duoc khi handoff trong bo nho, chi de debug). Tat thi
+            keyframe chi nam trong `self.keyframes`: frame khong co `file_path` nen metadata (them
+            `keyframe_store.format = "memory"`) ghi vao `scene_metadata.memory.json` thay cho deliverable v1.
+        handoff_size: neu dat, giu keyframe RGB uint8 `handoff_size x handoff_size` trong
+            `self.keyframes` (frame_id -> ndarray) de caption truc tiep trong cung process.
+        keyframe_writers: so thread resize + encode keyframe song song voi decode (0 = inline).
+        keyframe_queue_size: so keyframe toi da dang cho ghi (mac dinh 2 x keyframe_writers).
+        scene_stats: luu diem detector moi frame vao `scene_scores.bin` canh scene_metadata.json; lan sau cung
+            video + detector + analysis_width/frame_skip thi tinh lai cut cho threshold bat ky ma khong decode.
+            Mac dinh tat: lan detect dau cham hon (ContentDetector tinh them edge moi frame, hash ca file video).
+        keyframe_store: files = `keyframes/*.jpg` nhu cu; packed = mot file `keyframes.pack` (RGB uint8
+            resize x resize, keyframe_store.PackedKeyframeWriter); moi frame co `file_path = "keyframes.pack"`
+            va sidecar `keyframe_store.json` ghi header + pack_index (scene_metadata.json giu dung contract v1).
+        max_keyframes_per_minute / long_scene_seconds: frame budget (xem frame_budget.plan_keyframe_budget):
+            gioi han keyframe moi phut o doan cat nhanh va lay them keyframe trong scene dai, de so caption
+            ti le voi do dai video thay vi so scene. None = midpoint moi scene nhu cu.
+        keyframe_sink: goi sink(frame_info, RGB uint8) ngay khi moi keyframe duoc ghi (ca tu writer pool,
+            khong theo thu tu frame_id) de caption streaming bat dau trong luc video con dang decode;
+            anh la ban handoff neu co, nguoc lai ban resize x resize. Sink chan thi vong decode bi chan theo.
+        """
         assert resize in [448, 336], "Resize must be 448 or 336"
+        if keyframe_store not in KEYFRAME_STORES:
+            raise ValueError(f"KEYFRAME_STORE_UNKNOWN: {keyframe_store}. Use one of {KEYFRAME_STORES}")
+        if not write_keyframes and not handoff_size:
+            raise ValueError("KEYFRAME_OUTPUT_MISSING: write_keyframes=False requires handoff_size")
 
         self.video_path = video_path
         self.video_name = Path(video_path).stem
         self.resize = resize
+        self.write_keyframes = write_keyframes
+        self.handoff_size = handoff_size
+        self.keyframes: dict[int, np.ndarray] = {}
+        self.keyframe_writers = max(0, int(keyframe_writers))
+        self.keyframe_queue_size = max(1, int(keyframe_queue_size or 2 * self.keyframe_writers))
+        self.keyframe_stats: dict[str, float | int | str] = {}
+        self._writer = None
+        self._keyframe_stall_s = 0.0
+        self._keyframe_count = 0
+        self.max_keyframes_per_minute = max_keyframes_per_minute
+        self.long_scene_seconds = long_scene_seconds
+        self.frame_budget_stats: dict[str, object] | None = None
+        self.keyframe_sink = keyframe_sink
 
         self.video_dir = os.path.join(output_root, self.video_name)
         self.extraction_dir = os.path.join(self.video_dir, "extraction")
         self.keyframe_dir = os.path.join(self.extraction_dir, "keyframes")
         self.audio_dir = os.path.join(self.extraction_dir, "audio")
         self.audio_path = os.path.join(self.audio_dir, "audio_16k.wav")
-        self.metadata_path = os.path.join(self.extraction_dir, "scene_metadata.json")
-
-        os.makedirs(self.keyframe_dir, exist_ok=True)
+        self.metadata_path = os.path.join(
+            self.extraction_dir, SCENE_METADATA_FILE if write_keyframes else MEMORY_METADATA_FILE
+        )
+        self.scene_stats = scene_stats
+        self.keyframe_store = keyframe_store
+        self.packed_keyframes_path = os.path.join(self.extraction_dir, PACKED_KEYFRAMES_FILE)
+        self._pack = None
+        self._store_info = None
+        self.scene_stats_path = os.path.join(self.extraction_dir, SCENE_STATS_FILE)
+        self._video_fingerprint = None
+
+        if keyframe_store == "files":
+            os.makedirs(self.keyframe_dir, exist_ok=True)
         os.makedirs(self.audio_dir, exist_ok=True)
 
-    def detect_scenes(self, threshold: float = 27.0):
+    def detect_scene_list(
+        self,
+        threshold: float | None = None,
+        detector: str = "content",
+        analysis_width: int | None = None,
+        frame_skip: int = 0,
+        workers: int = 1,
+    ):
+        """
+        Tra ve scene list (start, end) dang FrameTimecode cua scenedetect.
+
+        detector: content | hash | histogram (hash/histogram re hon content).
+        analysis_width: kich thuoc canh lon nhat cua frame dung de phan tich;
+            None = scenedetect tu downscale (~256px).
+        frame_skip: so frame bo qua giua 2 frame phan tich (0 = phan tich moi frame).
+        workers: > 1 thi chia video thanh cac khoang thoi gian va detect song song
+            trong process pool (video ngan se dung it worker hon).
+        """
+        replayed = self._replay_scene_stats(threshold, detector, analysis_width, frame_skip)
+        if replayed is not None:
+            return replayed
+
+        if int(workers) > 1:
+            return self._detect_scene_list_parallel(threshold, detector, analysis_width, frame_skip, int(workers))
+
         # Mở video theo API mới
         video = open_video(self.video_path)
 
         # Tạo scene manager
-        scene_manager = SceneManager()
-        scene_manager.add_detector(ContentDetector(threshold=threshold))
+        scene_manager, scene_detector = _build_scene_manager(
+            video, detector, threshold, analysis_width, self._records_scene_stats(frame_skip)
+        )
 
         # Detect scene
-        scene_manager.detect_scenes(video)
+        scene_manager.detect_scenes(video, frame_skip=max(0, int(frame_skip)))
+
+        last_frame = video.position.get_frames()
+        frame_nums, scores = _scene_manager_scores(scene_manager, scene_detector, 0, last_frame)
+        self._save_scene_stats(
+            detector, analysis_width, frame_skip, video.frame_rate, frame_nums, scores, end_frame=last_frame + 1,
+        )
+        return scene_manager.get_scene_list()
+
+    def _records_scene_stats(self, frame_skip):
+        """Chi doc diem tung frame khi se ghi sidecar; SceneManager khong cho StatsManager khi frame_skip > 0."""
+        return self.scene_stats and max(0, int(frame_skip)) == 0
+
+    def _scene_stats_key(self, detector, analysis_width, frame_skip):
+        if self._video_fingerprint is None:
+            self._video_fingerprint = video_fingerprint(self.video_path)
+        return {
+            "video": self._video_fingerprint,
+            "detector": detector,
+            "analysis_width": analysis_width,
+            "frame_skip": max(0, int(frame_skip)),
+            "min_scene_len": DEFAULT_MIN_SCENE_LEN,
+        }
+
+    def _save_scene_stats(self, detector, analysis_width, frame_skip, fps, frame_nums, scores, end_frame):
+        if not self.scene_stats or not frame_nums:
+            return
+        meta = self._scene_stats_key(detector, analysis_width, frame_skip)
+        meta.update({"fps": float(fps), "end_frame": int(end_frame)})
+        write_scene_stats(self.scene_stats_path, meta, frame_nums, scores)
+
+    def _replay_scene_stats(self, threshold, detector, analysis_width, frame_skip):
+        """Scene list tinh tu diem da luu (khong decode); None neu khong co sidecar khop."""
+        if not self.scene_stats:
+            return None
+        started = time.perf_counter()
+        stored = read_scene_stats(self.scene_stats_path)
+        if stored is None:
+            return None
+        meta, frame_nums, scores = stored
+        if not stats_match(meta, self._scene_stats_key(detector, analysis_width, frame_skip)):
+            return None
+
+        if threshold is None:
+            threshold = default_scene_threshold(detector)
+        cuts = cuts_from_scores(detector, frame_nums, scores, float(threshold), int(meta["min_scene_len"]))
+        base_timecode = FrameTimecode(0, float(meta["fps"]))
+        scene_list = []
+        # Giong SceneManager.get_scene_list: khong co cut thi scene list rong
+        if cuts:
+            scene_list = get_scenes_from_cuts(
+                cut_list=[base_timecode + cut for cut in sorted(set(cuts))],
+                start_pos=base_timecode + int(frame_nums[0]),
+                end_pos=base_timecode + int(meta["end_frame"]),
+            )
+        print(
+            f"(Scene stats hit: {len(cuts)} cuts at threshold {threshold} from {len(frame_nums)} stored scores "
+            f"in {(time.perf_counter() - started) * 1000:.1f} ms, no decode)"
+        )
+        return scene_list
 
+    def _detect_scene_list_parallel(self, threshold, detector, analysis_width, frame_skip, workers):
+        video = open_video(self.video_path)
+        base_timecode = video.base_timecode
+        total_frames = video.duration.get_frames() if video.duration is not None else 0
+        del video
+
+        chunks = plan_chunks(total_frames, workers, MIN_CHUNK_FRAMES)
+        if len(chunks) == 1:
+            return self.detect_scene_list(threshold, detector, analysis_width, frame_skip, workers=1)
+
+        with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+            futures = [
+                pool.submit(
+                    _detect_chunk_cuts,
+                    self.video_path,
+                    start,
+                    end,
+                    detector,
+                    threshold,
+                    analysis_width,
+                    frame_skip,
+                    self._records_scene_stats(frame_skip),
+                )
+                for start, end in chunks
+            ]
+            chunk_results = [future.result() for future in futures]
+
+        self._save_scene_stats(
+            detector,
+            analysis_width,
+            frame_skip,
+            base_timecode.framerate,
+            [frame_num for result in chunk_results for frame_num in result["frame_nums"]],
+            [score for result in chunk_results for score in result["scores"]],
+            end_frame=chunk_results[-1]["last_frame"] + 1,
+        )
+        cuts = stitch_chunk_cuts(chunk_results)
+        # Giong SceneManager.get_scene_list: khong co cut thi scene list rong
+        if not cuts:
+            return []
+        end_frame = chunk_results[-1]["last_frame"] + 1
+        return get_scenes_from_cuts(
+            cut_list=[base_timecode + cut for cut in cuts],
+            start_pos=base_timecode + 0,
+            end_pos=base_timecode + end_frame,
+        )
+
+    def detect_scenes(
+        self,
+        threshold: float | None = 27.0,
+        detector: str = "content",
+        analysis_width: int | None = None,
+        frame_skip: int = 0,
+        workers: int = 1,
+    ):
         # Lấy danh sách scene
-        scene_list = scene_manager.get_scene_list()
+        scene_list = self.detect_scene_list(
+            threshold=threshold,
+            detector=detector,
+            analysis_width=analysis_width,
+            frame_skip=frame_skip,
+            workers=workers,
+        )
+
+        if self.frame_budget_enabled:
+            return self._budget_timestamps(scene_list)
 
         # Lấy timestamp midpoint của mỗi scene
         timestamps = []
@@ -50,6 +440,30 @@ class VideoPreprocessor:
 
         return timestamps
 
+    @property
+    def frame_budget_enabled(self):
+        return bool(self.max_keyframes_per_minute) or bool(self.long_scene_seconds)
+
+    def _budget_timestamps(self, scene_list):
+        scenes = [(scene[0].get_seconds(), scene[1].get_seconds()) for scene in scene_list]
+        if not scenes:
+            # Khong co cut (vd bai giang tinh): ca video la mot scene de budget van lay mau theo thoi luong
+            video = open_video(self.video_path)
+            duration = video.duration.get_seconds() if video.duration is not None else 0.0
+            del video
+            scenes = [(0.0, duration)] if duration > 0 else []
+
+        timestamps, self.frame_budget_stats = plan_keyframe_budget(
+            scenes, self.max_keyframes_per_minute, self.long_scene_seconds
+        )
+        stats = self.frame_budget_stats
+        print(
+            f"(Frame budget: {stats['scenes']} scenes -> {stats['keyframes']} keyframes "
+            f"(+{stats['long_scene_extra']} in long scenes, -{stats['dense_dropped']} in dense minutes), "
+            f"{stats['keyframes_per_minute']}/min)"
+        )
+        return timestamps
+
     def extract_audio(self):
         command = [
             "ffmpeg",
@@ -82,6 +496,109 @@ class VideoPreprocessor:
 
         return self.audio_path
 
+    def extract_audio_array(self, keep_wav: bool = False):
+        """
+        Decode audio 16kHz mono qua ffmpeg stdout thang vao NumPy float32 (khong ghi WAV trung gian).
+
+        keep_wav=True thi van ghi `audio_16k.wav` lam artifact debug.
+        """
+        command = [
+            "ffmpeg",
+            "-nostdin",
+            "-loglevel", "error",
+            "-i", self.video_path,
+            "-vn",
+            "-f", "s16le",
+            "-acodec", "pcm_s16le",
+            "-ar", str(AUDIO_SAMPLE_RATE),
+            "-ac", "1",
+            "pipe:1",
+        ]
+
+        try:
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except FileNotFoundError as exc:
+            raise RuntimeError("EXTRACT_AUDIO_FFMPEG_NOT_FOUND: ffmpeg binary is not available in PATH") from exc
+
+        # Doc het stdout mot lan (khong qua communicate de tranh giu 2 ban copy PCM khi join chunk);
+        # -loglevel error giu stderr nho nen khong bi nghen pipe
+        with process:
+            pcm = process.stdout.read()
+            err = process.stderr.read()
+            returncode = process.wait()
+
+        if returncode != 0:
+            raise RuntimeError(f"EXTRACT_AUDIO_FFMPEG_FAILED: {err.decode('utf-8', errors='replace').strip()}")
+        if not pcm:
+            raise RuntimeError("EXTRACT_AUDIO_EMPTY_OUTPUT: ffmpeg completed but decoded audio is empty")
+
+        if keep_wav:
+            self._write_wav_pcm(pcm)
+
+        # Cung cach chuan hoa voi faster_whisper.decode_audio (int16 / 32768), chia tai cho de khong cap them buffer
+        audio = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+        del pcm
+        audio /= 32768.0
+        return audio
+
+    def audio_pcm_path(self):
+        return os.path.join(self.audio_dir, "audio_16k_pcm.npy")
+
+    def save_audio_pcm(self, audio):
+        """Luu mang float32 (tu extract_audio_array) thanh PCM int16 `.npy` de cache, khong can ghi WAV."""
+        np.save(self.audio_pcm_path(), np.round(audio * 32768.0).astype(np.int16))
+        return self.audio_pcm_path()
+
+    def load_audio_pcm(self):
+        """Doc lai `.npy` cua save_audio_pcm thanh mang float32 giong het extract_audio_array."""
+        audio = np.load(self.audio_pcm_path()).astype(np.float32)
+        audio /= 32768.0
+        return audio
+
+    def load_audio_array(self):
+        """Doc `audio_16k.wav` (PCM s16le 16kHz mono) thanh mang float32 nhu extract_audio_array."""
+        with wave.open(self.audio_path, "rb") as wav_file:
+            pcm = wav_file.readframes(wav_file.getnframes())
+        audio = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+        audio /= 32768.0
+        return audio
+
+    def _write_wav_pcm(self, pcm):
+        with wave.open(self.audio_path, "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(AUDIO_SAMPLE_RATE)
+            wav_file.writeframes(pcm)
+
+    def handoff_keyframes_path(self):
+        return os.path.join(self.extraction_dir, f"handoff_keyframes_{self.handoff_size}.npy")
+
+    def save_handoff_keyframes(self):
+        """Xep keyframe handoff (theo frame_id) thanh mot mang N x H x W x 3 de cache."""
+        frame_ids = sorted(self.keyframes)
+        shape = (0, self.handoff_size or 0, self.handoff_size or 0, 3)
+        stacked = np.stack([self.keyframes[frame_id] for frame_id in frame_ids]) if frame_ids else np.zeros(shape, np.uint8)
+        np.save(self.handoff_keyframes_path(), stacked)
+        return self.handoff_keyframes_path()
+
+    def load_handoff_keyframes(self, metadata):
+        stacked = np.load(self.handoff_keyframes_path())
+        frame_ids = sorted(int(frame["frame_id"]) for frame in metadata["frames"])
+        self.keyframes = {frame_id: stacked[pos] for pos, frame_id in enumerate(frame_ids)}
+        return self.keyframes
+
+    def emit_keyframes(self, metadata):
+        """Day keyframe cua metadata co san (vd. cache hit, khong decode) vao keyframe_sink theo thu tu frame_id."""
+        if self.keyframe_sink is None:
+            return
+        load_image = None if self.handoff_size else keyframe_loader(metadata, self.extraction_dir)
+        for frame_info in metadata["frames"]:
+            if load_image is None:
+                image = self.keyframes[int(frame_info["frame_id"])]
+            else:
+                image = np.asarray(load_image(frame_info))
+            self.keyframe_sink(frame_info, image)
+
     def extract_keyframes_and_metadata(self, timestamps):
         cap = cv2.VideoCapture(self.video_path)
         fps = cap.get(cv2.CAP_PROP_FPS)
@@ -100,39 +617,232 @@ class VideoPreprocessor:
                 break
             prev_frame_no = frame_no
 
-        if monotonic:
-            self._extract_frames_sequential(cap, targets, frames_metadata)
-        else:
-            self._extract_frames_random_seek(cap, targets, frames_metadata)
+        with self._keyframe_writer_session():
+            if monotonic:
+                self._extract_frames_monotonic(cap, targets, frames_metadata, fps)
+            else:
+                self._extract_frames_random_seek(cap, targets, frames_metadata)
 
         cap.release()
 
+        return self._write_metadata(frames_metadata)
+
+    def detect_scenes_and_extract_keyframes(
+        self,
+        threshold: float | None = 27.0,
+        lookback_frames: int = 240,
+        detector: str = "content",
+        analysis_width: int | None = None,
+        frame_skip: int = 0,
+    ):
+        """
+        Fused mode: tim scene cut va lay keyframe midpoint trong cung mot lan decode.
+
+        Midpoint cua mot scene chi biet duoc khi scene dong lai, nen lookback (toi da `lookback_frames`) chi
+        giu frame tu nua sau cua scene dang mo tro di: frame truoc do khong the la midpoint cua cut nao con toi.
+        Frame o dau scene duoc giu nguyen ban decode va phan lon roi buffer truoc khi scene dong, nen chi
+        frame midpoint moi bi resize/convert; frame xa dau scene hon (se con trong buffer lau hon tang raw cho
+        phep, LOOKBACK_RAW_MAX_BYTES) duoc chuan bi ngay khi decode nhu cu. Scene qua dai (midpoint da roi
+        khoi buffer) duoc lay bu bang mot lan doc chi toi cac target bi lo. Ket qua `scene_metadata.json`
+        giong het `detect_scenes` + `extract_keyframes_and_metadata`.
+        """
+        if self.frame_budget_enabled:
+            # Budget theo phut can biet moi scene trong phut do truoc khi chon keyframe: tach lam 2 lan doc
+            print("(Frame budget needs the full scene list; running detection and keyframe capture as two passes)")
+            timestamps = self.detect_scenes(threshold, detector, analysis_width, frame_skip)
+            return timestamps, self.extract_keyframes_and_metadata(timestamps)
+
+        replayed = self._replay_scene_stats(threshold, detector, analysis_width, frame_skip)
+        if replayed is not None:
+            # Cut da co tu diem luu san: chi con doc keyframe (seek), khong can decode het de detect
+            timestamps = [(scene[0].get_seconds() + scene[1].get_seconds()) / 2 for scene in replayed]
+            return timestamps, self.extract_keyframes_and_metadata(timestamps)
+
+        lookback_frames = max(1, int(lookback_frames))
+        analysis_interval = max(0, int(frame_skip)) + 1
+
+        # Giong SceneManager: cung backend decode, cung he so downscale va interpolation
+        video = open_video(self.video_path)
+        fps = video.frame_rate
+        downscale_factor = _analysis_downscale(video.frame_size, analysis_width)
+        frame_bytes = max(1, int(video.frame_size[0]) * int(video.frame_size[1]) * 3)
+        # Frame offset <= raw_offset_limit trong scene het la ung vien sau <= max_raw frame (xem earliest_target)
+        max_raw = max(1, min(lookback_frames, LOOKBACK_RAW_MAX_BYTES // frame_bytes))
+        raw_offset_limit = 2 * max_raw - CUT_REPORT_LAG_FRAMES
+        scene_detector = _build_detector(detector, threshold)
+        # Vong decode tu quan ly nen frame_skip khong chan StatsManager: ghi diem cac frame da phan tich
+        stats_manager = _attach_stats_manager(scene_detector) if self.scene_stats else None
+        analyzed_frames = []
+
+        lookback = deque()  # (frame_num, frame BGR goc | None, _prepare_keyframe | None), frame_num lien tuc
+        timestamps = []
+        frames_metadata = []
+        missed_targets = []
+        scene_start = None
+        last_cut = None
+        last_frame_num = None
+
+        def close_scene(start_frame, end_frame):
+            idx = len(timestamps)
+            ts = (start_frame / fps + end_frame / fps) / 2
+            timestamps.append(ts)
+            target_frame = int(float(ts) * fps)
+            if lookback and lookback[0][0] <= target_frame <= lookback[-1][0]:
+                _, frame, prepared = lookback[target_frame - lookback[0][0]]
+                if frame is not None:
+                    self._persist_frame(idx, ts, frame, frames_metadata)
+                else:
+                    self._store_keyframe(idx, ts, prepared, frames_metadata)
+            else:
+                missed_targets.append((idx, float(ts), target_frame))
+
+        with self._keyframe_writer_session():
+            while True:
+                frame = video.read()
+                if frame is False:
+                    break
+                frame_num = video.position.frame_num
+                if scene_start is None:
+                    scene_start = frame_num
+                last_frame_num = frame_num
+                # Cut tiep theo >= frame_num - lag nen midpoint cua scene dang mo khong nho hon earliest_target
+                # (bo sot chi lam target bi doc bu, ket qua khong doi)
+                open_start = scene_start if last_cut is None else last_cut
+                earliest_target = (open_start + frame_num - CUT_REPORT_LAG_FRAMES) // 2 - 1
+                if frame_num - open_start <= raw_offset_limit:
+                    lookback.append((frame_num, frame, None))
+                else:
+                    lookback.append((frame_num, None, self._prepare_keyframe(frame)))
+                while lookback and (lookback[0][0] < earliest_target or len(lookback) > lookback_frames):
+                    lookback.popleft()
+
+                # frame_skip chi bo qua buoc phan tich, keyframe van lay tu moi frame da decode
+                if (frame_num - scene_start) % analysis_interval != 0:
+                    continue
+
+                if downscale_factor > 1.0:
+                    frame = cv2.resize(
+                        frame,
+                        (
+                            max(1, round(frame.shape[1] / downscale_factor)),
+                            max(1, round(frame.shape[0] / downscale_factor)),
+                        ),
+                        interpolation=cv2.INTER_LINEAR,
+                    )
+
+                if stats_manager is not None:
+                    analyzed_frames.append(frame_num)
+                for cut in scene_detector.process_frame(frame_num, frame):
+                    if last_cut is not None and cut <= last_cut:
+                        continue
+                    close_scene(scene_start if last_cut is None else last_cut, cut)
+                    last_cut = cut
+
+            if last_frame_num is not None:
+                for cut in scene_detector.post_process(last_frame_num):
+                    if last_cut is not None and cut <= last_cut:
+                        continue
+                    close_scene(scene_start if last_cut is None else last_cut, cut)
+                    last_cut = cut
+
+                # Khong co cut nao thi scene list rong (giong SceneManager.get_scene_list)
+                if last_cut is not None:
+                    close_scene(last_cut, last_frame_num + 1)
+
+            lookback.clear()
+            if last_frame_num is not None and stats_manager is not None:
+                self._save_scene_stats(
+                    detector, analysis_width, frame_skip, fps,
+                    analyzed_frames, _recorded_scores(stats_manager, scene_detector, analyzed_frames),
+                    end_frame=last_frame_num + 1,
+                )
+
+            if missed_targets:
+                print(f"(Lookback miss: {len(missed_targets)} keyframes, re-reading from source)")
+                cap = cv2.VideoCapture(self.video_path)
+                self._extract_frames_monotonic(cap, missed_targets, frames_metadata, fps)
+                cap.release()
+                frames_metadata.sort(key=lambda item: item["frame_id"])
+
+        return timestamps, self._write_metadata(frames_metadata)
+
+    def _write_metadata(self, frames_metadata):
         metadata = {
             "total_keyframes": len(frames_metadata),
             "frames": frames_metadata
         }
+        if self._store_info is not None and self._store_info["format"] == "memory":
+            metadata["keyframe_store"] = self._store_info
+            # scene_metadata.json cua lan chay truoc khong con khop voi keyframe cua lan nay
+            Path(self.extraction_dir, SCENE_METADATA_FILE).unlink(missing_ok=True)
+        packed = self._store_info is not None and self._store_info["format"] == "packed"
+        write_store_descriptor(
+            self.extraction_dir,
+            self._store_info if packed else None,
+            {int(frame["frame_id"]): int(frame["frame_id"]) - 1 for frame in frames_metadata},
+        )
 
         with open(self.metadata_path, "w", encoding="utf-8") as f:
             json.dump(metadata, f, indent=4)
 
         return metadata
 
+    def _extract_frames_monotonic(self, cap, targets, frames_metadata, fps):
+        strategy = self._choose_extract_strategy(targets, fps)
+        if strategy == "seek":
+            self._extract_frames_seek(cap, targets, frames_metadata, fps)
+        else:
+            self._extract_frames_sequential(cap, targets, frames_metadata)
+        return strategy
+
+    @staticmethod
+    def _choose_extract_strategy(targets, fps):
+        """Target thua (it scene moi phut) -> seek; target day -> grab tuan tu."""
+        if not targets or not fps or fps <= 0:
+            return "sequential"
+        avg_gap_frames = max(0, targets[-1][2]) / len(targets)
+        return "seek" if avg_gap_frames >= SEEK_MIN_GAP_SECONDS * fps else "sequential"
+
     def _extract_frames_sequential(self, cap, targets, frames_metadata):
         target_pos = 0
         frame_cursor = 0
 
         while target_pos < len(targets):
-            success, frame = cap.read()
-            if not success:
+            # grab() van decode nhung bo qua retrieve/convert mau cho frame khong can
+            if not cap.grab():
                 break
 
             target_idx, ts, target_frame = targets[target_pos]
             if frame_cursor >= target_frame:
+                success, frame = cap.retrieve()
+                if not success:
+                    break
                 self._persist_frame(target_idx, ts, frame, frames_metadata)
                 target_pos += 1
 
             frame_cursor += 1
 
+    def _extract_frames_seek(self, cap, targets, frames_metadata, fps):
+        seek_gap_frames = max(1, int(SEEK_MIN_GAP_SECONDS * fps))
+        frame_cursor = 0
+
+        for target_idx, ts, target_frame in targets:
+            # Seek (backend nhay toi I-frame truoc do roi decode toi target) khi target con xa
+            if target_frame - frame_cursor >= seek_gap_frames:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, target_frame)
+                frame_cursor = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+
+            while frame_cursor < target_frame:
+                if not cap.grab():
+                    return
+                frame_cursor += 1
+
+            success, frame = cap.read()
+            if not success:
+                return
+            frame_cursor += 1
+            self._persist_frame(target_idx, ts, frame, frames_metadata)
+
     def _extract_frames_random_seek(self, cap, targets, frames_metadata):
         for idx, ts, frame_number in targets:
             cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
@@ -140,17 +850,108 @@ class VideoPreprocessor:
             if success:
                 self._persist_frame(idx, ts, frame, frames_metadata)
 
+    @contextmanager
+    def _keyframe_writer_session(self):
+        """Mo pool ghi keyframe (neu bat), doi ghi xong roi ghi lai thoi gian decode loop bi chan."""
+        self._keyframe_stall_s = 0.0
+        self._keyframe_count = 0
+        writer = None
+        if self.keyframe_writers > 0:
+            writer = _KeyframeWriterPool(self.keyframe_writers, self.keyframe_queue_size)
+        self._writer = writer
+        self._store_info = None
+        if not self.write_keyframes:
+            self._store_info = {"format": "memory", "shape": [self.handoff_size, self.handoff_size, 3], "channels": "RGB"}
+        elif self.keyframe_store == "packed":
+            self._pack = PackedKeyframeWriter(self.packed_keyframes_path, self.resize, self.resize)
+        drain_s = 0.0
+        try:
+            yield
+            if writer is not None:
+                drain_started = time.perf_counter()
+                writer.drain()
+                drain_s = time.perf_counter() - drain_started
+        finally:
+            self._writer = None
+            if self._pack is not None:
+                self._pack.close()
+                self._store_info = self._pack.store_info()
+                self._pack = None
+            if writer is not None:
+                writer.close()
+
+        mode = f"pool x{self.keyframe_writers} (queue {self.keyframe_queue_size})" if writer is not None else "inline"
+        self.keyframe_stats = {
+            "writer": mode,
+            "frames": self._keyframe_count,
+            "stall_ms": round(self._keyframe_stall_s * 1000, 2),
+            "drain_ms": round(drain_s * 1000, 2),
+        }
+        print(
+            f"(Keyframe writer: {mode}, {self._keyframe_count} frames, "
+            f"decode-loop stall {self.keyframe_stats['stall_ms']} ms, drain {self.keyframe_stats['drain_ms']} ms)"
+        )
+
     def _persist_frame(self, idx, ts, frame, frames_metadata):
-        frame = cv2.resize(frame, (self.resize, self.resize))
+        started = time.perf_counter()
+        entry = self._keyframe_entry(idx, ts)
+        # Metadata append theo thu tu goi nen frame_id/timestamp giu nguyen thu tu khi ghi song song
+        frames_metadata.append(entry)
+        if self._writer is not None:
+            self._writer.submit(self._prepare_and_write, idx, entry, frame)
+        else:
+            self._prepare_and_write(idx, entry, frame)
+        self._keyframe_count += 1
+        self._keyframe_stall_s += time.perf_counter() - started
+
+    def _prepare_keyframe(self, frame):
+        """Resize frame goc mot lan cho moi dau ra: (BGR cho JPEG | None, RGB handoff | None)."""
+        jpeg_frame = cv2.resize(frame, (self.resize, self.resize)) if self.write_keyframes else None
+        handoff_frame = None
+        if self.handoff_size:
+            handoff_frame = cv2.cvtColor(cv2.resize(frame, (self.handoff_size, self.handoff_size)), cv2.COLOR_BGR2RGB)
+        return jpeg_frame, handoff_frame
+
+    def _store_keyframe(self, idx, ts, prepared, frames_metadata):
+        started = time.perf_counter()
+        entry = self._keyframe_entry(idx, ts)
+        frames_metadata.append(entry)
+        if self._writer is not None:
+            self._writer.submit(self._write_prepared, idx, entry, prepared)
+        else:
+            self._write_prepared(idx, entry, prepared)
+        self._keyframe_count += 1
+        self._keyframe_stall_s += time.perf_counter() - started
+
+    def _keyframe_entry(self, idx, ts):
         formatted_ts = self._format_timestamp(ts)
+        if not self.write_keyframes:
+            # Khong ghi anh nao ra dia: khong de file_path tro toi JPEG khong ton tai
+            return {"frame_id": idx + 1, "timestamp": formatted_ts}
+        if self.keyframe_store == "packed":
+            # Anh nam o slot idx cua keyframes.pack (pack_index ghi trong sidecar keyframe_store.json)
+            return {"frame_id": idx + 1, "timestamp": formatted_ts, "file_path": PACKED_KEYFRAMES_FILE}
         filename = f"frame_{formatted_ts.replace(':', '_').replace('.', '_')}.jpg"
-        file_path = os.path.join(self.keyframe_dir, filename)
-        cv2.imwrite(file_path, frame)
-        frames_metadata.append({
+        return {
             "frame_id": idx + 1,
             "timestamp": formatted_ts,
             "file_path": f"keyframes/{filename}"
-        })
+        }
+
+    def _prepare_and_write(self, idx, entry, frame):
+        self._write_prepared(idx, entry, self._prepare_keyframe(frame))
+
+    def _write_prepared(self, idx, entry, prepared):
+        jpeg_frame, handoff_frame = prepared
+        if jpeg_frame is not None and self._pack is not None:
+            self._pack.write(idx, cv2.cvtColor(jpeg_frame, cv2.COLOR_BGR2RGB))
+        elif jpeg_frame is not None:
+            cv2.imwrite(os.path.join(self.keyframe_dir, os.path.basename(entry["file_path"])), jpeg_frame)
+        if handoff_frame is not None:
+            self.keyframes[idx + 1] = handoff_frame
+        if self.keyframe_sink is not None:
+            # __init__ bat buoc co it nhat mot trong hai (KEYFRAME_OUTPUT_MISSING)
+            self.keyframe_sink(entry, handoff_frame if handoff_frame is not None else cv2.cvtColor(jpeg_frame, cv2.COLOR_BGR2RGB))
 
     def _format_timestamp(self, seconds: float):
         td = timedelta(seconds=seconds)
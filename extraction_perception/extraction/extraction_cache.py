@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any
+
+# Tang khi doi dinh dang entry hoac y nghia artifact
+CACHE_FORMAT_VERSION = 1
+
+ENTRY_MANIFEST = "entry.json"
+STATS_FILE = "stats.json"
+DEFAULT_CACHE_MAX_BYTES = 4 * 1024 * 1024 * 1024
+
+# Che do lay mau (full_hash=False): chi doc 3 block dau/giua/cuoi
+_FINGERPRINT_BLOCK_BYTES = 4 * 1024 * 1024
+
+# Ma nguon anh huong truc tiep toi output extraction; doi code thi cache cu tu mat hieu luc
+_CODE_FILES = ("extraction.py", "scene_cuts.py", "scene_stats.py", "frame_budget.py", "keyframe_store.py")
+# Tuong tu cho transcript (ASR, ghep chunk, VAD)
+_ASR_CODE_FILES = ("whisper_module.py", "transcript_chunks.py", "speech_regions.py")
+
+
+def video_fingerprint(video_path: str, full_hash: bool = True) -> str:
+    """
+    Fingerprint theo noi dung video: mac dinh sha256 ca file (khong phu thuoc ten file/mtime).
+
+    full_hash=False chi doc 3 block 4MiB dau/giua/cuoi + kich thuoc: nhanh voi file vai GB nhung sua
+    giua 2 block khong doi kich thuoc se khong bi phat hien, nen them mtime/inode lam guard (copy file
+    sang cho khac se khong trung).
+    """
+    path = Path(video_path)
+    stat = path.stat()
+    size = stat.st_size
+    h = hashlib.sha256()
+    h.update(str(size).encode("utf-8"))
+    if not full_hash:
+        h.update(f"sampled:{stat.st_mtime_ns}:{stat.st_ino}".encode("utf-8"))
+    with path.open("rb") as f:
+        if full_hash or size <= 3 * _FINGERPRINT_BLOCK_BYTES:
+            while True:
+                chunk = f.read(1024 * 1024)
+                if not chunk:
+                    break
+                h.update(chunk)
+        else:
+            for offset in (0, (size - _FINGERPRINT_BLOCK_BYTES) // 2, size - _FINGERPRINT_BLOCK_BYTES):
+                f.seek(offset)
+                h.update(f.read(_FINGERPRINT_BLOCK_BYTES))
+    return h.hexdigest()
+
+
+def audio_fingerprint(audio: Any) -> str:
+    """
+    Fingerprint theo PCM da decode (mang float32 mono 16kHz, C-contiguous), khong theo file container:
+    remux hay doi container nhung giu nguyen audio van trung.
+    """
+    view = memoryview(audio)
+    h = hashlib.sha256()
+    h.update(f"{view.format}:{view.shape}".encode("utf-8"))
+    h.update(view.cast("B"))
+    return h.hexdigest()
+
+
+def _code_fingerprint(code_files: tuple[str, ...] = _CODE_FILES) -> str:
+    h = hashlib.sha256()
+    base_dir = Path(__file__).resolve().parent
+    for name in code_files:
+        path = base_dir / name
+        h.update(name.encode("utf-8"))
+        h.update(path.read_bytes() if path.exists() else b"missing")
+    return h.hexdigest()
+
+
+def extraction_cache_key(fingerprint: str, params: dict[str, Any]) -> str:
+    material = json.dumps(
+        {
+            "format": CACHE_FORMAT_VERSION,
+            "code": _code_fingerprint(),
+            "video": fingerprint,
+            "params": params,
+        },
+        sort_keys=True,
+        ensure_ascii=True,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def transcript_cache_key(fingerprint: str, params: dict[str, Any]) -> str:
+    """Key cache transcript: fingerprint audio + model_size/compute_type/language (+ tham so VAD)."""
+    material = json.dumps(
+        {
+            "format": CACHE_FORMAT_VERSION,
+            "code": _code_fingerprint(_ASR_CODE_FILES),
+            "audio": fingerprint,
+            "params": params,
+        },
+        sort_keys=True,
+        ensure_ascii=True,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _dir_size(path: Path) -> int:
+    return sum(item.stat().st_size for item in path.rglob("*") if item.is_file())
+
+
+class ExtractionCache:
+    """
+    Cache artifact theo noi dung (Module 1 va transcript ASR, moi loai mot thu muc root rieng): moi entry la mot thu muc `<root>/<key>/` chua ban copy artifact
+    (duong dan tuong doi so voi thu muc extraction) va `entry.json`.
+
+    Entry duoc ghi vao thu muc tam roi `os.replace` nen khong bao gio doc phai entry do dang.
+    LRU theo `last_used` trong manifest; vuot `max_bytes` thi xoa entry cu nhat.
+    """
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max(0, int(max_bytes))
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.run_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def restore(self, key: str, dest_dir: str, required: list[str]) -> bool:
+        """Copy artifact cua entry vao dest_dir; tra ve False (miss) neu thieu entry hoac artifact."""
+        entry_dir = self.root / key
+        manifest = self._read_manifest(entry_dir)
+        files = manifest.get("files", []) if manifest else []
+        if not manifest or any(rel not in files for rel in required):
+            self._count("misses")
+            return False
+
+        dest = Path(dest_dir)
+        for rel in files:
+            target = dest / rel
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(entry_dir / rel, target)
+
+        manifest["last_used"] = time.time()
+        manifest["hits"] = int(manifest.get("hits", 0)) + 1
+        self._write_manifest(entry_dir, manifest)
+        self._count("hits")
+        return True
+
+    def store(self, key: str, src_dir: str, files: list[str], params: dict[str, Any] | None = None) -> bool:
+        """Luu artifact (duong dan tuong doi trong src_dir) vao cache roi evict theo LRU."""
+        src = Path(src_dir)
+        entry_dir = self.root / key
+        tmp_dir = self.root / f".tmp-{key}-{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        try:
+            for rel in files:
+                target = tmp_dir / rel
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(src / rel, target)
+            now = time.time()
+            self._write_manifest(
+                tmp_dir,
+                {
+                    "format": CACHE_FORMAT_VERSION,
+                    "files": sorted(files),
+                    "params": params or {},
+                    "size_bytes": _dir_size(tmp_dir),
+                    "created": now,
+                    "last_used": now,
+                    "hits": 0,
+                },
+            )
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        self._count("stores")
+        # Entry vua ghi moi nhat nen chi bi xoa khi rieng no da vuot max_bytes
+        self.evict()
+        return entry_dir.exists()
+
+    def evict(self) -> int:
+        entries = self.entries()
+        total = sum(entry["size_bytes"] for entry in entries)
+        removed = 0
+        for entry in sorted(entries, key=lambda item: item["last_used"]):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(self.root / entry["key"], ignore_errors=True)
+            total -= entry["size_bytes"]
+            removed += 1
+        if removed:
+            self._count("evictions", removed)
+        return removed
+
+    def entries(self) -> list[dict[str, Any]]:
+        rows: list[dict[str, Any]] = []
+        for entry_dir in self.root.iterdir():
+            if not entry_dir.is_dir() or entry_dir.name.startswith("."):
+                continue
+            manifest = self._read_manifest(entry_dir)
+            if manifest is None:
+                continue
+            rows.append(
+                {
+                    "key": entry_dir.name,
+                    "size_bytes": int(manifest.get("size_bytes", 0)),
+                    "last_used": float(manifest.get("last_used", 0.0)),
+                }
+            )
+        return rows
+
+    def stats(self) -> dict[str, Any]:
+        """Thong ke lan chay hien tai + tich luy (luu trong stats.json) + dung luong cache."""
+        entries = self.entries()
+        return {
+            "run": dict(self.run_stats),
+            "total": self._read_total_stats(),
+            "entries": len(entries),
+            "size_bytes": sum(entry["size_bytes"] for entry in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        self.run_stats[name] += amount
+        total = self._read_total_stats()
+        total[name] = int(total.get(name, 0)) + amount
+        tmp_path = self.root / f".{STATS_FILE}.{os.getpid()}"
+        tmp_path.write_text(json.dumps(total, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, self.root / STATS_FILE)
+
+    def _read_total_stats(self) -> dict[str, int]:
+        path = self.root / STATS_FILE
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            payload = {}
+        return {name: int(payload.get(name, 0)) for name in ("hits", "misses", "stores", "evictions")}
+
+    @staticmethod
+    def _read_manifest(entry_dir: Path) -> dict[str, Any] | None:
+        try:
+            payload = json.loads((entry_dir / ENTRY_MANIFEST).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return payload if isinstance(payload, dict) else None
+
+    @staticmethod
+    def _write_manifest(entry_dir: Path, manifest: dict[str, Any]) -> None:
+        entry_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = entry_dir / f".{ENTRY_MANIFEST}.{os.getpid()}"
+        tmp_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp_path, entry_dir / ENTRY_MANIFEST)
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import math
+from typing import Any
+
+
+def sample_scenes(scenes: list[tuple[float, float]], long_scene_seconds: float | None = None) -> list[float]:
+    """
+    Timestamp keyframe (giay) cho moi scene (start, end): midpoint nhu cu.
+
+    long_scene_seconds: scene dai hon nguong nay duoc chia thanh floor(dai / nguong) doan bang nhau,
+    moi doan lay diem giua (scene dai 2.5x nguong -> 2 keyframe o 1/4 va 3/4).
+    """
+    timestamps: list[float] = []
+    for start, end in scenes:
+        duration = float(end) - float(start)
+        count = 1
+        if long_scene_seconds and long_scene_seconds > 0 and duration > long_scene_seconds:
+            count = max(1, math.floor(duration / long_scene_seconds))
+        for k in range(count):
+            timestamps.append(float(start) + (k + 0.5) * duration / count)
+    return timestamps
+
+
+def cap_per_minute(timestamps: list[float], max_per_minute: float | None = None) -> list[float]:
+    """
+    Giu toi da max_per_minute keyframe trong moi phut [60k, 60(k+1)) cua video.
+
+    Phut vuot budget lay cac keyframe cach deu theo thu tu thoi gian (montage cat nhanh van phu ca phut).
+    """
+    ordered = sorted(timestamps)
+    if not max_per_minute or max_per_minute <= 0:
+        return ordered
+    cap = max(1, int(max_per_minute))
+
+    buckets: dict[int, list[float]] = {}
+    for ts in ordered:
+        buckets.setdefault(int(ts // 60), []).append(ts)
+
+    kept: list[float] = []
+    for minute in sorted(buckets):
+        bucket = buckets[minute]
+        if len(bucket) <= cap:
+            kept.extend(bucket)
+            continue
+        kept.extend(bucket[min(len(bucket) - 1, int((i + 0.5) * len(bucket) / cap))] for i in range(cap))
+    return kept
+
+
+def plan_keyframe_budget(
+    scenes: list[tuple[float, float]],
+    max_per_minute: float | None = None,
+    long_scene_seconds: float | None = None,
+) -> tuple[list[float], dict[str, Any]]:
+    """Timestamp keyframe theo budget + thong ke (so scene, keyframe them cho scene dai, keyframe bi cat)."""
+    sampled = sample_scenes(scenes, long_scene_seconds)
+    timestamps = cap_per_minute(sampled, max_per_minute)
+    duration = max((float(end) for _, end in scenes), default=0.0)
+    stats = {
+        "scenes": len(scenes),
+        "long_scene_extra": len(sampled) - len(scenes),
+        "dense_dropped": len(sampled) - len(timestamps),
+        "keyframes": len(timestamps),
+        "keyframes_per_minute": round(len(timestamps) / (duration / 60), 2) if duration > 0 else 0.0,
+        "max_per_minute": max_per_minute,
+        "long_scene_seconds": long_scene_seconds,
+    }
+    return timestamps, stats
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import json
+import struct
+import threading
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+
+# files: moi keyframe mot `keyframes/*.jpg` (nhu cu); packed: mot file `keyframes.pack` cho ca video
+KEYFRAME_STORES = ("files", "packed")
+PACKED_KEYFRAMES_FILE = "keyframes.pack"
+# Sidecar mo ta layout packed (header + pack_index moi frame) canh scene_metadata.json; scene_metadata.json
+# giu dung contract v1 (moi frame `file_path` = `keyframes.pack`, khong them key)
+KEYFRAME_STORE_FILE = "keyframe_store.json"
+
+# Header co dinh dau file: magic, version, height, width, channels, so slot (little-endian); anh bat dau sau
+# PACK_HEADER_BYTES de memmap doc bang offset co dinh
+PACK_MAGIC = b"VSKP"
+PACK_VERSION = 1
+_PACK_HEADER = struct.Struct("<4sHHIIII")
+PACK_HEADER_BYTES = 64
+
+
+class PackedKeyframeWriter:
+    """
+    Ghi keyframe RGB uint8 cung kich thuoc vao mot file: header PACK_HEADER_BYTES roi keyframe pack_index
+    o offset PACK_HEADER_BYTES + pack_index * frame_bytes, doc lai bang np.memmap shape (slots, H, W, 3).
+
+    Ghi duoc tu nhieu thread va khong can theo thu tu (writer pool, fused lookback + doc bu). So slot
+    trong header chi dung sau close(). Anh raw khong nen: ~15x dung luong JPEG cung kich thuoc, doi lai
+    doc bang memmap khong decode.
+    """
+
+    def __init__(self, path: str | Path, height: int, width: int):
+        self.path = Path(path)
+        self.shape = (int(height), int(width), 3)
+        self.frame_bytes = self.shape[0] * self.shape[1] * 3
+        self.slots = 0
+        self._lock = threading.Lock()
+        self._file = self.path.open("wb")
+        self._write_header()
+
+    def _write_header(self) -> None:
+        header = _PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, 0, self.shape[0], self.shape[1], self.shape[2], self.slots)
+        self._file.seek(0)
+        self._file.write(header.ljust(PACK_HEADER_BYTES, b"\0"))
+
+    def write(self, pack_index: int, rgb: Any) -> None:
+        frame = np.ascontiguousarray(rgb, dtype=np.uint8)
+        if frame.shape != self.shape:
+            raise ValueError(f"KEYFRAME_PACK_SHAPE_MISMATCH: {frame.shape} != {self.shape}")
+        with self._lock:
+            self._file.seek(PACK_HEADER_BYTES + int(pack_index) * self.frame_bytes)
+            self._file.write(memoryview(frame).cast("B"))
+            self.slots = max(self.slots, int(pack_index) + 1)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file.closed:
+                return
+            self._write_header()
+            self._file.close()
+
+    def store_info(self) -> dict[str, Any]:
+        """Mo ta ghi vao sidecar `keyframe_store.json` (duong dan tuong doi voi extraction dir)."""
+        return {
+            "format": "packed",
+            "path": self.path.name,
+            "dtype": "uint8",
+            "shape": [self.slots, *self.shape],
+            "channels": "RGB",
+            "version": PACK_VERSION,
+            "header_bytes": PACK_HEADER_BYTES,
+        }
+
+
+def read_pack_header(path: str | Path) -> tuple[int, tuple[int, int, int], int]:
+    """(version, (H, W, C), slots) tu header cua `keyframes.pack`; file sai magic/cut ngan -> KEYFRAME_PACK_INVALID."""
+    with Path(path).open("rb") as f:
+        raw = f.read(PACK_HEADER_BYTES)
+    if len(raw) < _PACK_HEADER.size:
+        raise RuntimeError(f"KEYFRAME_PACK_INVALID: {path} is shorter than the pack header")
+    magic, version, _, height, width, channels, slots = _PACK_HEADER.unpack_from(raw)
+    if magic != PACK_MAGIC:
+        raise RuntimeError(f"KEYFRAME_PACK_INVALID: {path} has magic {magic!r}, expected {PACK_MAGIC!r}")
+    return version, (height, width, channels), slots
+
+
+def write_store_descriptor(base_dir: str | Path, info: dict[str, Any] | None, pack_indexes: dict[int, int]) -> None:
+    """Ghi sidecar `keyframe_store.json` (info + frame_id -> pack_index); info None (layout files) thi xoa sidecar cu."""
+    path = Path(base_dir) / KEYFRAME_STORE_FILE
+    if info is None:
+        path.unlink(missing_ok=True)
+        return
+    frames = [{"frame_id": frame_id, "pack_index": pack_indexes[frame_id]} for frame_id in sorted(pack_indexes)]
+    with path.open("w", encoding="utf-8") as f:
+        json.dump({**info, "frames": frames}, f, indent=4)
+
+
+def packed_store_info(metadata: dict[str, Any], base_dir: str | Path) -> dict[str, Any] | None:
+    """
+    Sidecar `keyframe_store.json` neu cac frame cua metadata tro toi file pack cua no, nguoc lai None
+    (layout files; sidecar cu cua lan chay packed truoc khong ap dung).
+    """
+    path = Path(base_dir) / KEYFRAME_STORE_FILE
+    if not path.exists():
+        return None
+    with path.open("r", encoding="utf-8") as f:
+        info = json.load(f)
+    if info.get("format") != "packed":
+        return None
+    frames = metadata.get("frames") or []
+    if not frames or any(frame.get("file_path") != info["path"] for frame in frames):
+        return None
+    return info
+
+
+def open_packed_keyframes(info: dict[str, Any], base_dir: str | Path) -> Any:
+    """
+    Mang (slots, H, W, 3) memory-mapped chi doc theo mo ta cua sidecar (packed_store_info).
+    Header cua file phai khop version va shape ghi trong sidecar (KEYFRAME_PACK_INVALID neu khong).
+    """
+    shape = tuple(int(dim) for dim in info["shape"])
+    path = Path(base_dir) / str(info["path"])
+    version, frame_shape, slots = read_pack_header(path)
+    if version != PACK_VERSION:
+        raise RuntimeError(f"KEYFRAME_PACK_INVALID: {path} version {version}, expected {PACK_VERSION}")
+    if (slots, *frame_shape) != shape:
+        raise RuntimeError(f"KEYFRAME_PACK_INVALID: {path} header shape {[slots, *frame_shape]} != sidecar {list(shape)}")
+    expected_bytes = PACK_HEADER_BYTES + slots * frame_shape[0] * frame_shape[1] * frame_shape[2]
+    if path.stat().st_size < expected_bytes:
+        raise RuntimeError(f"KEYFRAME_PACK_INVALID: {path} is truncated ({path.stat().st_size} < {expected_bytes} bytes)")
+    if shape[0] == 0:
+        return np.zeros(shape, dtype=np.uint8)
+    return np.memmap(path, dtype=np.dtype(info["dtype"]), mode="r", offset=PACK_HEADER_BYTES, shape=shape)
+
+
+def keyframe_loader(metadata: dict[str, Any], base_dir: str | Path) -> Callable[[dict[str, Any]], Any]:
+    """
+    Ham frame_info -> anh RGB cho ca 2 layout: packed tra ve view cua memmap (khong copy, khong decode),
+    files mo JPEG qua PIL nhu cu.
+    """
+    if (metadata.get("keyframe_store") or {}).get("format") == "memory":
+        raise RuntimeError("KEYFRAME_STORE_IN_MEMORY: keyframes were not written to disk (run with --write-keyframes)")
+    info = packed_store_info(metadata, base_dir)
+    if info is not None:
+        packed = open_packed_keyframes(info, base_dir)
+        pack_indexes = {int(frame["frame_id"]): int(frame["pack_index"]) for frame in info["frames"]}
+        return lambda frame_info: packed[pack_indexes[int(frame_info["frame_id"])]]
+
+    from PIL import Image
+
+    def load_file(frame_info: dict[str, Any]) -> Any:
+        with Image.open(Path(base_dir) / str(frame_info["file_path"])) as img:
+            return img.convert("RGB")
+
+    return load_file
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from typing import Any
+
+SCENE_DETECTORS = ("content", "hash", "histogram")
+
+# Threshold mac dinh cua tung detector (thang do khac nhau, khong dung chung 27.0)
+DEFAULT_SCENE_THRESHOLDS: dict[str, float] = {
+    "content": 27.0,
+    "hash": 0.395,
+    "histogram": 0.05,
+}
+
+# min_scene_len mac dinh cua ContentDetector/HashDetector/HistogramDetector (FlashFilter)
+DEFAULT_MIN_SCENE_LEN = 15
+
+# Preset "fast": phan tich frame nho hon va bo qua 1 frame moi lan doc
+FAST_SCENE_DETECT_PRESET: dict[str, int] = {
+    "analysis_width": 128,
+    "frame_skip": 1,
+}
+
+
+def default_scene_threshold(detector: str) -> float:
+    if detector not in DEFAULT_SCENE_THRESHOLDS:
+        raise ValueError(f"SCENE_DETECTOR_UNKNOWN: {detector}. Use one of {', '.join(SCENE_DETECTORS)}")
+    return DEFAULT_SCENE_THRESHOLDS[detector]
+
+
+def compare_cut_lists(baseline: list[int], candidate: list[int], tolerance: int = 0) -> dict[str, Any]:
+    """So khop cut (frame number) cua candidate voi baseline, moi cut baseline chi match toi da 1 lan."""
+    base = sorted(baseline)
+    cand = sorted(candidate)
+    matched = 0
+    offsets: list[int] = []
+    i = 0
+    j = 0
+    while i < len(base) and j < len(cand):
+        diff = cand[j] - base[i]
+        if abs(diff) <= tolerance:
+            matched += 1
+            offsets.append(abs(diff))
+            i += 1
+            j += 1
+        elif diff < 0:
+            j += 1
+        else:
+            i += 1
+
+    precision = matched / len(cand) if cand else 1.0
+    recall = matched / len(base) if base else 1.0
+    f1 = (2 * precision * recall / (precision + recall)) if (precision + recall) > 0 else 0.0
+    return {
+        "baseline_cuts": len(base),
+        "candidate_cuts": len(cand),
+        "matched": matched,
+        "missed": len(base) - matched,
+        "extra": len(cand) - matched,
+        "precision": round(precision, 4),
+        "recall": round(recall, 4),
+        "f1": round(f1, 4),
+        "max_offset_frames": max(offsets) if offsets else 0,
+    }
+
+
+def plan_chunks(total_frames: int, workers: int, min_chunk_frames: int) -> list[tuple[int, int | None]]:
+    """Chia [0, total_frames) thanh cac khoang lien tiep; chunk cuoi co end=None (doc toi het video)."""
+    workers = max(1, int(workers))
+    if total_frames <= 0:
+        return [(0, None)]
+    count = max(1, min(workers, total_frames // max(1, int(min_chunk_frames))))
+    size = total_frames // count
+    chunks: list[tuple[int, int | None]] = []
+    for idx in range(count):
+        start = idx * size
+        end = None if idx == count - 1 else (idx + 1) * size
+        chunks.append((start, end))
+    return chunks
+
+
+def stitch_chunk_cuts(
+    chunks: list[dict[str, Any]],
+    min_scene_len: int = DEFAULT_MIN_SCENE_LEN,
+    tolerance: int = 1,
+) -> list[int]:
+    """
+    Ghep cut tu cac chunk chay song song.
+
+    Moi chunk: {"start", "end" (None = het video), "cuts"}; "cuts" gom ca cut trong vung
+    warm-up/tail nam ngoai khoang so huu [start, end).
+    - Cut trong khoang so huu duoc giu; cut lech <= tolerance frame o bien chunk bi coi la trung.
+    - Cut o vung warm-up (truoc start) bi bo: chunk chua co lich su detector nen kem tin cay.
+    - Cut o vung tail (sau end) ma chunk so huu bo sot duoc bu lai neu cach moi cut da giu
+      >= min_scene_len frame (chunk truoc co du lich su nen tail dang tin hon warm-up).
+    - Cuoi cung ap lai min_scene_len nhu FlashFilter cua detector khi chay 1 process.
+    """
+    owned: list[int] = []
+    spill: list[int] = []
+    for chunk in chunks:
+        start = int(chunk["start"])
+        end = chunk.get("end")
+        for cut in chunk.get("cuts", []):
+            cut = int(cut)
+            if cut < start:
+                continue
+            if end is None or cut < int(end):
+                owned.append(cut)
+            else:
+                spill.append(cut)
+
+    merged: list[int] = []
+    for cut in sorted(set(owned)):
+        if merged and cut - merged[-1] <= tolerance:
+            continue
+        merged.append(cut)
+
+    for cut in sorted(set(spill)):
+        pos = bisect_left(merged, cut)
+        near_prev = pos > 0 and cut - merged[pos - 1] < min_scene_len
+        near_next = pos < len(merged) and merged[pos] - cut < min_scene_len
+        if not near_prev and not near_next:
+            insort(merged, cut)
+
+    stitched: list[int] = []
+    for cut in merged:
+        if stitched and cut - stitched[-1] < min_scene_len:
+            continue
+        stitched.append(cut)
+    return stitched
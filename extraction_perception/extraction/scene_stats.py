@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Iterable
+
+from extraction_perception.extraction.scene_cuts import DEFAULT_MIN_SCENE_LEN
+
+SCENE_STATS_FILE = "scene_scores.bin"
+SCENE_STATS_FORMAT_VERSION = 1
+_MAGIC = b"VSSCENESCORES\n"
+
+
+def write_scene_stats(path: str | Path, meta: dict[str, Any], frame_nums: Iterable[int], scores: Iterable[float]) -> None:
+    """
+    Ghi diem detector moi frame da phan tich: magic, 1 dong JSON header (meta + so frame + byteorder),
+    roi frame_num (int32) va diem (float64) dang nhi phan lien tiep. NaN = frame khong co diem.
+    """
+    frames = array("i", frame_nums)
+    values = array("d", scores)
+    if len(frames) != len(values):
+        raise ValueError(f"SCENE_STATS_LENGTH_MISMATCH: {len(frames)} frames vs {len(values)} scores")
+    header = dict(meta)
+    header.update({"format": SCENE_STATS_FORMAT_VERSION, "count": len(frames), "byteorder": sys.byteorder})
+
+    stats_path = Path(path)
+    tmp_path = stats_path.with_name(f".{stats_path.name}.{os.getpid()}")
+    with tmp_path.open("wb") as f:
+        f.write(_MAGIC)
+        f.write(json.dumps(header, sort_keys=True).encode("utf-8") + b"\n")
+        f.write(frames.tobytes())
+        f.write(values.tobytes())
+    os.replace(tmp_path, stats_path)
+
+
+def read_scene_stats(path: str | Path) -> tuple[dict[str, Any], array, array] | None:
+    """Tra ve (meta, frame_nums, scores); None neu chua co file hoac file hong/khac phien ban."""
+    try:
+        with Path(path).open("rb") as f:
+            if f.readline() != _MAGIC:
+                return None
+            header = json.loads(f.readline().decode("utf-8"))
+            count = int(header["count"])
+            frames = array("i")
+            values = array("d")
+            frames.frombytes(f.read(count * frames.itemsize))
+            values.frombytes(f.read(count * values.itemsize))
+    except (OSError, ValueError, KeyError):
+        return None
+    if header.get("format") != SCENE_STATS_FORMAT_VERSION or len(frames) != count or len(values) != count:
+        return None
+    if header.get("byteorder") != sys.byteorder:
+        frames.byteswap()
+        values.byteswap()
+    return header, frames, values
+
+
+def stats_match(meta: dict[str, Any], expected: dict[str, Any]) -> bool:
+    """Diem chi dung lai khi cung video + detector + cach phan tich frame (threshold thi tuy y)."""
+    return all(meta.get(key) == value for key, value in expected.items())
+
+
+def cuts_from_scores(
+    detector: str,
+    frame_nums: Iterable[int],
+    scores: Iterable[float],
+    threshold: float,
+    min_scene_len: int = DEFAULT_MIN_SCENE_LEN,
+) -> list[int]:
+    """
+    Tinh lai cut tu diem da luu voi threshold moi, cung quy tac voi detector cua scenedetect:
+
+    - content: score >= threshold qua FlashFilter (MERGE, min_scene_len) cua scenedetect.
+    - hash: score >= threshold va cach cut truoc >= min_scene_len.
+    - histogram: correlation <= 1 - threshold va cach cut truoc >= min_scene_len.
+    """
+    cuts: list[int] = []
+    if detector == "content":
+        from scenedetect.scene_detector import FlashFilter
+
+        flash_filter = FlashFilter(mode=FlashFilter.Mode.MERGE, length=min_scene_len)
+        for frame_num, score in zip(frame_nums, scores):
+            cuts.extend(flash_filter.filter(frame_num=int(frame_num), above_threshold=score >= threshold))
+        return cuts
+
+    if detector == "hash":
+        last_cut = None
+        for frame_num, score in zip(frame_nums, scores):
+            if last_cut is None:
+                last_cut = frame_num
+            if not math.isnan(score) and score >= threshold and frame_num - last_cut >= min_scene_len:
+                cuts.append(int(frame_num))
+                last_cut = frame_num
+        return cuts
+
+    if detector == "histogram":
+        correlation_threshold = max(0.0, min(1.0, 1.0 - threshold))
+        last_cut = None
+        for frame_num, score in zip(frame_nums, scores):
+            # Giong HistogramDetector: khoi tao lai khi last cut con la frame 0 (kiem tra `not`)
+            if not last_cut:
+                last_cut = frame_num
+            if not math.isnan(score) and score <= correlation_threshold and frame_num - last_cut >= min_scene_len:
+                cuts.append(int(frame_num))
+                last_cut = frame_num
+        return cuts
+
+    raise ValueError(f"SCENE_DETECTOR_UNKNOWN: {detector}")
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import json
+from bisect import bisect_right
+from pathlib import Path
+from typing import Any
+
+SPEECH_REGIONS_FILE = "speech_regions.json"
+
+
+def normalize_regions(regions: list[tuple[float, float]]) -> list[tuple[float, float]]:
+    """Sap xep, bo vung rong va gop vung chong nhau."""
+    merged: list[tuple[float, float]] = []
+    for start, end in sorted((float(s), float(e)) for s, e in regions):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class SpeechTimeline:
+    """
+    Anh xa thoi gian tren audio da ghep cac vung speech (concat) ve thoi gian goc cua video.
+
+    Vung i nam tai [concat_starts[i], concat_starts[i] + do dai) tren audio ghep.
+    """
+
+    def __init__(self, regions: list[tuple[float, float]]):
+        self.regions = normalize_regions(regions)
+        self.concat_starts: list[float] = []
+        cursor = 0.0
+        for start, end in self.regions:
+            self.concat_starts.append(cursor)
+            cursor += end - start
+        self.speech_seconds = cursor
+
+    def to_source(self, t: float, is_end: bool = False) -> float:
+        """
+        is_end=True: thoi diem dung dung bien giua 2 vung duoc gan vao cuoi vung truoc
+        (segment ket thuc tai bien khong bi keo sang vung sau).
+        """
+        if not self.regions:
+            return float(t)
+        t = min(max(0.0, float(t)), self.speech_seconds)
+        idx = bisect_right(self.concat_starts, t) - 1
+        if is_end and idx > 0 and t == self.concat_starts[idx]:
+            idx -= 1
+        idx = max(0, idx)
+        return self.regions[idx][0] + (t - self.concat_starts[idx])
+
+    def to_concat(self, t: float) -> float:
+        """Nguoc cua to_source: thoi diem goc -> audio ghep (trong khoang lang thi lay dau vung ke tiep)."""
+        if not self.regions:
+            return float(t)
+        starts = [start for start, _ in self.regions]
+        idx = bisect_right(starts, float(t)) - 1
+        if idx < 0:
+            return 0.0
+        start, end = self.regions[idx]
+        return self.concat_starts[idx] + min(float(t), end) - start
+
+    def remap_segments(self, segments: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        remapped: list[dict[str, Any]] = []
+        for segment in segments:
+            item = dict(segment)
+            item["start"] = self.to_source(float(segment["start"]))
+            item["end"] = max(self.to_source(float(segment["end"]), is_end=True), item["start"])
+            remapped.append(item)
+        return remapped
+
+
+def speech_stats(regions: list[tuple[float, float]], total_seconds: float) -> dict[str, Any]:
+    speech_seconds = sum(end - start for start, end in normalize_regions(regions))
+    total_seconds = max(0.0, float(total_seconds))
+    skipped_seconds = max(0.0, total_seconds - speech_seconds)
+    return {
+        "audio_seconds": round(total_seconds, 3),
+        "speech_seconds": round(speech_seconds, 3),
+        "skipped_seconds": round(skipped_seconds, 3),
+        "skipped_ratio": round(skipped_seconds / total_seconds, 4) if total_seconds > 0 else 0.0,
+    }
+
+
+def _timestamp_to_seconds(ts: str) -> float:
+    hh, mm, rest = ts.split(":")
+    ss, ms = rest.split(".")
+    return int(hh) * 3600 + int(mm) * 60 + int(ss) + int(ms) / 1000
+
+
+def load_speech_regions(path: str) -> list[tuple[float, float]]:
+    """Doc sidecar `speech_regions.json` (start/end `HH:MM:SS.mmm`) thanh danh sach (start_s, end_s)."""
+    payload = json.loads(Path(path).read_text(encoding="utf-8"))
+    return [
+        (_timestamp_to_seconds(item["start"]), _timestamp_to_seconds(item["end"]))
+        for item in payload.get("regions", [])
+    ]
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+from extraction_perception.checkpoint import JsonlCheckpoint, read_jsonl_checkpoint
+
+CHECKPOINT_FILE = "audio_transcripts.partial.jsonl"
+
+
+def read_transcript_checkpoint(path: str | Path) -> list[dict[str, Any]]:
+    """Doc cac segment da hoan thanh ({"start", "end", "text"}, giay) de stage sau dung transcript dang do."""
+    return read_jsonl_checkpoint(path)
+
+
+class TranscriptCheckpoint(JsonlCheckpoint):
+    """Moi record la mot segment {"start", "end", "text"} (giay, theo thoi gian goc cua video)."""
+
+    def __init__(self, path: str | Path, key: dict[str, Any]):
+        super().__init__(path, key, label="ASR checkpoint")
+
+    @property
+    def segments(self) -> list[dict[str, Any]]:
+        return self.records
+
+    @property
+    def resume_from(self) -> float:
+        """Thoi diem (giay) ket thuc muon nhat da transcribe xong; 0 neu chay moi."""
+        return max((float(segment["end"]) for segment in self.records), default=0.0)
+
+    def append(self, segment: dict[str, Any]) -> None:
+        super().append({"start": float(segment["start"]), "end": float(segment["end"]), "text": segment["text"]})
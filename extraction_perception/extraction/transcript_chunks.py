@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import re
+from typing import Any
+
+DEFAULT_CHUNK_SECONDS = 300.0
+# Tim diem cat im lang nhat trong +-search quanh moi moc chunk danh nghia
+DEFAULT_SPLIT_SEARCH_SECONDS = 15.0
+# Moi chunk doc them overlap o 2 dau de Whisper co ngu canh, phan trung duoc loai khi ghep
+DEFAULT_CHUNK_OVERLAP_SECONDS = 1.0
+
+_NORMALIZE_RE = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def choose_split_points(
+    frame_energies: list[float],
+    frame_seconds: float,
+    chunk_seconds: float = DEFAULT_CHUNK_SECONDS,
+    search_seconds: float = DEFAULT_SPLIT_SEARCH_SECONDS,
+) -> list[float]:
+    """
+    Chon diem cat (giay) gan moi boi so cua chunk_seconds, tai frame co nang luong thap nhat
+    trong cua so +-search_seconds. Diem cat tang dan va cach nhau it nhat mot frame.
+    """
+    if frame_seconds <= 0 or chunk_seconds <= 0 or not frame_energies:
+        return []
+    total_seconds = len(frame_energies) * frame_seconds
+    search_frames = max(0, int(search_seconds / frame_seconds))
+    splits: list[float] = []
+    last_frame = 0
+    nominal = chunk_seconds
+    # Chunk cuoi ngan hon nua chunk thi gop vao chunk truoc
+    while nominal + chunk_seconds / 2 < total_seconds:
+        center = int(nominal / frame_seconds)
+        lo = max(last_frame + 1, center - search_frames)
+        hi = min(len(frame_energies) - 1, center + search_frames)
+        if lo > hi:
+            break
+        best = min(range(lo, hi + 1), key=lambda idx: (frame_energies[idx], abs(idx - center)))
+        splits.append(round(best * frame_seconds, 3))
+        last_frame = best
+        nominal = best * frame_seconds + chunk_seconds
+    return splits
+
+
+def plan_audio_chunks(
+    total_seconds: float,
+    split_points: list[float],
+    overlap_seconds: float = DEFAULT_CHUNK_OVERLAP_SECONDS,
+) -> list[dict[str, float]]:
+    """
+    Moi chunk: owned_start/owned_end (khoang so huu, ghep lien nhau) va clip_start/clip_end
+    (khoang thuc su dua vao model, rong them overlap o 2 dau).
+    """
+    bounds = [0.0] + [float(point) for point in split_points if 0.0 < point < total_seconds] + [float(total_seconds)]
+    chunks: list[dict[str, float]] = []
+    for start, end in zip(bounds, bounds[1:]):
+        if end <= start:
+            continue
+        chunks.append(
+            {
+                "owned_start": start,
+                "owned_end": end,
+                "clip_start": max(0.0, start - overlap_seconds),
+                "clip_end": min(float(total_seconds), end + overlap_seconds),
+            }
+        )
+    return chunks
+
+
+def _normalize_text(text: str) -> str:
+    return _NORMALIZE_RE.sub(" ", text.lower()).strip()
+
+
+def iter_stitched_segments(chunks: Any, duplicate_gap_seconds: float = 1.0) -> Any:
+    """
+    Nhu `stitch_chunk_segments` nhung nhan chunk theo thu tu owned_start (co the la generator, chunk xong
+    toi dau ghep toi do) va yield tung segment giu lai theo thu tu chunk, chua sap xep lai.
+    """
+    previous: dict[str, Any] | None = None
+    for chunk in chunks:
+        owned_start = float(chunk["owned_start"])
+        owned_end = float(chunk["owned_end"])
+        offset = float(chunk["clip_start"])
+        for segment in chunk.get("segments", []):
+            text = str(segment.get("text", "")).strip()
+            if not text:
+                continue
+            start = offset + float(segment["start"])
+            end = max(offset + float(segment["end"]), start + 0.001)
+            middle = (start + end) / 2
+            if middle < owned_start or middle >= owned_end:
+                continue
+            if previous is not None:
+                if (
+                    _normalize_text(text) == _normalize_text(previous["text"])
+                    and start < previous["end"] + duplicate_gap_seconds
+                ):
+                    continue
+            previous = {"start": start, "end": end, "text": text}
+            yield previous
+
+
+def stitch_chunk_segments(chunks: list[dict[str, Any]], duplicate_gap_seconds: float = 1.0) -> list[dict[str, Any]]:
+    """
+    Ghep segment tu cac chunk da transcribe.
+
+    Moi chunk: {"owned_start", "owned_end", "clip_start", "segments": [{"start", "end", "text"}]} voi
+    start/end tinh tu dau clip. Segment duoc cong them clip_start; chi giu segment co trung diem nam
+    trong khoang so huu cua chunk (segment vat qua bien chi lay tu mot chunk). Segment trung text
+    (bo dau cau/hoa thuong) voi segment vua giu va bat dau truoc khi no ket thuc + duplicate_gap_seconds
+    bi coi la lap lai do overlap va bi bo. Ket qua sap xep theo start, text rong bi bo, end > start.
+    """
+    ordered = sorted(chunks, key=lambda item: float(item["owned_start"]))
+    kept = list(iter_stitched_segments(ordered, duplicate_gap_seconds))
+    kept.sort(key=lambda item: item["start"])
+    return kept
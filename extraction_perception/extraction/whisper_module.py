@@ -1,7 +1,54 @@
 import os
 import json
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+
+import numpy as np
 from faster_whisper import WhisperModel
+from faster_whisper.audio import decode_audio
+from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+from extraction_perception.extraction.extraction_cache import audio_fingerprint, video_fingerprint
+from extraction_perception.extraction.transcript_chunks import (
+    DEFAULT_CHUNK_OVERLAP_SECONDS,
+    DEFAULT_CHUNK_SECONDS,
+    choose_split_points,
+    iter_stitched_segments,
+    plan_audio_chunks,
+)
+from extraction_perception.extraction.transcript_checkpoint import CHECKPOINT_FILE, TranscriptCheckpoint
+from extraction_perception.extraction.speech_regions import SPEECH_REGIONS_FILE, SpeechTimeline, speech_stats
+
+SAMPLE_RATE = 16000
+# Do dai frame tinh nang luong khi tim diem cat im lang
+ENERGY_FRAME_SECONDS = 0.03
+
+# Model cua moi worker process (nap mot lan trong initializer)
+_CHUNK_MODEL = None
+
+
+def _init_chunk_worker(model_size, device, compute_type, cpu_threads):
+    global _CHUNK_MODEL
+    _CHUNK_MODEL = WhisperModel(model_size, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+
+
+def _transcribe_chunk(audio_chunk, transcribe_kwargs):
+    segments, _ = _CHUNK_MODEL.transcribe(audio_chunk, **transcribe_kwargs)
+    return [
+        {"start": float(segment.start), "end": float(segment.end), "text": segment.text}
+        for segment in segments
+    ]
+
+
+def frame_energies(audio, frame_seconds: float = ENERGY_FRAME_SECONDS):
+    """RMS moi frame (float32 mono 16kHz) de chon diem cat im lang."""
+    frame_len = max(1, int(frame_seconds * SAMPLE_RATE))
+    usable = (len(audio) // frame_len) * frame_len
+    if usable == 0:
+        return []
+    frames = audio[:usable].reshape(-1, frame_len)
+    return np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1)).tolist()
 
 
 class WhisperExtractor:
@@ -9,14 +56,43 @@ class WhisperExtractor:
         self,
         model_size="base",
         device="cpu",
-        compute_type="int8"
+        compute_type="int8",
+        workers: int = 1,
+        chunk_seconds: float = DEFAULT_CHUNK_SECONDS,
+        vad: bool = False,
+        vad_parameters: dict | None = None,
+        cpu_threads: int = 0,
     ):
+        """
+        workers > 1: cat audio tai diem im lang thanh chunk ~chunk_seconds va transcribe song song
+        trong process pool (moi process nap mot model, chia deu CPU thread); khong nap model trong process chinh.
+        vad: chay Silero VAD mot lan truoc ASR, chi dua vung speech vao model va ghi `speech_regions.json`.
+        vad_parameters: tham so cho faster_whisper.vad.VadOptions (mac dinh cua faster-whisper).
+        cpu_threads: tong so CPU thread cho ASR (0 = mac dinh cua CTranslate2 / toan bo core khi chia chunk),
+            dung khi ASR chay song song voi nhanh visual.
+        """
+        self.model_size = model_size
+        self.device = device
+        self.compute_type = compute_type
+        self.workers = max(1, int(workers))
+        self.chunk_seconds = float(chunk_seconds)
+        self.vad = vad
+        self.vad_parameters = dict(vad_parameters or {})
+        self.cpu_threads = max(0, int(cpu_threads))
+        self.last_run_stats: dict = {}
+
+        if self.workers > 1:
+            self.model = None
+            print(f"Whisper chunked mode: {self.workers} worker processes, ~{self.chunk_seconds:.0f}s chunks")
+            return
+
         print("Loading Whisper model...")
 
         self.model = WhisperModel(
             model_size,
             device=device,
-            compute_type=compute_type
+            compute_type=compute_type,
+            cpu_threads=self.cpu_threads,
         )
 
         print("Whisper loaded successfully!")
@@ -37,38 +113,28 @@ class WhisperExtractor:
 
     def transcribe(
         self,
-        input_path: str,
+        input_path: str = "",
         language: str = "",
         output_root: str = "",
         output_name: str = "",
+        audio=None,
     ):
         """
         input_path: path to source media (video/audio)
+        audio: optional float32 mono 16kHz NumPy array (in-memory path); khi co thi bo qua input_path
         """
 
-        print(f"Transcribing: {input_path}")
+        if audio is not None:
+            if not output_name:
+                raise ValueError("output_name is required when transcribing an in-memory audio array")
+            print(f"Transcribing in-memory audio: {len(audio) / 16000:.1f}s")
+        else:
+            print(f"Transcribing: {input_path}")
 
         transcribe_kwargs = {}
         if language:
             transcribe_kwargs["language"] = language
 
-        segments, info = self.model.transcribe(input_path, **transcribe_kwargs)
-
-        results = []
-        for segment in segments:
-            start = float(segment.start)
-            end = float(segment.end)
-            results.append({
-                "start": self._seconds_to_timestamp(start),
-                "end": self._seconds_to_timestamp(end),
-                "text": segment.text.strip()
-            })
-
-        if any(results[i]["start"] > results[i + 1]["start"] for i in range(len(results) - 1)):
-            results.sort(key=lambda item: item["start"])
-
-        final_output = results
-
         # ======= TẠO FOLDER THEO TÊN VIDEO =======
 
         video_name = output_name if output_name else Path(input_path).stem
@@ -80,11 +146,183 @@ class WhisperExtractor:
         output_dir = output_root_path / video_name / "extraction"
         output_dir.mkdir(parents=True, exist_ok=True)
 
+        self.last_run_stats = {}
+        started = time.perf_counter()
+
+        # Segment duoc ghi ngay vao JSONL; chay lai sau crash thi tiep tuc tu segment cuoi da xong
+        checkpoint = TranscriptCheckpoint(output_dir / CHECKPOINT_FILE, self._checkpoint_key(input_path, audio, language))
+        done = checkpoint.resume()
+        resume_from = checkpoint.resume_from
+        if done:
+            print(f"(ASR resume: {len(done)} segments in checkpoint, continuing at {self._seconds_to_timestamp(resume_from)})")
+
+        if audio is None and (self.vad or self.workers > 1 or resume_from > 0):
+            audio = decode_audio(input_path, sampling_rate=SAMPLE_RATE)
+
+        timeline = None
+        if self.vad:
+            audio, timeline = self._speech_only(audio, output_dir)
+
+        # offset tren truc thoi gian cua audio dua vao model (audio ghep speech khi bat VAD)
+        offset = timeline.to_concat(resume_from) if timeline is not None else resume_from
+        if offset > 0:
+            audio = audio[int(offset * SAMPLE_RATE) :]
+
+        asr_started = time.perf_counter()
+        try:
+            if audio is not None and len(audio) == 0:
+                segments = iter(())
+            elif self.workers > 1:
+                segments = self._transcribe_chunked(audio, transcribe_kwargs)
+            else:
+                source = audio if audio is not None else input_path
+                model_segments, info = self.model.transcribe(source, **transcribe_kwargs)
+                segments = (
+                    {"start": float(segment.start), "end": float(segment.end), "text": segment.text}
+                    for segment in model_segments
+                )
+            for segment in segments:
+                segment = {"start": segment["start"] + offset, "end": segment["end"] + offset, "text": segment["text"]}
+                if timeline is not None:
+                    # Thoi gian tren audio chi-co-speech -> thoi gian goc
+                    segment = timeline.remap_segments([segment])[0]
+                checkpoint.append(segment)
+        finally:
+            checkpoint.close()
+        asr_elapsed = time.perf_counter() - asr_started
+
+        if timeline is not None:
+            self._log_vad_savings(asr_elapsed)
+
+        results = []
+        for segment in checkpoint.segments:
+            results.append({
+                "start": self._seconds_to_timestamp(segment["start"]),
+                "end": self._seconds_to_timestamp(segment["end"]),
+                "text": segment["text"].strip()
+            })
+        self.last_run_stats["resumed_segments"] = len(done)
+
+        elapsed = time.perf_counter() - started
+        self.last_run_stats.update({"workers": self.workers, "wall_s": round(elapsed, 2), "segments": len(results)})
+        print(f"(ASR wall {elapsed:.1f}s, workers={self.workers}, segments={len(results)})")
+
+        if any(results[i]["start"] > results[i + 1]["start"] for i in range(len(results) - 1)):
+            results.sort(key=lambda item: item["start"])
+
+        final_output = results
+
         output_path = output_dir / "audio_transcripts.json"
 
         with open(output_path, "w", encoding="utf-8") as f:
             json.dump(final_output, f, ensure_ascii=False, indent=2)
 
         print(f"Saved transcript to {output_path}")
+        checkpoint.remove()
 
         return final_output
+
+    def _checkpoint_key(self, input_path, audio, language):
+        """
+        Checkpoint chi dung lai khi cung noi dung audio (hash PCM trong bo nho hoac hash ca file nguon,
+        khong theo do dai/kich thuoc) va cung cau hinh model, VAD va cach chia chunk.
+        """
+        if audio is not None:
+            source = f"pcm:{audio_fingerprint(np.ascontiguousarray(audio, dtype=np.float32))}"
+        else:
+            source = f"file:{video_fingerprint(input_path, full_hash=True)}"
+        chunking = None
+        if self.workers > 1:
+            # Diem cat chon tu nang luong audio theo chunk_seconds: cung audio + cung tham so thi cung diem cat
+            chunking = {
+                "workers": self.workers,
+                "chunk_seconds": self.chunk_seconds,
+                "overlap_seconds": DEFAULT_CHUNK_OVERLAP_SECONDS,
+                "energy_frame_seconds": ENERGY_FRAME_SECONDS,
+            }
+        return {
+            "source": source,
+            "model_size": self.model_size,
+            "device": self.device,
+            "compute_type": self.compute_type,
+            "language": language,
+            "vad": self.vad,
+            "vad_parameters": self.vad_parameters,
+            "chunking": chunking,
+        }
+
+    def _speech_only(self, audio, output_dir):
+        """Tinh vung speech mot lan, ghi sidecar va tra ve (audio chi gom speech, SpeechTimeline)."""
+        vad_started = time.perf_counter()
+        speech_chunks = get_speech_timestamps(audio, VadOptions(**self.vad_parameters), sampling_rate=SAMPLE_RATE)
+        vad_elapsed = time.perf_counter() - vad_started
+
+        regions = [(chunk["start"] / SAMPLE_RATE, chunk["end"] / SAMPLE_RATE) for chunk in speech_chunks]
+        timeline = SpeechTimeline(regions)
+        stats = speech_stats(regions, len(audio) / SAMPLE_RATE)
+        self.last_run_stats.update(stats)
+        self.last_run_stats["vad_s"] = round(vad_elapsed, 2)
+
+        sidecar = {
+            "sample_rate": SAMPLE_RATE,
+            **stats,
+            "vad_parameters": self.vad_parameters,
+            "regions": [
+                {"start": self._seconds_to_timestamp(start), "end": self._seconds_to_timestamp(end)}
+                for start, end in timeline.regions
+            ],
+        }
+        sidecar_path = output_dir / SPEECH_REGIONS_FILE
+        with open(sidecar_path, "w", encoding="utf-8") as f:
+            json.dump(sidecar, f, ensure_ascii=False, indent=2)
+        print(f"Saved speech regions to {sidecar_path}")
+
+        if not speech_chunks:
+            return audio[:0], timeline
+        speech_audio = np.concatenate([audio[chunk["start"] : chunk["end"]] for chunk in speech_chunks])
+        return speech_audio, timeline
+
+    def _log_vad_savings(self, asr_elapsed):
+        stats = self.last_run_stats
+        speech_fraction = 1.0 - stats["skipped_ratio"]
+        # ASR gan nhu tuyen tinh theo do dai audio: uoc luong thoi gian neu chay ca file
+        estimated_full = asr_elapsed / speech_fraction if speech_fraction > 0 else asr_elapsed
+        saved = estimated_full - asr_elapsed - stats["vad_s"]
+        stats["estimated_saved_s"] = round(saved, 2)
+        print(
+            f"(VAD: skipped {stats['skipped_ratio'] * 100:.1f}% of {stats['audio_seconds']:.1f}s audio "
+            f"({stats['skipped_seconds']:.1f}s), vad {stats['vad_s']:.1f}s, est. ASR time saved {saved:.1f}s)"
+        )
+
+    def _transcribe_chunked(self, audio, transcribe_kwargs):
+        total_seconds = len(audio) / SAMPLE_RATE
+        split_points = choose_split_points(frame_energies(audio), ENERGY_FRAME_SECONDS, self.chunk_seconds)
+        chunks = plan_audio_chunks(total_seconds, split_points, DEFAULT_CHUNK_OVERLAP_SECONDS)
+        workers = min(self.workers, len(chunks))
+        # Chia CPU thread cho cac process de khong oversubscribe
+        cpu_threads = max(1, (self.cpu_threads or os.cpu_count() or 1) // workers)
+        print(f"(ASR chunks: {len(chunks)} over {total_seconds:.1f}s audio, {workers} workers x {cpu_threads} threads)")
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_chunk_worker,
+            initargs=(self.model_size, self.device, self.compute_type, cpu_threads),
+        ) as pool:
+            futures = []
+            for chunk in chunks:
+                clip = audio[int(chunk["clip_start"] * SAMPLE_RATE) : int(chunk["clip_end"] * SAMPLE_RATE)]
+                futures.append(pool.submit(_transcribe_chunk, clip, transcribe_kwargs))
+
+            def completed_chunks():
+                # Theo thu tu chunk: segment cua chunk k duoc ghep (va ghi checkpoint) ngay khi chunk k xong
+                for chunk, future in zip(chunks, futures):
+                    chunk["segments"] = future.result()
+                    yield chunk
+
+            kept = 0
+            for segment in iter_stitched_segments(completed_chunks()):
+                kept += 1
+                yield segment
+
+        raw_count = sum(len(chunk["segments"]) for chunk in chunks)
+        self.last_run_stats.update({"chunks": len(chunks), "raw_segments": raw_count, "dropped_segments": raw_count - kept})
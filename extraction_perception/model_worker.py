@@ -0,0 +1,330 @@
+"""
+Worker song lau giu model ASR (faster-whisper) va caption (BLIP) da nap san.
+
+Chay: `python -m extraction_perception.model_worker [--socket PATH]`. `main.py` tu ket noi khi socket
+ton tai, neu khong thi nap model trong process nhu cu.
+
+Giao thuc (Unix socket, moi ket noi mot request): mot dong JSON header, theo sau la cac mang nhi phan
+mo ta trong `header["arrays"]` ({"name", "dtype", "shape", "nbytes"}); response cung dinh dang.
+
+Moi ket noi mot thread; moi model co lock rieng nen ASR va caption chay song song con 2 job cung model
+xep hang. Worker chi ghi output trong `--allowed-root` (mac dinh thu muc luc khoi dong).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+SOCKET_ENV = "VIDEO_SUMMARY_MODEL_WORKER_SOCKET"
+ALLOWED_ROOT_ENV = "VIDEO_SUMMARY_MODEL_WORKER_ROOT"
+CONNECT_TIMEOUT_S = 1.0
+# Thoi gian toi da cho mot job (gom ca luc xep hang sau job khac cung model)
+DEFAULT_REQUEST_TIMEOUT_S = 3600.0
+
+
+def default_socket_path() -> str:
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return str(Path(tempfile.gettempdir()) / f"video-summary-models-{uid}.sock")
+
+
+def worker_supported() -> bool:
+    return hasattr(socket, "AF_UNIX")
+
+
+def _read_exact(stream: Any, nbytes: int) -> bytes:
+    chunks = []
+    remaining = nbytes
+    while remaining > 0:
+        chunk = stream.read(remaining)
+        if not chunk:
+            raise RuntimeError("MODEL_WORKER_PROTOCOL: connection closed mid-message")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def send_message(stream: Any, header: dict[str, Any], arrays: dict[str, Any] | None = None) -> None:
+    """Ghi header JSON + cac mang (numpy) lien tiep; khong copy mang neu da C-contiguous."""
+    buffers = []
+    specs = []
+    for name, array in (arrays or {}).items():
+        import numpy as np
+
+        array = np.ascontiguousarray(array)
+        specs.append({"name": name, "dtype": array.dtype.str, "shape": list(array.shape), "nbytes": array.nbytes})
+        buffers.append(memoryview(array).cast("B"))
+    payload = dict(header)
+    payload["arrays"] = specs
+    stream.write(json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n")
+    for buffer in buffers:
+        stream.write(buffer)
+    stream.flush()
+
+
+def recv_message(stream: Any) -> tuple[dict[str, Any], dict[str, Any]]:
+    line = stream.readline()
+    if not line:
+        raise RuntimeError("MODEL_WORKER_PROTOCOL: empty message")
+    header = json.loads(line.decode("utf-8"))
+    arrays: dict[str, Any] = {}
+    for spec in header.pop("arrays", []):
+        import numpy as np
+
+        raw = bytearray(_read_exact(stream, int(spec["nbytes"])))
+        arrays[spec["name"]] = np.frombuffer(raw, dtype=np.dtype(spec["dtype"])).reshape(spec["shape"])
+    return header, arrays
+
+
+class ModelWorkerClient:
+    def __init__(self, socket_path: str, timeout_s: float | None = DEFAULT_REQUEST_TIMEOUT_S):
+        self.socket_path = socket_path
+        self.timeout_s = timeout_s
+
+    @classmethod
+    def connect(
+        cls, socket_path: str | None = None, timeout_s: float | None = DEFAULT_REQUEST_TIMEOUT_S
+    ) -> "ModelWorkerClient | None":
+        """Tra ve client neu worker dang chay va tra loi ping, nguoc lai None (caller nap model tai cho)."""
+        if not worker_supported():
+            return None
+        path = socket_path or os.environ.get(SOCKET_ENV) or default_socket_path()
+        if not Path(path).exists():
+            return None
+        client = cls(path, timeout_s=timeout_s)
+        try:
+            client.request({"op": "ping"}, timeout_s=CONNECT_TIMEOUT_S)
+        except (OSError, RuntimeError, ValueError):
+            return None
+        return client
+
+    def request(
+        self,
+        header: dict[str, Any],
+        arrays: dict[str, Any] | None = None,
+        timeout_s: float | None = None,
+    ) -> tuple[dict[str, Any], dict[str, Any]]:
+        timeout = timeout_s if timeout_s is not None else self.timeout_s
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(self.socket_path)
+            with sock.makefile("rwb") as stream:
+                send_message(stream, header, arrays)
+                try:
+                    response, response_arrays = recv_message(stream)
+                except socket.timeout as exc:
+                    raise RuntimeError(f"MODEL_WORKER_TIMEOUT: no response from {self.socket_path} after {timeout}s") from exc
+        if not response.get("ok"):
+            raise RuntimeError(f"MODEL_WORKER_FAILED: {response.get('error', 'unknown error')}")
+        return response, response_arrays
+
+    def transcribe(
+        self,
+        model: dict[str, Any],
+        input_path: str,
+        language: str,
+        output_root: str,
+        output_name: str,
+        audio: Any = None,
+    ) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+        header = {
+            "op": "transcribe",
+            "model": model,
+            # Duong dan tuyet doi: worker chay o thu muc khac voi client
+            "args": {
+                "input_path": str(Path(input_path).resolve()) if input_path else input_path,
+                "language": language,
+                "output_root": str(Path(output_root or "Data/processed").resolve()),
+                "output_name": output_name,
+            },
+        }
+        response, _ = self.request(header, {"audio": audio} if audio is not None else None)
+        return response["result"], response["timing"]
+
+    def caption(
+        self,
+        model: dict[str, Any],
+        metadata_path: str,
+        output_path: str,
+        batch_size: int | None,
+        dedup_threshold: float | None = None,
+        metadata: dict[str, Any] | None = None,
+        keyframes: dict[int, Any] | None = None,
+    ) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+        header = {
+            "op": "caption",
+            "model": model,
+            "args": {
+                "metadata_path": str(Path(metadata_path).resolve()),
+                "output_path": str(Path(output_path).resolve()),
+                "batch_size": batch_size,
+                "dedup_threshold": dedup_threshold,
+                "metadata": metadata if keyframes is not None else None,
+            },
+        }
+        arrays = {str(frame_id): array for frame_id, array in (keyframes or {}).items()}
+        response, _ = self.request(header, arrays or None)
+        return response["result"], response["timing"]
+
+    def shutdown(self) -> None:
+        self.request({"op": "shutdown"})
+
+
+class ModelRegistry:
+    """Giu model da nap theo cau hinh; lan goi dau cung cau hinh la cold, cac lan sau la warm."""
+
+    def __init__(self):
+        self._models: dict[tuple, Any] = {}
+        self._labels: list[str] = []
+        self._locks: dict[tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def loaded(self) -> list[str]:
+        return list(self._labels)
+
+    @staticmethod
+    def _key(kind: str, config: dict[str, Any]) -> tuple:
+        return (kind,) + tuple(sorted((k, json.dumps(v, sort_keys=True)) for k, v in config.items()))
+
+    @contextmanager
+    def use(self, kind: str, config: dict[str, Any]):
+        """Giu lock rieng cua model (nap neu chua co) trong luc chay job; model khac khong bi chan."""
+        key = self._key(kind, config)
+        with self._lock:
+            model_lock = self._locks.setdefault(key, threading.Lock())
+        with model_lock:
+            yield self.get(kind, config)
+
+    def get(self, kind: str, config: dict[str, Any]) -> tuple[Any, float, bool]:
+        key = self._key(kind, config)
+        if key in self._models:
+            return self._models[key], 0.0, True
+        started = time.perf_counter()
+        model = self._load(kind, config)
+        with self._lock:
+            self._models[key] = model
+            self._labels.append(f"{kind}:{config.get('model_size') or config.get('model_name')}")
+        return model, time.perf_counter() - started, False
+
+    def _load(self, kind: str, config: dict[str, Any]) -> Any:
+        if kind == "whisper":
+            from extraction_perception.extraction.whisper_module import WhisperExtractor
+
+            model = WhisperExtractor(**config)
+        elif kind == "caption":
+            from extraction_perception.perception.caption import VisualCaptioner
+
+            model = VisualCaptioner(**config)
+        else:
+            raise ValueError(f"MODEL_WORKER_UNKNOWN_MODEL: {kind}")
+        return model
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "ModelWorkerServer"
+
+    def handle(self) -> None:
+        try:
+            header, arrays = recv_message(self.rfile)
+            response = self.server.dispatch(header, arrays)
+        except Exception as exc:  # loi cua mot job khong lam chet worker
+            response = {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+        send_message(self.wfile, response)
+
+
+class ModelWorkerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Moi request mot thread; job cung model xep hang theo lock cua model (model khong an toan khi goi song song),
+    job khac model (ASR va caption) chay dong thoi. Output chi duoc ghi trong allowed_root.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, registry: ModelRegistry | None = None, allowed_root: str | None = None):
+        self.socket_path = socket_path
+        self.registry = registry or ModelRegistry()
+        self.allowed_root = Path(allowed_root or os.getcwd()).resolve()
+        if Path(socket_path).exists():
+            Path(socket_path).unlink()
+        super().__init__(socket_path, _Handler)
+
+    def server_close(self) -> None:
+        super().server_close()
+        Path(self.socket_path).unlink(missing_ok=True)
+
+    def dispatch(self, header: dict[str, Any], arrays: dict[str, Any]) -> dict[str, Any]:
+        op = header.get("op")
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid(), "models": self.registry.loaded()}
+        if op == "shutdown":
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {"ok": True}
+        if op == "transcribe":
+            args = dict(header["args"])
+            args["output_root"] = self._allowed_path(args.get("output_root") or "Data/processed")
+            with self.registry.use("whisper", header["model"]) as (extractor, load_s, warm):
+                started = time.perf_counter()
+                result = extractor.transcribe(audio=arrays.get("audio"), **args)
+            return {"ok": True, "result": result, "timing": _timing(load_s, time.perf_counter() - started, warm)}
+        if op == "caption":
+            args = dict(header["args"])
+            args["output_path"] = self._allowed_path(args["output_path"])
+            metadata = args.pop("metadata")
+            metadata_path = args.pop("metadata_path")
+            with self.registry.use("caption", header["model"]) as (captioner, load_s, warm):
+                started = time.perf_counter()
+                if arrays:
+                    keyframes = {int(frame_id): array for frame_id, array in arrays.items()}
+                    result = captioner.caption_from_arrays(metadata=metadata, keyframes=keyframes, **args)
+                else:
+                    result = captioner.caption_from_metadata(metadata_path=metadata_path, **args)
+            return {"ok": True, "result": result, "timing": _timing(load_s, time.perf_counter() - started, warm)}
+        raise ValueError(f"MODEL_WORKER_UNKNOWN_OP: {op}")
+
+    def _allowed_path(self, path: str) -> str:
+        """Duong dan ghi output cua client, chi chap nhan ben trong allowed_root (tinh sau khi resolve symlink/..)."""
+        resolved = Path(path).resolve()
+        if not resolved.is_relative_to(self.allowed_root):
+            raise PermissionError(f"MODEL_WORKER_PATH_OUTSIDE_ROOT: {path} is outside {self.allowed_root}")
+        return str(resolved)
+
+
+def _timing(load_s: float, run_s: float, warm: bool) -> dict[str, Any]:
+    return {"load_s": round(load_s, 3), "run_s": round(run_s, 3), "warm": warm}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Worker giu model ASR/caption da nap san cho main.py")
+    parser.add_argument("--socket", default=None, help=f"Duong dan Unix socket (mac dinh ${SOCKET_ENV} hoac {default_socket_path()})")
+    parser.add_argument(
+        "--allowed-root",
+        default=None,
+        help=f"Chi ghi output (output_root/output_path cua client) trong thu muc nay (mac dinh ${ALLOWED_ROOT_ENV} hoac thu muc hien tai)",
+    )
+    args = parser.parse_args()
+    if not worker_supported():
+        raise RuntimeError("MODEL_WORKER_UNSUPPORTED: platform has no AF_UNIX sockets")
+
+    socket_path = args.socket or os.environ.get(SOCKET_ENV) or default_socket_path()
+    server = ModelWorkerServer(socket_path, allowed_root=args.allowed_root or os.environ.get(ALLOWED_ROOT_ENV))
+    print(f"Model worker listening on {socket_path} (pid {os.getpid()}, outputs under {server.allowed_root})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,12 +1,44 @@
+import copy
+import hashlib
 import json
 import math
+import time
 import torch
 from pathlib import Path
-from typing import Any, cast
-from PIL import Image
-from transformers import BlipProcessor, BlipForConditionalGeneration
+from typing import Any, Callable, Iterator, cast
+from transformers import BlipImageProcessor, BlipProcessor, BlipForConditionalGeneration
 from tqdm import tqdm
 
+from extraction_perception.checkpoint import JsonlCheckpoint
+from extraction_perception.extraction.keyframe_store import keyframe_loader, packed_store_info
+from extraction_perception.perception.caption_cascade import (
+    DEFAULT_MIN_LOGPROB,
+    DEFAULT_MIN_WORDS,
+    cascade_stats,
+    escalation_reason,
+)
+from extraction_perception.perception.caption_tuning import (
+    candidate_batch_sizes,
+    candidate_thread_counts,
+    load_tuning,
+    save_tuning,
+    search_best_config,
+    tuning_key,
+)
+from extraction_perception.perception.keyframe_dedup import (
+    SignatureIndex,
+    dedup_stats,
+    image_signature,
+)
+from extraction_perception.perception.keyframe_stream import DEFAULT_BATCH_WAIT_S, KeyframeStream
+from extraction_perception.perception.prefetch import prefetch_map
+
+# So anh that (lap lai cho du batch) dung khi do toc do
+AUTOTUNE_PROBE_IMAGES = 4
+
+# none: float32 eager nhu cu; int8: dynamic quantization cac lop nn.Linear (chi CPU)
+CAPTION_QUANTIZE_MODES = ("none", "int8")
+
 
 def _to_ms(ts: str) -> int:
     hh = int(ts[0:2])
@@ -16,39 +48,497 @@ def _to_ms(ts: str) -> int:
     return (((hh * 60) + mm) * 60 + ss) * 1000 + ms
 
 
+def caption_input_size(model_name: str) -> int:
+    """Kich thuoc anh dau vao goc cua model (chi doc config image processor, khong nap weight)."""
+    image_processor: Any = cast(Any, BlipImageProcessor).from_pretrained(model_name)
+    return int(image_processor.size["height"])
+
+
 class VisualCaptioner:
-    def __init__(self, model_name="Salesforce/blip-image-captioning-base"):
+    def __init__(
+        self,
+        model_name="Salesforce/blip-image-captioning-base",
+        tuning_path: str | None = None,
+        prefetch_workers: int = 1,
+        prefetch_depth: int = 2,
+        quantize: str = "none",
+        cascade_model: str | None = None,
+        cascade_quantize: str = "int8",
+        cascade_min_logprob: float = DEFAULT_MIN_LOGPROB,
+        cascade_min_words: int = DEFAULT_MIN_WORDS,
+        max_threads: int | None = None,
+        share_weights_from: "VisualCaptioner | None" = None,
+    ):
+        """
+        tuning_path: file JSON luu (batch size, so thread) tot nhat theo host + model tren CPU. Chua co thi
+            lan caption dau tien (khong truyen batch_size) chay probe ngan tren vai keyframe that roi luu lai.
+        prefetch_workers/prefetch_depth: so thread doc anh + chay processor cho toi da prefetch_depth batch
+            ke tiep trong luc model generate batch hien tai (0 = tuan tu nhu cu).
+        quantize: "int8" = dynamic quantization weight nn.Linear sang int8 tren CPU (bo qua tren CUDA,
+            noi da chay float16 autocast). Kiem tra do lech caption bang scripts/caption_parity_report.py.
+        cascade_model: neu dat, model nay (tang re, quantize theo cascade_quantize) caption moi frame truoc;
+            chi frame co caption kem tin cay (xem caption_cascade.escalation_reason) moi duoc caption lai
+            bang model_name (tang nang). Trung model_name thi tang re dung lai weight da load (ban sao
+            quantize theo cascade_quantize) thay vi load model lan 2; trung ca quantize thi tat cascade.
+        max_threads: tran so thread torch tren CPU (ca cau hinh autotune) khi caption chay song song voi ASR.
+        share_weights_from: captioner float32 (quantize="none") cung model_name: copy processor + weight cua no
+            thay vi from_pretrained (tang re cua cascade).
+        """
+        if quantize not in CAPTION_QUANTIZE_MODES:
+            raise ValueError(f"CAPTION_INVALID_QUANTIZE: {quantize}. Use one of {CAPTION_QUANTIZE_MODES}")
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         print(f"Using device: {self.device}")
         self.default_batch_size = 8 if self.device == "cuda" else 2
+        self.model_name = model_name
+        self.tuning_path = tuning_path if self.device == "cpu" else None
+        self.tuning: dict[str, Any] | None = None
+        self.prefetch_workers = max(0, int(prefetch_workers))
+        self.prefetch_depth = max(1, int(prefetch_depth))
+        self.pipeline_stats: dict[str, Any] | None = None
+        self.stream_stats: dict[str, Any] | None = None
+        self.max_threads = max(1, int(max_threads)) if max_threads and self.device == "cpu" else None
+        if self.max_threads:
+            torch.set_num_threads(self.max_threads)
+
+        source = share_weights_from
+        if source is not None and source.model_name == model_name and source.quantize == "none":
+            # Khong doc/khoi tao lai checkpoint: processor dung chung, model copy de quantize rieng
+            self.processor: Any = source.processor
+            self.model: Any = copy.deepcopy(source.model)
+        else:
+            self.processor = cast(Any, BlipProcessor).from_pretrained(model_name)
+            self.model = cast(Any, BlipForConditionalGeneration).from_pretrained(model_name)
+            self.model.to(self.device)
+            self.model.eval()
+        self.quantize = quantize if self.device == "cpu" else "none"
+        if quantize != self.quantize:
+            print(f"(Caption quantize={quantize} is CPU-only; running {self.device} without it)")
+        if self.quantize == "int8":
+            # Thay nn.Linear (phan lon FLOP cua ViT + text decoder) bang lop int8 dynamic, giu nguyen generate()
+            torch.ao.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+            print("(Caption model: int8 dynamic quantization on nn.Linear layers)")
+        self.dedup_stats: dict[str, Any] | None = None
+
+        self.cheap: VisualCaptioner | None = None
+        self.cascade_min_logprob = float(cascade_min_logprob)
+        self.cascade_min_words = int(cascade_min_words)
+        self.cascade_stats: dict[str, Any] | None = None
+        cheap_quantize = cascade_quantize if self.device == "cpu" else "none"
+        if cascade_model and cascade_model == model_name and cheap_quantize == self.quantize:
+            print(f"(Caption cascade disabled: cheap tier would be the same {model_name} [{self.quantize}] as the heavy tier)")
+        elif cascade_model:
+            self.cheap = VisualCaptioner(
+                model_name=cascade_model, prefetch_workers=0, quantize=cascade_quantize, share_weights_from=self
+            )
+            print(
+                f"(Caption cascade: {cascade_model} [{self.cheap.quantize}] first, escalate to {model_name} when "
+                f"mean logprob < {self.cascade_min_logprob} or < {self.cascade_min_words} words)"
+            )
+
+        if self.tuning_path:
+            cached = load_tuning(self.tuning_path, self._tuning_key())
+            if cached is not None:
+                self._apply_tuning(cached)
+                print(
+                    f"(Caption tuning: batch={cached['batch_size']} threads={cached['threads']} "
+                    f"~{cached['fps']} fps, from {self.tuning_path})"
+                )
+
+    def _tuning_key(self) -> str:
+        # Model int8 co toc do (va batch toi uu) khac float32 nen tune rieng
+        model_id = self.model_name if self.quantize == "none" else f"{self.model_name}+{self.quantize}"
+        return tuning_key(model_id, self.device)
+
+    def _apply_tuning(self, tuning: dict[str, Any]) -> None:
+        self.tuning = tuning
+        self.default_batch_size = int(tuning["batch_size"])
+        torch.set_num_threads(min(int(tuning["threads"]), self.max_threads or int(tuning["threads"])))
+
+    def autotune(self, images: list[Any], processor_kwargs: dict[str, Any] | None = None) -> dict[str, Any]:
+        """Do frames/giay tren anh mau voi cac batch size / so thread, ap dung va luu cau hinh nhanh nhat."""
+        started = time.perf_counter()
 
-        self.processor: Any = cast(Any, BlipProcessor).from_pretrained(model_name)
-        self.model: Any = cast(Any, BlipForConditionalGeneration).from_pretrained(model_name)
-        self.model.to(self.device)
-        self.model.eval()
+        def load_probe(index: int) -> Any:
+            return images[index % len(images)]
 
-    def caption_from_metadata(self, metadata_path: str, output_path: str, batch_size: int | None = None):
+        def measure(batch_size: int, threads: int) -> float:
+            torch.set_num_threads(threads)
+            t0 = time.perf_counter()
+            self._caption_batch(list(range(batch_size)), batch_size, load_probe, processor_kwargs)
+            return batch_size / max(time.perf_counter() - t0, 1e-9)
+
+        # Warm-up: lan generate dau co chi phi khoi tao, khong tinh vao phep do
+        self._caption_batch([0], 1, load_probe, processor_kwargs)
+        result = search_best_config(measure, candidate_batch_sizes(), candidate_thread_counts(self.max_threads))
+        best = result["best"]
+        self._apply_tuning(best)
+        if self.tuning_path:
+            save_tuning(self.tuning_path, self._tuning_key(), best, result["measurements"])
+        print(
+            f"(Caption autotune: batch={best['batch_size']} threads={best['threads']} -> {best['fps']} fps, "
+            f"{len(result['measurements'])} probes in {time.perf_counter() - started:.1f}s; saved to {self.tuning_path})"
+        )
+        return result
+
+    def caption_from_metadata(
+        self,
+        metadata_path: str,
+        output_path: str,
+        batch_size: int | None = None,
+        dedup_threshold: float | None = None,
+    ):
+        """
+        Doc keyframe theo `scene_metadata.json`: layout files mo tung JPEG; layout packed (sidecar
+        `keyframe_store.json`) cat view truc tiep tu `keyframes.pack` memory-mapped (khong copy, khong decode JPEG).
+        """
         metadata_path_obj = Path(metadata_path)
 
         with open(metadata_path_obj, "r", encoding="utf-8") as f:
             metadata = json.load(f)
 
-        results = []
+        load_image = keyframe_loader(metadata, metadata_path_obj.parent)
+        processor_kwargs = None
+        store = packed_store_info(metadata, metadata_path_obj.parent)
+        if store and tuple(int(dim) for dim in store["shape"][1:3]) == self._native_size():
+            processor_kwargs = {"do_resize": False}
+
+        return self._caption_frames(
+            metadata["frames"], load_image, output_path, batch_size, processor_kwargs, dedup_threshold
+        )
+
+    def caption_from_arrays(
+        self,
+        metadata: dict[str, Any],
+        keyframes: dict[int, Any],
+        output_path: str,
+        batch_size: int | None = None,
+        dedup_threshold: float | None = None,
+    ):
+        """
+        Caption keyframe da co san trong bo nho (VideoPreprocessor.keyframes: frame_id -> RGB uint8).
+
+        Anh da resize dung input size cua model nen bo qua buoc resize cua processor.
+        """
         frames = metadata["frames"]
+        missing = [frame["frame_id"] for frame in frames if int(frame["frame_id"]) not in keyframes]
+        if missing:
+            raise RuntimeError(f"CAPTION_KEYFRAME_MISSING: no in-memory keyframe for frame_id {missing[:5]}")
+
+        native = self._native_size()
+        processor_kwargs = {}
+        if all(tuple(keyframes[int(frame["frame_id"])].shape[:2]) == native for frame in frames):
+            processor_kwargs["do_resize"] = False
+
+        def load_image(frame_info: dict[str, Any]) -> Any:
+            return keyframes[int(frame_info["frame_id"])]
+
+        return self._caption_frames(frames, load_image, output_path, batch_size, processor_kwargs, dedup_threshold)
+
+    def _caption_frames(
+        self,
+        frames: list[dict[str, Any]],
+        load_image: Any,
+        output_path: str,
+        batch_size: int | None,
+        processor_kwargs: dict[str, Any] | None = None,
+        dedup_threshold: float | None = None,
+    ):
+        """
+        dedup_threshold: neu dat, gom keyframe co thumbnail xam 16x16 chenh trung binh <= dedup_threshold
+            (thang 0-255), chi caption frame dai dien moi nhom roi gan caption cho moi timestamp trong nhom.
+            Moi keyframe chi duoc doc mot lan: signature tinh tu chinh anh da load, frame dai dien moi
+            duoc gom thang vao batch caption.
+
+        Caption duoc ghi ngay sau moi batch vao `<output>.partial.jsonl` theo frame_id; chay lai sau crash
+        (cung frames + cau hinh) thi bo qua frame da co caption. Xong thi ghi output contract va xoa checkpoint.
+        """
+        dedup = dedup_threshold is not None and dedup_threshold >= 0 and bool(frames)
+        self.dedup_stats = None
+
+        frame_ids = [int(frame_info.get("frame_id", position + 1)) for position, frame_info in enumerate(frames)]
+        checkpoint = JsonlCheckpoint(
+            Path(output_path).with_suffix(".partial.jsonl"),
+            self._checkpoint_key(frames, frame_ids, processor_kwargs, dedup_threshold),
+            label="Caption checkpoint",
+        )
+        captions_by_id = {int(record["frame_id"]): str(record["caption"]) for record in checkpoint.resume()}
+        if dedup:
+            # Nhom chi biet sau khi doc frame nen representatives/assignment duoc dien dan trong luc caption
+            representatives: list[int] = []
+            assignment: list[int] = []
+            pending: list[int] = []
+            if captions_by_id:
+                print(f"(Caption resume: {len(captions_by_id)} frames from checkpoint)")
+        else:
+            representatives = list(range(len(frames)))
+            assignment = list(range(len(frames)))
+            pending = [idx for idx in representatives if frame_ids[idx] not in captions_by_id]
+            if captions_by_id:
+                print(f"(Caption resume: {len(captions_by_id)} frames from checkpoint, {len(pending)} left)")
+
+        # Tang re chi bo qua resize khi cung input size voi model nang (keyframe da resize theo model nang)
+        first_tier = self.cheap or self
+        first_kwargs = processor_kwargs
+        if self.cheap is not None and self.cheap._native_size() != self._native_size():
+            first_kwargs = None
+
+        autotune = batch_size is None and self.tuning_path and self.tuning is None
+        if autotune and not dedup and pending:
+            self.autotune([load_image(frames[idx]) for idx in pending[:AUTOTUNE_PROBE_IMAGES]], processor_kwargs)
         effective_batch_size = max(1, int(batch_size or self.default_batch_size))
+        batches = [
+            pending[chunk_start : chunk_start + effective_batch_size]
+            for chunk_start in range(0, len(pending), effective_batch_size)
+        ]
+
+        def prepare(batch: list[int]) -> Any:
+            return first_tier._prepare_inputs([load_image(frames[idx]) for idx in batch], first_kwargs)
+
+        def load_by_index(idx: int) -> Any:
+            return load_image(frames[idx])
+
+        # Anh cua frame dai dien (dedup) tu luc tinh signature toi khi batch cua no caption xong
+        loaded: dict[int, Any] = {}
+
+        def load_chunk(chunk: list[int]) -> tuple[list[Any], list[bytes]]:
+            images = [load_image(frames[idx]) for idx in chunk]
+            return images, [image_signature(image) for image in images]
+
+        def dedup_batches() -> Iterator[tuple[list[int], Any, float]]:
+            """Doc frame theo thu tu (prefetch), gan nhom, yield batch frame dai dien chua co caption."""
+            nonlocal autotune, effective_batch_size
+            index = SignatureIndex(float(dedup_threshold))
+            chunks = [
+                list(range(chunk_start, min(chunk_start + effective_batch_size, len(frames))))
+                for chunk_start in range(0, len(frames), effective_batch_size)
+            ]
+            waiting: list[int] = []
+            wait_s = 0.0
+            for chunk, (images, signatures), chunk_wait_s in prefetch_map(
+                chunks, load_chunk, self.prefetch_workers, self.prefetch_depth
+            ):
+                wait_s += chunk_wait_s
+                for idx, image, signature in zip(chunk, images, signatures):
+                    group, is_new = index.assign(signature)
+                    assignment.append(group)
+                    if is_new:
+                        representatives.append(idx)
+                        if frame_ids[idx] not in captions_by_id:
+                            loaded[idx] = image
+                            waiting.append(idx)
+                last_chunk = chunk[-1] == len(frames) - 1
+                if autotune and waiting and (len(waiting) >= AUTOTUNE_PROBE_IMAGES or last_chunk):
+                    self.autotune([loaded[idx] for idx in waiting[:AUTOTUNE_PROBE_IMAGES]], processor_kwargs)
+                    effective_batch_size = max(1, int(self.default_batch_size))
+                    autotune = False
+                while waiting and (len(waiting) >= effective_batch_size or last_chunk):
+                    batch, waiting = waiting[:effective_batch_size], waiting[effective_batch_size:]
+                    pending.extend(batch)
+                    yield batch, None, wait_s
+                    wait_s = 0.0
 
-        for chunk_start in tqdm(range(0, len(frames), effective_batch_size), desc="Captioning"):
-            batch = frames[chunk_start : chunk_start + effective_batch_size]
-            captions = self._caption_batch(metadata_path_obj.parent, batch, effective_batch_size)
-            for frame_info, caption in zip(batch, captions):
-                results.append(
-                    {
-                        "frame_id": int(frame_info.get("frame_id", 0)),
-                        "timestamp": frame_info["timestamp"],
-                        "caption": caption,
-                    }
+        idle_s = 0.0
+        generate_s = 0.0
+        cheap_s = 0.0
+        heavy_s = 0.0
+        batch_count = 0
+        escalation_reasons: list[str] = []
+        started = time.perf_counter()
+        try:
+            if dedup:
+                prefetched = dedup_batches()
+                load_batch_image = loaded.__getitem__
+            else:
+                prefetched = prefetch_map(batches, prepare, self.prefetch_workers, self.prefetch_depth)
+                load_batch_image = load_by_index
+            for batch, prepared, wait_s in tqdm(prefetched, total=None if dedup else len(batches), desc="Captioning"):
+                idle_s += wait_s
+                batch_count += 1
+                generate_started = time.perf_counter()
+                if self.cheap is None:
+                    captions = self._caption_batch(batch, effective_batch_size, load_batch_image, processor_kwargs, prepared)
+                    tiers = ["single"] * len(batch)
+                else:
+                    captions, tiers, reasons, batch_cheap_s = self._caption_cascade_batch(
+                        batch, effective_batch_size, load_batch_image, first_kwargs, processor_kwargs, prepared
+                    )
+                    escalation_reasons.extend(reasons)
+                    cheap_s += batch_cheap_s
+                    heavy_s += time.perf_counter() - generate_started - batch_cheap_s
+                generate_s += time.perf_counter() - generate_started
+                for idx, caption, tier in zip(batch, captions, tiers):
+                    record = {"frame_id": frame_ids[idx], "timestamp": frames[idx]["timestamp"], "caption": caption}
+                    if self.cheap is not None:
+                        record["tier"] = tier
+                    checkpoint.append(record)
+                    captions_by_id[frame_ids[idx]] = caption
+                    loaded.pop(idx, None)
+        finally:
+            checkpoint.close()
+        wall_s = time.perf_counter() - started
+        group_captions = [captions_by_id[frame_ids[idx]] for idx in representatives]
+
+        if dedup:
+            self.dedup_stats = dedup_stats(len(frames), len(representatives), float(dedup_threshold))
+            print(
+                f"(Caption dedup: {len(frames)} keyframes -> {len(representatives)} unique, "
+                f"skipped {self.dedup_stats['skipped_ratio'] * 100:.1f}%, threshold {dedup_threshold})"
+            )
+
+        # Chi tinh frame caption trong lan chay nay (frame lay tu checkpoint khong co thoi gian)
+        self._report_cascade(len(pending), escalation_reasons, cheap_s, heavy_s)
+
+        if batch_count:
+            self.pipeline_stats = {
+                "batches": batch_count,
+                "prefetch_workers": self.prefetch_workers,
+                "generate_s": round(generate_s, 3),
+                "model_idle_s": round(idle_s, 3),
+                "model_idle_ratio": round(idle_s / wall_s, 4) if wall_s > 0 else 0.0,
+            }
+            print(
+                f"(Caption pipeline: {batch_count} batches, generate {generate_s:.1f}s, model idle {idle_s:.1f}s "
+                f"({self.pipeline_stats['model_idle_ratio'] * 100:.1f}%), prefetch workers={self.prefetch_workers})"
+            )
+
+        results = []
+        for frame_info, frame_id, group in zip(frames, frame_ids, assignment):
+            results.append(
+                {
+                    "frame_id": frame_id,
+                    "timestamp": frame_info["timestamp"],
+                    "caption": group_captions[group],
+                }
+            )
+
+        normalized_results = self._write_results(results, output_path)
+        checkpoint.remove()
+        return normalized_results
+
+    def caption_stream(
+        self,
+        stream: KeyframeStream,
+        output_path: str,
+        batch_size: int | None = None,
+        dedup_threshold: float | None = None,
+        max_wait_s: float = DEFAULT_BATCH_WAIT_S,
+    ):
+        """
+        Caption keyframe ngay khi extraction day vao `stream` (VideoPreprocessor keyframe_sink), khong doi
+        extraction xong. Batch gom toi da batch_size keyframe, doi them toi da max_wait_s sau keyframe dau.
+
+        Khac caption_from_arrays: khong checkpoint (danh sach frame chua biet truoc) va dedup so voi cac
+        frame dai dien da den truoc theo thu tu den. Output giong het (sap theo timestamp).
+        """
+        effective_batch_size = max(1, int(batch_size or self.default_batch_size))
+        autotune = batch_size is None and self.tuning_path and self.tuning is None
+        native = self._native_size()
+        first_tier = self.cheap or self
+
+        entries: list[tuple[dict[str, Any], int]] = []
+        group_captions: list[str] = []
+        signature_index = SignatureIndex(float(dedup_threshold)) if dedup_threshold is not None and dedup_threshold >= 0 else None
+        escalation_reasons: list[str] = []
+        captioned = 0
+        batches = 0
+        generate_s = 0.0
+        cheap_s = 0.0
+        heavy_s = 0.0
+        first_caption_s = None
+        while True:
+            items = stream.get_batch(effective_batch_size, max_wait_s)
+            if items is None:
+                break
+
+            images: list[Any] = []
+            groups: list[int] = []
+            for frame_info, image in items:
+                group = -1
+                if signature_index is not None:
+                    index_group, is_new = signature_index.assign(image_signature(image))
+                    group = -1 if is_new else index_group
+                if group < 0:
+                    group = len(group_captions)
+                    group_captions.append("")
+                    images.append(image)
+                    groups.append(group)
+                entries.append((frame_info, group))
+            if not images:
+                continue
+
+            processor_kwargs = {"do_resize": False} if all(tuple(image.shape[:2]) == native for image in images) else None
+            if autotune:
+                # Do tren keyframe that dau tien; cac batch sau dung batch size vua chon
+                self.autotune(images[:AUTOTUNE_PROBE_IMAGES], processor_kwargs)
+                effective_batch_size = max(1, int(self.default_batch_size))
+                autotune = False
+            first_kwargs = processor_kwargs if first_tier._native_size() == native else None
+            positions = list(range(len(images)))
+
+            generate_started = time.perf_counter()
+            if self.cheap is None:
+                captions = self._caption_batch(positions, len(images), images.__getitem__, processor_kwargs)
+            else:
+                captions, _, reasons, batch_cheap_s = self._caption_cascade_batch(
+                    positions, len(images), images.__getitem__, first_kwargs, processor_kwargs
                 )
+                escalation_reasons.extend(reasons)
+                cheap_s += batch_cheap_s
+                heavy_s += time.perf_counter() - generate_started - batch_cheap_s
+            generate_s += time.perf_counter() - generate_started
+            for group, caption in zip(groups, captions):
+                group_captions[group] = caption
+            captioned += len(images)
+            batches += 1
+            if first_caption_s is None:
+                first_caption_s = time.perf_counter() - stream.started
 
+        self._report_cascade(captioned, escalation_reasons, cheap_s, heavy_s)
+        self.dedup_stats = None
+        if dedup_threshold is not None and dedup_threshold >= 0 and entries:
+            self.dedup_stats = dedup_stats(len(entries), captioned, float(dedup_threshold))
+        self.stream_stats = {
+            **stream.stats(),
+            "captioned": captioned,
+            "batches": batches,
+            "first_caption_s": round(first_caption_s, 3) if first_caption_s is not None else None,
+            "generate_s": round(generate_s, 3),
+            "end_to_end_s": round(time.perf_counter() - stream.started, 3),
+        }
+        stats = self.stream_stats
+        print(
+            f"(Caption stream: {len(entries)} keyframes ({captioned} captioned) in {batches} batches, first caption at "
+            f"{stats['first_caption_s']}s, end-to-end {stats['end_to_end_s']}s, generate {generate_s:.1f}s, "
+            f"waiting for keyframes {stats['consumer_wait_s']}s, producer stall {stats['producer_stall_s']}s, "
+            f"queue max {stats['max_depth']}/{stats['queue_size']})"
+        )
+
+        results = [
+            {
+                "frame_id": int(frame_info["frame_id"]),
+                "timestamp": frame_info["timestamp"],
+                "caption": group_captions[group],
+            }
+            for frame_info, group in entries
+        ]
+        return self._write_results(results, output_path)
+
+    def _report_cascade(self, frames: int, reasons: list[str], cheap_s: float, heavy_s: float) -> None:
+        self.cascade_stats = None
+        if self.cheap is None or not frames:
+            return
+        self.cascade_stats = cascade_stats(frames, reasons, cheap_s, heavy_s)
+        stats = self.cascade_stats
+        estimate = stats["heavy_only_estimate_s"]
+        print(
+            f"(Caption cascade: escalated {stats['escalated']}/{stats['frames']} frames "
+            f"({stats['escalation_rate'] * 100:.1f}%, {stats['reasons']}), inference cheap {cheap_s:.1f}s + "
+            f"heavy {heavy_s:.1f}s = {stats['total_s']:.1f}s"
+            + (f", heavy-only ~{estimate:.1f}s)" if estimate is not None else ")")
+        )
+
+    def _write_results(self, results: list[dict[str, Any]], output_path: str) -> list[dict[str, Any]]:
+        """Sap caption theo (timestamp, frame_id) va ghi output contract `[{timestamp, caption}]`."""
         if any(
             (_to_ms(results[i]["timestamp"]), int(results[i]["frame_id"]))
             > (_to_ms(results[i + 1]["timestamp"]), int(results[i + 1]["frame_id"]))
@@ -70,30 +560,136 @@ class VisualCaptioner:
         print(f"Saved captions to {output_path}")
         return normalized_results
 
-    def _caption_batch(self, base_dir: Path, frame_batch: list[dict[str, Any]], batch_size: int) -> list[str]:
+    def _checkpoint_key(
+        self,
+        frames: list[dict[str, Any]],
+        frame_ids: list[int],
+        processor_kwargs: dict[str, Any] | None,
+        dedup_threshold: float | None,
+    ) -> dict[str, Any]:
+        """Checkpoint chi dung lai khi cung danh sach frame va cung cau hinh model/input."""
+        frame_list = json.dumps([[frame_id, frame["timestamp"]] for frame_id, frame in zip(frame_ids, frames)])
+        return {
+            "frames": hashlib.sha256(frame_list.encode("utf-8")).hexdigest(),
+            "model_name": self.model_name,
+            "quantize": self.quantize,
+            "processor_kwargs": processor_kwargs or {},
+            "dedup_threshold": dedup_threshold,
+            "cascade": None
+            if self.cheap is None
+            else {
+                "model_name": self.cheap.model_name,
+                "quantize": self.cheap.quantize,
+                "min_logprob": self.cascade_min_logprob,
+                "min_words": self.cascade_min_words,
+            },
+        }
+
+    def _caption_cascade_batch(
+        self,
+        batch: list[int],
+        batch_size: int,
+        load_image: Callable[[int], Any],
+        cheap_kwargs: dict[str, Any] | None,
+        processor_kwargs: dict[str, Any] | None,
+        prepared: Any = None,
+    ) -> tuple[list[str], list[str], list[str], float]:
+        """Caption batch bang tang re, caption lai frame kem tin cay bang model nang. Tra ve (captions, tier, ly do, giay tang re)."""
+        assert self.cheap is not None
+        started = time.perf_counter()
+        scores: list[float] = []
+        captions = self.cheap._caption_batch(batch, batch_size, load_image, cheap_kwargs, prepared, scores_out=scores)
+        cheap_s = time.perf_counter() - started
+
+        tiers = ["cheap"] * len(batch)
+        escalate: list[int] = []
+        reasons: list[str] = []
+        for position, (caption, score) in enumerate(zip(captions, scores)):
+            reason = escalation_reason(caption, score, self.cascade_min_logprob, self.cascade_min_words)
+            if reason is not None:
+                escalate.append(position)
+                reasons.append(reason)
+        if escalate:
+            heavy = self._caption_batch([batch[position] for position in escalate], batch_size, load_image, processor_kwargs)
+            for position, caption in zip(escalate, heavy):
+                captions[position] = caption
+                tiers[position] = "heavy"
+        return captions, tiers, reasons, cheap_s
+
+    def _native_size(self) -> tuple[int, int]:
+        size = self.processor.image_processor.size
+        return int(size["height"]), int(size["width"])
+
+    def _prepare_inputs(self, images: list[Any], processor_kwargs: dict[str, Any] | None = None) -> Any:
+        if processor_kwargs:
+            # Goi thang image processor: BlipProcessor cu khong chuyen tiep kwargs nhu do_resize
+            return self.processor.image_processor(images, return_tensors="pt", **processor_kwargs)
+        return self.processor(images=images, return_tensors="pt", padding=True)
+
+    def _generate(self, inputs: Any, scores_out: list[float] | None = None) -> list[str]:
+        """scores_out: neu truyen, them log-prob trung binh moi token sinh ra cua tung caption (do tin cay)."""
+        inputs = inputs.to(self.device)
+        generate_kwargs: dict[str, Any] = {"max_new_tokens": 30}
+        if scores_out is not None:
+            generate_kwargs.update(output_scores=True, return_dict_in_generate=True)
+        with torch.inference_mode():
+            if self.device == "cuda":
+                with torch.autocast(device_type="cuda", dtype=torch.float16):
+                    output = self.model.generate(**inputs, **generate_kwargs)
+            else:
+                output = self.model.generate(**inputs, **generate_kwargs)
+            if scores_out is not None:
+                scores_out.extend(self._mean_token_logprobs(output))
+                output = output.sequences
+
+        decoded = self.processor.batch_decode(output, skip_special_tokens=True)
+        return [x.strip() for x in decoded]
+
+    def _mean_token_logprobs(self, output: Any) -> list[float]:
+        """Trung binh log-softmax cua token da chon o moi buoc generate, bo qua padding sau EOS."""
+        steps = len(output.scores)
+        if steps == 0:
+            return [0.0] * int(output.sequences.shape[0])
+        generated = output.sequences[:, -steps:]
+        logprobs = torch.stack([torch.log_softmax(step.float(), dim=-1) for step in output.scores], dim=1)
+        token_logprobs = logprobs.gather(-1, generated.unsqueeze(-1)).squeeze(-1)
+        mask = generated != self.processor.tokenizer.pad_token_id
+        totals = torch.where(mask, token_logprobs, torch.zeros_like(token_logprobs)).sum(dim=1)
+        return (totals / mask.sum(dim=1).clamp(min=1)).tolist()
+
+    def _caption_batch(
+        self,
+        indices: list[int],
+        batch_size: int,
+        load_image: Callable[[int], Any],
+        processor_kwargs: dict[str, Any] | None = None,
+        prepared: Any = None,
+        scores_out: list[float] | None = None,
+    ) -> list[str]:
+        """
+        indices: vi tri frame trong batch, load_image(index) tra ve anh (PIL hoac RGB uint8) cua vi tri do.
+        prepared: tensor input processor (_prepare_inputs) da tinh san cho ca indices (prefetch); OOM thi
+            bo di va tinh lai tu load_image theo nua batch.
+        scores_out: nhan log-prob trung binh moi token cua tung caption (xem _generate).
+        """
         current_batch_size = max(1, int(batch_size))
         while True:
+            scores: list[float] | None = [] if scores_out is not None else None
             try:
-                captions: list[str] = []
-                for chunk_start in range(0, len(frame_batch), current_batch_size):
-                    chunk = frame_batch[chunk_start : chunk_start + current_batch_size]
-                    images = []
-                    for frame_info in chunk:
-                        image_path = base_dir / str(frame_info["file_path"])
-                        with Image.open(image_path) as img:
-                            images.append(img.convert("RGB"))
-
-                    inputs = self.processor(images=images, return_tensors="pt", padding=True).to(self.device)
-                    with torch.inference_mode():
-                        if self.device == "cuda":
-                            with torch.autocast(device_type="cuda", dtype=torch.float16):
-                                output = self.model.generate(**inputs, max_new_tokens=30)
-                        else:
-                            output = self.model.generate(**inputs, max_new_tokens=30)
-
-                    decoded = self.processor.batch_decode(output, skip_special_tokens=True)
-                    captions.extend([x.strip() for x in decoded])
+                if prepared is not None and current_batch_size >= len(indices):
+                    captions = self._generate(prepared, scores)
+                    if scores_out is not None and scores is not None:
+                        scores_out.extend(scores)
+                    return captions
+
+                captions = []
+                for chunk_start in range(0, len(indices), current_batch_size):
+                    chunk = indices[chunk_start : chunk_start + current_batch_size]
+                    images = [load_image(index) for index in chunk]
+                    captions.extend(self._generate(self._prepare_inputs(images, processor_kwargs), scores))
 
+                if scores_out is not None and scores is not None:
+                    scores_out.extend(scores)
                 return captions
             except RuntimeError as exc:
                 message = str(exc).lower()
@@ -101,4 +697,5 @@ class VisualCaptioner:
                     raise
                 if self.device == "cuda":
                     torch.cuda.empty_cache()
+                prepared = None
                 current_batch_size = max(1, math.floor(current_batch_size / 2))
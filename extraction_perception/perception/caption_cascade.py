@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from collections import Counter
+from typing import Any
+
+# Nguong mac dinh cho tang re: log-prob trung binh moi token (greedy) va so tu toi thieu cua caption
+DEFAULT_MIN_LOGPROB = -1.2
+DEFAULT_MIN_WORDS = 4
+# Caption loi cua BLIP hay lap tu ("a a a a", "a man a man a man"): ti le tu khac nhau duoi nguong nay
+MIN_DISTINCT_WORD_RATIO = 0.5
+
+
+def escalation_reason(
+    caption: str,
+    mean_logprob: float | None,
+    min_logprob: float = DEFAULT_MIN_LOGPROB,
+    min_words: int = DEFAULT_MIN_WORDS,
+) -> str | None:
+    """
+    Ly do caption cua tang re can caption lai bang model nang, None neu giu duoc.
+
+    low_logprob: model re khong chac (log-prob trung binh moi token < min_logprob);
+    short: it hon min_words tu; repetitive: lap tu nhieu (ti le tu khac nhau < MIN_DISTINCT_WORD_RATIO).
+    """
+    words = caption.lower().split()
+    if len(words) < max(1, int(min_words)):
+        return "short"
+    if len(set(words)) / len(words) < MIN_DISTINCT_WORD_RATIO:
+        return "repetitive"
+    if mean_logprob is not None and mean_logprob < min_logprob:
+        return "low_logprob"
+    return None
+
+
+def cascade_stats(frames: int, reasons: list[str], cheap_s: float, heavy_s: float) -> dict[str, Any]:
+    """
+    Tong ket mot lan caption 2 tang. reasons: ly do cua tung frame da escalate.
+
+    heavy_only_estimate_s: uoc luong thoi gian neu model nang caption tat ca frame (theo toc do do duoc
+    tren cac frame da escalate), None khi khong frame nao escalate.
+    """
+    escalated = len(reasons)
+    heavy_only = round(heavy_s / escalated * frames, 3) if escalated else None
+    total_s = cheap_s + heavy_s
+    return {
+        "frames": frames,
+        "escalated": escalated,
+        "escalation_rate": round(escalated / frames, 4) if frames else 0.0,
+        "reasons": dict(sorted(Counter(reasons).items())),
+        "cheap_s": round(cheap_s, 3),
+        "heavy_s": round(heavy_s, 3),
+        "total_s": round(total_s, 3),
+        "heavy_only_estimate_s": heavy_only,
+    }
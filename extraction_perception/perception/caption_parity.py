@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import re
+from typing import Any
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _tokens(caption: str) -> list[str]:
+    return _TOKEN_RE.findall(caption.lower())
+
+
+def token_f1(baseline: str, candidate: str) -> float:
+    """F1 theo tu (khong phan biet hoa thuong/dau cau), dem tu lap theo so lan xuat hien."""
+    base = _tokens(baseline)
+    cand = _tokens(candidate)
+    if not base and not cand:
+        return 1.0
+    remaining = list(base)
+    overlap = 0
+    for token in cand:
+        if token in remaining:
+            remaining.remove(token)
+            overlap += 1
+    if overlap == 0:
+        return 0.0
+    precision = overlap / len(cand)
+    recall = overlap / len(base)
+    return 2 * precision * recall / (precision + recall)
+
+
+def compare_caption_lists(baseline: list[str], candidate: list[str], max_examples: int = 5) -> dict[str, Any]:
+    """So caption cua candidate voi baseline (float32) theo tung frame cung thu tu."""
+    if len(baseline) != len(candidate):
+        raise ValueError(f"CAPTION_PARITY_LENGTH_MISMATCH: {len(baseline)} != {len(candidate)}")
+    scores = [token_f1(base, cand) for base, cand in zip(baseline, candidate)]
+    exact = sum(1 for base, cand in zip(baseline, candidate) if _tokens(base) == _tokens(cand))
+    worst = sorted(range(len(scores)), key=lambda idx: scores[idx])[:max_examples]
+    return {
+        "frames": len(baseline),
+        "exact_match": exact,
+        "exact_match_ratio": round(exact / len(baseline), 4) if baseline else 1.0,
+        "mean_token_f1": round(sum(scores) / len(scores), 4) if scores else 1.0,
+        "min_token_f1": round(min(scores), 4) if scores else 1.0,
+        "disagreements": [
+            {"index": idx, "baseline": baseline[idx], "candidate": candidate[idx], "token_f1": round(scores[idx], 4)}
+            for idx in worst
+            if scores[idx] < 1.0
+        ],
+    }
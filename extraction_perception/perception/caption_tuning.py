@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import json
+import os
+import socket
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+TUNING_FORMAT_VERSION = 1
+
+# Batch dau tien khi do so thread (du lon de thay ro loi ich cua thread, du nho de probe nhanh)
+PROBE_THREAD_BATCH = 4
+# Dung tang batch khi fps khong con tang qua nguong nay (tranh probe batch lon ton thoi gian)
+MIN_GAIN_RATIO = 1.05
+
+
+def tuning_key(model_name: str, device: str, host: str | None = None) -> str:
+    return f"{host or socket.gethostname()}|{model_name}|{device}"
+
+
+def candidate_batch_sizes(max_batch: int = 32) -> list[int]:
+    sizes = []
+    size = 1
+    while size <= max_batch:
+        sizes.append(size)
+        size *= 2
+    return sizes
+
+
+def candidate_thread_counts(cpu_count: int | None = None) -> list[int]:
+    """So thread torch thu: toan bo core, 1/2 va 1/4 (may nhieu core thuong nhanh hon khi khong dung het)."""
+    cpus = max(1, int(cpu_count or os.cpu_count() or 1))
+    return sorted({max(1, cpus // divisor) for divisor in (1, 2, 4)}, reverse=True)
+
+
+def search_best_config(
+    measure: Callable[[int, int], float],
+    batch_sizes: list[int],
+    thread_counts: list[int],
+) -> dict[str, Any]:
+    """
+    Tim (batch_size, threads) cho frames/giay cao nhat, measure(batch_size, threads) -> fps.
+
+    Buoc 1 chon so thread o batch PROBE_THREAD_BATCH; buoc 2 tang dan batch voi so thread do va dung khi
+    fps khong tang them MIN_GAIN_RATIO. Hoa thi lay batch nho hon (it bo nho hon).
+    """
+    measurements: list[dict[str, Any]] = []
+
+    def run(batch_size: int, threads: int) -> float:
+        fps = float(measure(batch_size, threads))
+        measurements.append({"batch_size": batch_size, "threads": threads, "fps": round(fps, 3)})
+        return fps
+
+    probe_batch = min(batch_sizes, key=lambda size: abs(size - PROBE_THREAD_BATCH))
+    thread_fps = {threads: run(probe_batch, threads) for threads in thread_counts}
+    best_threads = max(thread_counts, key=lambda threads: (thread_fps[threads], -threads))
+
+    best = {"batch_size": probe_batch, "threads": best_threads, "fps": thread_fps[best_threads]}
+    previous_fps = 0.0
+    for batch_size in sorted(batch_sizes):
+        fps = thread_fps[best_threads] if batch_size == probe_batch else run(batch_size, best_threads)
+        if fps > best["fps"] or (fps == best["fps"] and batch_size < best["batch_size"]):
+            best = {"batch_size": batch_size, "threads": best_threads, "fps": fps}
+        if batch_size > probe_batch and fps < previous_fps * MIN_GAIN_RATIO:
+            break
+        previous_fps = max(previous_fps, fps)
+
+    best["fps"] = round(best["fps"], 3)
+    return {"best": best, "measurements": measurements}
+
+
+def load_tuning(path: str | Path, key: str) -> dict[str, Any] | None:
+    try:
+        payload = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    entry = payload.get(key) if isinstance(payload, dict) else None
+    if not isinstance(entry, dict) or entry.get("format") != TUNING_FORMAT_VERSION:
+        return None
+    return entry
+
+
+def save_tuning(path: str | Path, key: str, best: dict[str, Any], measurements: list[dict[str, Any]]) -> None:
+    """Ghi de entry cua key trong file JSON chung (mot entry cho moi host + model + device)."""
+    tuning_path = Path(path)
+    tuning_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        payload = json.loads(tuning_path.read_text(encoding="utf-8"))
+        if not isinstance(payload, dict):
+            payload = {}
+    except (OSError, ValueError):
+        payload = {}
+    payload[key] = {
+        "format": TUNING_FORMAT_VERSION,
+        "batch_size": int(best["batch_size"]),
+        "threads": int(best["threads"]),
+        "fps": best["fps"],
+        "measurements": measurements,
+        "tuned_at": time.time(),
+    }
+    tmp_path = tuning_path.with_name(f".{tuning_path.name}.{os.getpid()}")
+    tmp_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp_path, tuning_path)
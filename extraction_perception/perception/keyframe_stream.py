@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from typing import Any
+
+# So keyframe toi da dang cho caption; day thi extraction bi chan (backpressure toi vong decode)
+DEFAULT_STREAM_QUEUE_SIZE = 16
+# Thoi gian toi da doi them keyframe cho du batch sau khi da co keyframe dau tien
+DEFAULT_BATCH_WAIT_S = 0.2
+
+_POLL_S = 0.1
+
+
+class _End:
+    def __init__(self, error: BaseException | None):
+        self.error = error
+
+
+class KeyframeStream:
+    """
+    Hang doi co gioi han giua VideoPreprocessor (producer, `keyframe_sink=stream.put`) va
+    VisualCaptioner.caption_stream (consumer): caption bat dau khi video con dang decode.
+
+    put() chan khi hang doi day (backpressure); close() bao het keyframe (hoac loi cua producer);
+    abort() tu phia consumer lam put() dang chan nem loi thay vi cho mai.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_STREAM_QUEUE_SIZE):
+        self.maxsize = max(1, int(maxsize))
+        self._queue: queue.Queue = queue.Queue(maxsize=self.maxsize)
+        self._lock = threading.Lock()
+        self._aborted: BaseException | None = None
+        self._finished = False
+        self.started = time.perf_counter()
+        self.put_count = 0
+        self.put_stall_s = 0.0
+        self.max_depth = 0
+        self.consumer_wait_s = 0.0
+
+    def _put(self, item: Any) -> None:
+        while True:
+            if self._aborted is not None:
+                raise RuntimeError(
+                    f"KEYFRAME_STREAM_ABORTED: consumer failed ({type(self._aborted).__name__}: {self._aborted})"
+                )
+            try:
+                self._queue.put(item, timeout=_POLL_S)
+                return
+            except queue.Full:
+                continue
+
+    def put(self, frame_info: dict[str, Any], image: Any) -> None:
+        started = time.perf_counter()
+        self._put((frame_info, image))
+        with self._lock:
+            self.put_count += 1
+            self.put_stall_s += time.perf_counter() - started
+            self.max_depth = max(self.max_depth, self._queue.qsize())
+
+    def close(self, error: BaseException | None = None) -> None:
+        self._put(_End(error))
+
+    def abort(self, error: BaseException) -> None:
+        self._aborted = error
+
+    def get_batch(self, max_items: int, max_wait_s: float = DEFAULT_BATCH_WAIT_S) -> list[tuple[dict[str, Any], Any]] | None:
+        """
+        Doi keyframe dau tien, roi gom them toi da max_items trong max_wait_s. None khi stream da dong va het.
+        Producer dong stream kem loi thi nem KEYFRAME_STREAM_PRODUCER_FAILED.
+        """
+        if self._finished:
+            return None
+        started = time.perf_counter()
+        try:
+            return self._collect(max_items, max_wait_s)
+        finally:
+            self.consumer_wait_s += time.perf_counter() - started
+
+    def _collect(self, max_items: int, max_wait_s: float) -> list[tuple[dict[str, Any], Any]] | None:
+        batch: list[tuple[dict[str, Any], Any]] = []
+        deadline = None
+        while len(batch) < max(1, int(max_items)):
+            try:
+                if deadline is None:
+                    item = self._queue.get()
+                else:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+            except queue.Empty:
+                break
+            if isinstance(item, _End):
+                self._finished = True
+                if item.error is not None:
+                    raise RuntimeError(f"KEYFRAME_STREAM_PRODUCER_FAILED: {item.error}") from item.error
+                break
+            batch.append(item)
+            if deadline is None:
+                deadline = time.perf_counter() + max(0.0, float(max_wait_s))
+        return batch or None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "keyframes": self.put_count,
+            "queue_size": self.maxsize,
+            "max_depth": self.max_depth,
+            "producer_stall_s": round(self.put_stall_s, 3),
+            "consumer_wait_s": round(self.consumer_wait_s, 3),
+        }
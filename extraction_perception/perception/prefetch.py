@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterator
+
+
+def prefetch_map(
+    items: list[Any],
+    prepare: Callable[[Any], Any],
+    workers: int = 1,
+    depth: int = 2,
+) -> Iterator[tuple[Any, Any, float]]:
+    """
+    Yield (item, prepare(item), wait_s) dung thu tu items, trong khi toi da `depth` item ke tiep duoc
+    prepare san tren `workers` thread. wait_s la thoi gian consumer phai doi ket qua (model ngoi khong).
+
+    workers <= 0: prepare ngay trong thread goi (khong overlap), wait_s = thoi gian prepare.
+    Loi trong prepare duoc nem lai dung tai item do; item chua chay bi huy khi consumer dung som.
+    """
+    if workers <= 0 or len(items) <= 1:
+        for item in items:
+            started = time.perf_counter()
+            prepared = prepare(item)
+            yield item, prepared, time.perf_counter() - started
+        return
+
+    depth = max(1, int(depth))
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="caption_prefetch")
+    try:
+        pending: deque[Any] = deque()
+        next_idx = 0
+        for item in items:
+            # Giu toi da depth item dang/da prepare phia truoc item hien tai (gioi han bo nho)
+            while next_idx < len(items) and len(pending) <= depth:
+                pending.append(pool.submit(prepare, items[next_idx]))
+                next_idx += 1
+            started = time.perf_counter()
+            prepared = pending.popleft().result()
+            yield item, prepared, time.perf_counter() - started
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,179 @@
+"""
+Chay cac stage cua Module 1/2 theo do thi phu thuoc thay vi tuan tu: moi stage chay ngay khi
+cac stage no can da xong (ASR chi can audio, caption chi can keyframe).
+
+`main.py` dung StageGraph de Whisper transcribe song song voi scene detect + keyframe + caption,
+roi in critical path va thoi gian tiet kiem so voi thu tu tuan tu.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+
+def split_cpu_threads(total: int | None = None, asr_threads: int | None = None) -> tuple[int, int]:
+    """
+    Chia CPU thread cho 2 nhanh chay dong thoi: (asr, visual). Mac dinh moi nhanh mot nua;
+    asr_threads dat san thi nhanh visual lay phan con lai (it nhat 1 thread moi nhanh).
+    """
+    cpus = max(1, int(total or os.cpu_count() or 1))
+    asr = max(1, cpus // 2) if asr_threads is None else max(1, int(asr_threads))
+    return asr, max(1, cpus - asr)
+
+
+def critical_path(spans: dict[str, tuple[float, float]], deps: dict[str, tuple[str, ...]]) -> list[str]:
+    """
+    Chuoi stage quyet dinh wall time: tu stage ket thuc muon nhat, lui ve dependency ket thuc muon nhat.
+    spans: name -> (start, end) tuong doi luc bat dau graph.
+    """
+    if not spans:
+        return []
+    current: str | None = max(spans, key=lambda name: spans[name][1])
+    path: list[str] = []
+    while current is not None:
+        path.append(current)
+        done = [dep for dep in deps.get(current, ()) if dep in spans]
+        current = max(done, key=lambda name: spans[name][1]) if done else None
+    return list(reversed(path))
+
+
+class StageGraph:
+    """
+    Do thi stage nho chay tren thread pool (moi stage mot thread, stage doi dependency cua no).
+
+    add(name, fn, deps): fn nhan dict {dep: ket qua} va tra ve ket qua cua stage. streams_from: stage chay
+        dong thoi nhung nhan du lieu dan dan tu cac stage nay (streaming), chi dung cho critical path.
+    add_signal(name, owner): stage ket thuc ben trong stage owner (vd. audio san sang giua luc
+        extraction con chay), owner goi signal(name, value); khong tinh rieng vao tong tuan tu.
+    Loi o mot stage lam cac stage phu thuoc bi bo qua; run() doi cac stage dang chay xong roi nem loi
+    xay ra som nhat.
+    """
+
+    def __init__(self) -> None:
+        self._fns: dict[str, Callable[[dict[str, Any]], Any] | None] = {}
+        self._deps: dict[str, tuple[str, ...]] = {}
+        self._owners: dict[str, str] = {}
+        self._streams_from: dict[str, tuple[str, ...]] = {}
+        self._idle_s: dict[str, float] = {}
+        self._overlapped_s: dict[str, dict[str, float]] = {}
+        self._errors: list[BaseException] = []
+        self._futures: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._started = 0.0
+        self.wall_s = 0.0
+        self.spans: dict[str, tuple[float, float]] = {}
+
+    def add(
+        self,
+        name: str,
+        fn: Callable[[dict[str, Any]], Any],
+        deps: tuple[str, ...] = (),
+        streams_from: tuple[str, ...] = (),
+    ) -> None:
+        self._register(name, deps)
+        self._fns[name] = fn
+        self._streams_from[name] = tuple(streams_from)
+
+    def record_idle(self, name: str, seconds: float) -> None:
+        """Thoi gian stage chi ngoi doi du lieu tu stage khac (streaming); khong tinh vao tong tuan tu."""
+        self._idle_s[name] = float(seconds)
+
+    def record_overlap(self, stage: str, name: str, seconds: float) -> None:
+        """
+        Viec con `name` chay nen ben trong stage (vd. ffmpeg audio trong extraction). Da nam trong span cua
+        stage nen khong cong them vao tong tuan tu; summary bao cao rieng.
+        """
+        self._overlapped_s.setdefault(stage, {})[name] = round(max(0.0, float(seconds)), 3)
+
+    def add_signal(self, name: str, owner: str) -> None:
+        self._register(name, ())
+        self._fns[name] = None
+        self._owners[name] = owner
+
+    def _register(self, name: str, deps: tuple[str, ...]) -> None:
+        if name in self._futures:
+            raise ValueError(f"STAGE_DUPLICATE: {name}")
+        for dep in deps:
+            if dep not in self._futures:
+                raise ValueError(f"STAGE_UNKNOWN_DEPENDENCY: {name} -> {dep}")
+        self._deps[name] = tuple(deps)
+        self._futures[name] = Future()
+
+    def signal(self, name: str, value: Any = None) -> None:
+        future = self._futures[name]
+        if future.done():
+            return
+        self._record(name, 0.0)
+        future.set_result(value)
+
+    def _record(self, name: str, started: float) -> None:
+        with self._lock:
+            self.spans[name] = (round(started, 3), round(time.perf_counter() - self._started, 3))
+
+    def _run_stage(self, name: str) -> None:
+        future = self._futures[name]
+        try:
+            try:
+                inputs = {dep: self._futures[dep].result() for dep in self._deps[name]}
+            except BaseException as exc:
+                # Dependency loi: bo qua stage nay, khong ghi span
+                future.set_exception(exc)
+                return
+            started = time.perf_counter() - self._started
+            try:
+                value = self._fns[name](inputs)
+            except BaseException as exc:
+                self._record(name, started)
+                with self._lock:
+                    self._errors.append(exc)
+                future.set_exception(exc)
+            else:
+                self._record(name, started)
+                future.set_result(value)
+        finally:
+            for signal_name, owner in self._owners.items():
+                if owner == name and not self._futures[signal_name].done():
+                    error = future.exception() or RuntimeError(f"STAGE_NOT_SIGNALLED: {owner} did not emit {signal_name}")
+                    self._futures[signal_name].set_exception(error)
+
+    def run(self) -> dict[str, Any]:
+        """Chay toan bo graph, tra ve {stage: ket qua}."""
+        stages = [name for name, fn in self._fns.items() if fn is not None]
+        self._started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, len(stages)), thread_name_prefix="stage") as pool:
+            for name in stages:
+                pool.submit(self._run_stage, name)
+        self.wall_s = round(time.perf_counter() - self._started, 3)
+
+        if self._errors:
+            # Loi xay ra som nhat la nguyen nhan goc (stage khac co the loi theo, vd. streaming bi abort)
+            raise self._errors[0]
+        return {name: future.result() for name, future in self._futures.items()}
+
+    def summary(self) -> dict[str, Any]:
+        """
+        Wall time, tong tuan tu (span moi stage khong phai signal tinh mot lan, tru thoi gian ngoi doi
+        streaming), thoi gian tiet kiem, critical path va viec chay nen ben trong stage (record_overlap,
+        da nam trong span nen khong cong vao serial_s/saved_s).
+        """
+        serial_s = round(
+            sum(
+                end - start - self._idle_s.get(name, 0.0)
+                for name, (start, end) in self.spans.items()
+                if name not in self._owners
+            ),
+            3,
+        )
+        path_deps = {name: self._deps[name] + self._streams_from.get(name, ()) for name in self._deps}
+        return {
+            "wall_s": self.wall_s,
+            "serial_s": serial_s,
+            "saved_s": round(serial_s - self.wall_s, 3),
+            "critical_path": critical_path(self.spans, path_deps),
+            "spans": dict(self.spans),
+            "overlapped": {stage: dict(work) for stage, work in self._overlapped_s.items()},
+        }
@@ -5,9 +5,11 @@ import json
 import os
 import re
 import shutil
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 TIMESTAMP_RE = re.compile(r"^\d{2}:[0-5]\d:[0-5]\d\.\d{3}$")
 
@@ -71,13 +73,225 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--stage", choices=["g3", "g5", "g8"], default=None, help="Reasoning target stage")
 
     parser.add_argument("--scene-threshold", type=float, default=None, help="SceneDetect threshold")
+    parser.add_argument(
+        "--scene-detector",
+        choices=["content", "hash", "histogram"],
+        default=None,
+        help="SceneDetect detector (hash/histogram re hon content)",
+    )
+    parser.add_argument(
+        "--scene-detect-mode",
+        choices=["full", "fast"],
+        default=None,
+        help="fast: phan tich frame downscale + frame skip (xem FAST_SCENE_DETECT_PRESET)",
+    )
+    parser.add_argument("--scene-analysis-width", type=int, default=None, help="Kich thuoc frame dung de phan tich scene")
+    parser.add_argument("--scene-frame-skip", type=int, default=None, help="So frame bo qua giua 2 frame phan tich")
+    parser.add_argument(
+        "--scene-workers",
+        type=int,
+        default=None,
+        help="So process detect scene song song theo khoang thoi gian (chi ap dung cho two_pass)",
+    )
+    parser.add_argument(
+        "--max-keyframes-per-minute",
+        type=float,
+        default=None,
+        help="Frame budget: toi da N keyframe moi phut video o doan cat nhanh (bo trong = moi scene 1 keyframe)",
+    )
+    parser.add_argument(
+        "--long-scene-seconds",
+        type=float,
+        default=None,
+        help="Frame budget: scene dai hon N giay duoc lay them keyframe (1 keyframe moi N giay)",
+    )
     parser.add_argument("--keyframe-resize", type=int, choices=[336, 448], default=None)
+    parser.add_argument(
+        "--extraction-mode",
+        choices=["two_pass", "fused"],
+        default=None,
+        help="two_pass: scene detect roi doc lai video lay keyframe; fused: ca hai trong mot lan decode",
+    )
+    parser.add_argument(
+        "--serial-audio-extraction",
+        action="store_true",
+        default=None,
+        help="Tach audio sau nhanh visual (mac dinh chay song song voi scene detect/keyframe)",
+    )
+    parser.add_argument(
+        "--serial-stages",
+        action="store_true",
+        default=None,
+        help="Chay extraction -> ASR -> caption tuan tu (mac dinh ASR chay song song voi nhanh visual)",
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        default=None,
+        help="Caption keyframe ngay khi lay duoc trong luc video con dang decode (ep extraction_mode=fused)",
+    )
+    parser.add_argument(
+        "--stream-queue-size",
+        type=int,
+        default=None,
+        help="So keyframe toi da cho caption khi streaming; day thi decode bi chan (backpressure)",
+    )
+    parser.add_argument(
+        "--audio-mode",
+        choices=["file", "memory"],
+        default=None,
+        help="file: ghi audio_16k.wav roi ASR doc lai; memory: decode PCM qua pipe thang vao Whisper",
+    )
+    parser.add_argument(
+        "--keep-audio-wav",
+        action="store_true",
+        default=None,
+        help="Van ghi audio_16k.wav lam artifact debug khi audio-mode=memory",
+    )
+    parser.add_argument(
+        "--keyframe-writers",
+        type=int,
+        default=None,
+        help="So thread resize + encode keyframe song song voi decode (0 = ghi inline)",
+    )
+    parser.add_argument(
+        "--keyframe-handoff",
+        choices=["files", "memory"],
+        default=None,
+        help="files: caption doc lai keyframes/*.jpg; memory: truyen keyframe (da resize ve input size cua model) trong process",
+    )
+    parser.add_argument(
+        "--keyframe-store",
+        choices=["files", "packed"],
+        default=None,
+        help="files: moi keyframe mot keyframes/*.jpg (tuong thich cu); packed: mot file keyframes.pack (RGB uint8, doc memmap)",
+    )
+    parser.add_argument(
+        "--write-keyframes",
+        action="store_true",
+        default=None,
+        help="Van ghi keyframes/*.jpg de debug khi keyframe-handoff=memory",
+    )
+    parser.add_argument(
+        "--extraction-cache",
+        action="store_true",
+        default=None,
+        help="Bat cache Module 1 theo noi dung video + tham so scene/keyframe (tat mac dinh)",
+    )
+    parser.add_argument(
+        "--extraction-cache-dir",
+        default=None,
+        help="Thu muc cache Module 1 khi bat --extraction-cache (mac dinh <output-root>/.cache/extraction)",
+    )
+    parser.add_argument("--extraction-cache-max-mb", type=int, default=None, help="Gioi han dung luong cache (LRU)")
+    parser.add_argument(
+        "--scene-stats",
+        action="store_true",
+        default=None,
+        help="Luu/dung lai diem scene detect moi frame (scene_scores.bin) de doi --scene-threshold khong decode lai "
+        "(lan detect dau cham hon: ContentDetector tinh them edge moi frame, video duoc hash sha256)",
+    )
+    parser.add_argument(
+        "--asr-cache",
+        action="store_true",
+        default=None,
+        help="Bat cache transcript theo hash audio da decode + cau hinh ASR (tat mac dinh)",
+    )
+    parser.add_argument(
+        "--asr-cache-dir",
+        default=None,
+        help="Thu muc cache transcript khi bat --asr-cache (mac dinh <output-root>/.cache/asr)",
+    )
+    parser.add_argument("--asr-cache-max-mb", type=int, default=None, help="Gioi han dung luong cache transcript (LRU)")
     parser.add_argument("--asr-model-size", default=None, help="faster-whisper model size")
     parser.add_argument("--asr-device", default=None, choices=["cpu", "cuda"], help="ASR compute device")
     parser.add_argument("--asr-compute-type", default=None, help="ASR compute type (ex: int8, float16)")
     parser.add_argument("--asr-language", default=None, help="ASR language code")
+    parser.add_argument(
+        "--asr-workers",
+        type=int,
+        default=None,
+        help="So process transcribe song song (>1: cat audio tai diem im lang thanh chunk roi ghep timestamp)",
+    )
+    parser.add_argument("--asr-chunk-seconds", type=float, default=None, help="Do dai chunk danh nghia khi asr-workers > 1")
+    parser.add_argument(
+        "--asr-cpu-threads",
+        type=int,
+        default=None,
+        help="So CPU thread cho nhanh ASR khi chay song song (mac dinh nua so core, nhanh visual lay phan con lai)",
+    )
+    parser.add_argument(
+        "--asr-vad",
+        action="store_true",
+        default=None,
+        help="Chay VAD truoc ASR: chi transcribe vung speech va ghi extraction/speech_regions.json",
+    )
+    parser.add_argument(
+        "--model-worker-socket",
+        default=None,
+        help="Unix socket cua worker giu model ASR/caption da nap (python -m extraction_perception.model_worker); khong co worker thi nap model tai cho",
+    )
+    parser.add_argument("--no-model-worker", action="store_true", default=None, help="Luon nap model trong process nay")
+    parser.add_argument(
+        "--model-worker-timeout-s",
+        type=float,
+        default=None,
+        help="Thoi gian toi da cho moi job qua worker, gom ca luc xep hang sau job cung model (mac dinh 3600)",
+    )
     parser.add_argument("--caption-model", default=None, help="Caption model id")
-    parser.add_argument("--caption-batch-size", type=int, default=None)
+    parser.add_argument(
+        "--caption-quantize",
+        choices=["none", "int8"],
+        default=None,
+        help="int8: dynamic quantization BLIP tren CPU (kiem tra parity bang scripts/caption_parity_report.py)",
+    )
+    parser.add_argument(
+        "--caption-cascade-model",
+        default=None,
+        help="Caption 2 tang: model re nay caption moi frame truoc, chi frame kem tin cay moi chay lai bang --caption-model. Trung --caption-model (float32) thi tang re la ban int8 copy tu weight da load, khong load model lan 2",
+    )
+    parser.add_argument(
+        "--caption-cascade-quantize",
+        choices=["none", "int8"],
+        default=None,
+        help="Quantize cua model tang re (mac dinh int8)",
+    )
+    parser.add_argument(
+        "--caption-cascade-min-logprob",
+        type=float,
+        default=None,
+        help="Escalate khi log-prob trung binh moi token cua caption tang re < N (mac dinh -1.2)",
+    )
+    parser.add_argument(
+        "--caption-cascade-min-words",
+        type=int,
+        default=None,
+        help="Escalate khi caption tang re co it hon N tu (mac dinh 4)",
+    )
+    parser.add_argument("--caption-batch-size", type=int, default=None, help="Co dinh batch size caption (bo qua autotune)")
+    parser.add_argument(
+        "--caption-tuning-file",
+        default=None,
+        help="File luu batch size/so thread caption tot nhat khi bat --caption-autotune (mac dinh <output-root>/.cache/caption_tuning.json)",
+    )
+    parser.add_argument(
+        "--caption-prefetch-workers",
+        type=int,
+        default=None,
+        help="So thread doc anh + chay processor cho batch ke tiep trong luc model generate (0 = tuan tu)",
+    )
+    parser.add_argument(
+        "--caption-autotune",
+        action="store_true",
+        default=None,
+        help="Probe batch size/thread caption tren CPU mot lan moi host + model va luu ket qua (tat mac dinh: batch mac dinh)",
+    )
+    parser.add_argument(
+        "--caption-dedup-threshold",
+        type=float,
+        default=None,
+        help="Gom keyframe gan trung (thumbnail xam 16x16 chenh trung binh <= N, thang 0-255, goi y 8) va chi caption 1 frame moi nhom; bo trong = tat",
+    )
 
     parser.add_argument("--input-profile", default=None, choices=["strict_contract_v1", "legacy_member1"])
     parser.add_argument("--source-duration-ms", type=int, default=None)
@@ -113,8 +327,45 @@ def _preflight(video_path: Path) -> None:
         raise RuntimeError("DEPENDENCY_MISSING: ffprobe is not available in PATH")
 
 
-def run_video_pipeline(video_path: str, output_root: str, scene_threshold: float, keyframe_resize: int):
+def run_video_pipeline(
+    video_path: str,
+    output_root: str,
+    scene_threshold: float,
+    keyframe_resize: int,
+    extraction_mode: str = "two_pass",
+    scene_detector: str = "content",
+    scene_analysis_width: int | None = None,
+    scene_frame_skip: int = 0,
+    scene_workers: int = 1,
+    overlap_audio: bool = True,
+    audio_mode: str = "file",
+    keep_audio_wav: bool = False,
+    write_keyframes: bool = True,
+    handoff_size: int | None = None,
+    keyframe_writers: int = 0,
+    cache_dir: str | None = None,
+    cache_max_bytes: int | None = None,
+    max_keyframes_per_minute: float | None = None,
+    long_scene_seconds: float | None = None,
+    scene_stats: bool = False,
+    keyframe_store: str = "files",
+    cv_threads: int | None = None,
+    on_audio_ready: Callable[[str | None, Any], None] | None = None,
+    keyframe_sink: Callable[[dict[str, Any], Any], None] | None = None,
+):
+    """
+    on_audio_ready(audio_path, audio): goi ngay khi audio san sang (thread audio nen, hoac sau cache hit)
+    de ASR bat dau truoc khi nhanh visual xong. cv_threads: gioi han thread OpenCV cua nhanh visual.
+    keyframe_sink(frame_info, RGB): nhan tung keyframe ngay khi lay duoc (caption streaming); cache hit
+    thi day lai toan bo keyframe da restore.
+    """
     from extraction_perception.extraction.extraction import VideoPreprocessor
+    from extraction_perception.extraction.keyframe_store import KEYFRAME_STORE_FILE
+
+    if cv_threads:
+        import cv2
+
+        cv2.setNumThreads(int(cv_threads))
 
     video_path_obj = Path(video_path)
     output_root_obj = Path(output_root)
@@ -123,26 +374,202 @@ def run_video_pipeline(video_path: str, output_root: str, scene_threshold: float
         video_path=str(video_path_obj),
         output_root=str(output_root_obj),
         resize=keyframe_resize,
+        write_keyframes=write_keyframes,
+        handoff_size=handoff_size,
+        keyframe_writers=keyframe_writers,
+        max_keyframes_per_minute=max_keyframes_per_minute,
+        long_scene_seconds=long_scene_seconds,
+        scene_stats=scene_stats,
+        keyframe_store=keyframe_store,
+        keyframe_sink=keyframe_sink,
     )
 
-    print("(Detecting scenes)")
-    timestamps = processor.detect_scenes(threshold=scene_threshold)
-    print(f"(Found {len(timestamps)} scenes)")
-
-    print("(Extracting audio)")
-    audio_path = processor.extract_audio()
-    print(f"(Audio saved at: {audio_path})")
+    scene_kwargs = {
+        "threshold": scene_threshold,
+        "detector": scene_detector,
+        "analysis_width": scene_analysis_width,
+        "frame_skip": scene_frame_skip,
+    }
+    timings_ms: dict[str, float] = {}
+
+    def _timed(name: str, fn: Any, *args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            timings_ms[name] = round((time.perf_counter() - started) * 1000, 2)
+
+    def _run_visual() -> tuple[list[float], dict[str, Any]]:
+        if extraction_mode == "fused":
+            if scene_workers > 1:
+                print("(scene_workers is ignored in fused mode: detection and keyframe capture share one decode)")
+            print("(Detecting scenes + extracting keyframes in one pass)")
+            timestamps, metadata = _timed(
+                "scenes_and_keyframes", processor.detect_scenes_and_extract_keyframes, **scene_kwargs
+            )
+            print(f"(Found {len(timestamps)} scenes)")
+            return timestamps, metadata
+
+        print("(Detecting scenes)")
+        timestamps = _timed("scene_detect", processor.detect_scenes, **scene_kwargs, workers=scene_workers)
+        print(f"(Found {len(timestamps)} scenes)")
+
+        print("(Extracting keyframes)")
+        metadata = _timed("keyframes", processor.extract_keyframes_and_metadata, timestamps)
+        return timestamps, metadata
+
+    def extract_audio_fn() -> Any:
+        if audio_mode == "memory":
+            return processor.extract_audio_array(keep_wav=keep_audio_wav)
+        return processor.extract_audio()
+
+    def _audio_outputs(audio_result: Any) -> tuple[str | None, Any]:
+        if audio_mode == "memory":
+            return (processor.audio_path if keep_audio_wav else None), audio_result
+        return audio_result, None
+
+    def _audio_stage() -> Any:
+        audio_result = _timed("audio", extract_audio_fn)
+        if on_audio_ready is not None:
+            on_audio_ready(*_audio_outputs(audio_result))
+        return audio_result
+
+    wall_started = time.perf_counter()
+
+    cache = None
+    cache_key = None
+    # Audio trong bo nho (khong giu WAV) duoc cache dang PCM .npy thay vi ghi WAV chi de luu vao entry
+    wav_audio = audio_mode == "file" or keep_audio_wav
+    audio_rel = "audio/audio_16k.wav" if wav_audio else os.path.relpath(processor.audio_pcm_path(), processor.extraction_dir)
+    if cache_dir:
+        from extraction_perception.extraction.extraction_cache import (
+            DEFAULT_CACHE_MAX_BYTES,
+            ExtractionCache,
+            extraction_cache_key,
+            video_fingerprint,
+        )
 
-    print("(Extracting keyframes)")
-    metadata = processor.extract_keyframes_and_metadata(timestamps)
+        cache = ExtractionCache(cache_dir, max_bytes=cache_max_bytes or DEFAULT_CACHE_MAX_BYTES)
+        cache_params = {
+            "audio_artifact": audio_rel,
+            "scene_threshold": scene_threshold,
+            "keyframe_resize": keyframe_resize,
+            "scene_detector": scene_detector,
+            "scene_analysis_width": scene_analysis_width,
+            "scene_frame_skip": scene_frame_skip,
+            "scene_workers": scene_workers,
+            "write_keyframes": write_keyframes,
+            "keyframe_store": keyframe_store,
+            "handoff_size": handoff_size,
+            "max_keyframes_per_minute": max_keyframes_per_minute,
+            "long_scene_seconds": long_scene_seconds,
+        }
+        cache_key = _timed(
+            "cache_lookup", lambda: extraction_cache_key(video_fingerprint(str(video_path_obj)), cache_params)
+        )
+        handoff_rel = os.path.relpath(processor.handoff_keyframes_path(), processor.extraction_dir)
+        required = [os.path.basename(processor.metadata_path), audio_rel] + ([handoff_rel] if handoff_size else [])
+        if write_keyframes and keyframe_store == "packed":
+            required.extend([os.path.relpath(processor.packed_keyframes_path, processor.extraction_dir), KEYFRAME_STORE_FILE])
+        if _timed("cache_restore", cache.restore, cache_key, processor.extraction_dir, required):
+            # Hit: nap lai artifact tu cache, khong decode video/audio
+            with open(processor.metadata_path, "r", encoding="utf-8") as f:
+                metadata = json.load(f)
+            audio = None
+            if audio_mode == "memory":
+                audio = processor.load_audio_array() if wav_audio else processor.load_audio_pcm()
+            if handoff_size:
+                processor.load_handoff_keyframes(metadata)
+            audio_path = processor.audio_path if audio_mode == "file" or keep_audio_wav else None
+            if on_audio_ready is not None:
+                on_audio_ready(audio_path, audio)
+            processor.emit_keyframes(metadata)
+            timings_ms["wall"] = round((time.perf_counter() - wall_started) * 1000, 2)
+            print(f"(Extraction cache hit: {cache_key[:12]}, restored {metadata['total_keyframes']} keyframes + audio)")
+            _print_cache_stats(cache)
+            print("(Extraction timings ms: " + ", ".join(f"{key}={value}" for key, value in timings_ms.items()) + ")")
+            print("(Extraction DONE)")
+            return {
+                "metadata": metadata,
+                "audio_path": audio_path,
+                "audio": audio,
+                "keyframes": processor.keyframes if handoff_size else None,
+                "timings_ms": timings_ms,
+                "cache": cache.stats(),
+            }
+
+    if overlap_audio:
+        # ffmpeg audio khong phu thuoc nhanh visual: chay nen trong luc detect scene + lay keyframe
+        print("(Extracting audio in background)")
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="extract_audio") as pool:
+            audio_future = pool.submit(_audio_stage)
+            try:
+                _, metadata = _run_visual()
+            finally:
+                # Loi visual van doi ffmpeg ket thuc truoc khi nem ra
+                audio_error = audio_future.exception()
+            if audio_error is not None:
+                raise audio_error
+            audio_result = audio_future.result()
+    else:
+        _, metadata = _run_visual()
+        print("(Extracting audio)")
+        audio_result = _audio_stage()
+
+    audio_path, audio = _audio_outputs(audio_result)
+    if audio_mode == "memory":
+        print(f"(Audio decoded in memory: {len(audio)} samples, {audio.nbytes / (1024 * 1024):.1f} MiB)")
+    else:
+        print(f"(Audio saved at: {audio_path})")
+
+    if cache is not None and cache_key is not None:
+        def _store_in_cache() -> None:
+            # Artifact trong bo nho duoc ghi ra file chi de cache (ket qua tra ve khong doi)
+            if not wav_audio:
+                processor.save_audio_pcm(audio)
+            files = [os.path.basename(processor.metadata_path), audio_rel]
+            if write_keyframes and keyframe_store == "packed":
+                files.extend([os.path.relpath(processor.packed_keyframes_path, processor.extraction_dir), KEYFRAME_STORE_FILE])
+            elif write_keyframes:
+                files.extend(str(frame["file_path"]) for frame in metadata["frames"])
+            if handoff_size:
+                processor.save_handoff_keyframes()
+                files.append(os.path.relpath(processor.handoff_keyframes_path(), processor.extraction_dir))
+            cache.store(cache_key, processor.extraction_dir, files, params=cache_params)
+
+        _timed("cache_store", _store_in_cache)
+        print(f"(Extraction cache miss: {cache_key[:12]}, stored)")
+        _print_cache_stats(cache)
+
+    timings_ms["wall"] = round((time.perf_counter() - wall_started) * 1000, 2)
+    serial_ms = round(sum(value for key, value in timings_ms.items() if key != "wall"), 2)
+    timings_ms["serial_sum"] = serial_ms
+    timings_ms["overlap_saved"] = round(serial_ms - timings_ms["wall"], 2)
+    print("(Extraction timings ms: " + ", ".join(f"{key}={value}" for key, value in timings_ms.items()) + ")")
 
     print("(Extraction DONE)")
     return {
         "metadata": metadata,
         "audio_path": audio_path,
+        "audio": audio,
+        "keyframes": processor.keyframes if handoff_size else None,
+        "timings_ms": timings_ms,
+        "cache": cache.stats() if cache is not None else None,
     }
 
 
+def _print_cache_stats(cache: Any, label: str = "Extraction") -> None:
+    stats = cache.stats()
+    run = stats["run"]
+    total = stats["total"]
+    print(
+        f"({label} cache stats: "
+        f"run hits={run['hits']} misses={run['misses']} stores={run['stores']} evictions={run['evictions']}; "
+        f"total hits={total['hits']} misses={total['misses']} evictions={total['evictions']}; "
+        f"{stats['entries']} entries, {stats['size_bytes'] / (1024 * 1024):.1f}/{stats['max_bytes'] / (1024 * 1024):.0f} MiB)"
+    )
+
+
 def extract_transcripts_from_video(
     video_path: str,
     output_root: str,
@@ -151,16 +578,166 @@ def extract_transcripts_from_video(
     device: str,
     compute_type: str,
     language: str,
+    audio: Any = None,
+    workers: int = 1,
+    chunk_seconds: float = 300.0,
+    vad: bool = False,
+    vad_parameters: dict[str, Any] | None = None,
+    model_worker: Any = None,
+    cache_dir: str | None = None,
+    cache_max_bytes: int | None = None,
+    cpu_threads: int | None = None,
+):
+    cache = None
+    cache_key = None
+    cache_params = {
+        "model_size": model_size,
+        "device": device,
+        "compute_type": compute_type,
+        "language": language,
+        "vad": vad,
+        "vad_parameters": vad_parameters if vad else None,
+        "chunking": None,
+    }
+    extraction_dir = Path(output_root or "Data/processed") / (output_name or Path(video_path).stem) / "extraction"
+    if cache_dir:
+        from extraction_perception.extraction.extraction_cache import (
+            DEFAULT_CACHE_MAX_BYTES,
+            ExtractionCache,
+            audio_fingerprint,
+            transcript_cache_key,
+        )
+
+        from extraction_perception.extraction.transcript_chunks import DEFAULT_CHUNK_OVERLAP_SECONDS
+
+        if workers > 1:
+            # Diem cat chunk chon theo nang luong audio + chunk_seconds (thuat toan nam trong hash ma nguon ASR)
+            cache_params["chunking"] = {
+                "workers": workers,
+                "chunk_seconds": chunk_seconds,
+                "overlap_seconds": DEFAULT_CHUNK_OVERLAP_SECONDS,
+            }
+        cache = ExtractionCache(cache_dir, max_bytes=cache_max_bytes or DEFAULT_CACHE_MAX_BYTES)
+        if audio is None:
+            # Key theo PCM da decode chu khong theo file: decode mot lan roi dung lai mang cho ASR
+            from faster_whisper.audio import decode_audio
+
+            audio = decode_audio(video_path, sampling_rate=16000)
+        cache_key = transcript_cache_key(audio_fingerprint(audio), cache_params)
+        if cache.restore(cache_key, str(extraction_dir), ["audio_transcripts.json"]):
+            with open(extraction_dir / "audio_transcripts.json", "r", encoding="utf-8") as handle:
+                result = json.load(handle)
+            print(f"(ASR cache hit: {cache_key[:12]}, {len(result)} segments, model not loaded)")
+            _print_cache_stats(cache, "ASR")
+            return result
+
+    result = _run_transcription(
+        video_path=video_path,
+        output_root=output_root,
+        output_name=output_name,
+        model_size=model_size,
+        device=device,
+        compute_type=compute_type,
+        language=language,
+        audio=audio,
+        workers=workers,
+        chunk_seconds=chunk_seconds,
+        vad=vad,
+        vad_parameters=vad_parameters,
+        model_worker=model_worker,
+        cpu_threads=cpu_threads,
+    )
+
+    if cache is not None and cache_key is not None:
+        files = ["audio_transcripts.json"] + (["speech_regions.json"] if vad else [])
+        cache.store(cache_key, str(extraction_dir), files, params=cache_params)
+        print(f"(ASR cache miss: {cache_key[:12]}, stored)")
+        _print_cache_stats(cache, "ASR")
+    return result
+
+
+def _run_transcription(
+    video_path: str,
+    output_root: str,
+    output_name: str,
+    model_size: str,
+    device: str,
+    compute_type: str,
+    language: str,
+    audio: Any,
+    workers: int,
+    chunk_seconds: float,
+    vad: bool,
+    vad_parameters: dict[str, Any] | None,
+    model_worker: Any,
+    cpu_threads: int | None = None,
 ):
+    model_config = {
+        "model_size": model_size,
+        "device": device,
+        "compute_type": compute_type,
+        "workers": workers,
+        "chunk_seconds": chunk_seconds,
+        "vad": vad,
+        "vad_parameters": vad_parameters,
+        "cpu_threads": cpu_threads or 0,
+    }
+    if model_worker is not None:
+        result, timing = model_worker.transcribe(
+            model=model_config,
+            input_path=video_path,
+            language=language,
+            output_root=output_root,
+            output_name=output_name,
+            audio=audio,
+        )
+        _print_model_timing("ASR", timing, model_worker.socket_path)
+        return result
+
     from extraction_perception.extraction.whisper_module import WhisperExtractor
 
-    extractor = WhisperExtractor(model_size=model_size, device=device, compute_type=compute_type)
-    return extractor.transcribe(
+    started = time.perf_counter()
+    extractor = WhisperExtractor(**model_config)
+    load_s = time.perf_counter() - started
+    started = time.perf_counter()
+    result = extractor.transcribe(
         input_path=video_path,
         language=language,
         output_root=output_root,
         output_name=output_name,
+        audio=audio,
+    )
+    _print_model_timing("ASR", {"load_s": load_s, "run_s": time.perf_counter() - started, "warm": False}, None)
+    return result
+
+
+def _connect_model_worker(socket_path: str | None, timeout_s: float) -> Any:
+    from extraction_perception.model_worker import ModelWorkerClient
+
+    client = ModelWorkerClient.connect(socket_path, timeout_s=timeout_s)
+    if client is not None:
+        print(f"(Model worker: connected to {client.socket_path})")
+    return client
+
+
+def _print_model_timing(stage: str, timing: dict[str, Any], socket_path: str | None) -> None:
+    where = f"worker {socket_path}" if socket_path else "in-process"
+    state = "warm" if timing["warm"] else "cold"
+    print(f"({stage} {state} [{where}]: load {timing['load_s']:.1f}s, run {timing['run_s']:.1f}s)")
+
+
+def _print_stage_graph(summary: dict[str, Any]) -> None:
+    spans = ", ".join(f"{name}={start:.1f}-{end:.1f}s" for name, (start, end) in summary["spans"].items())
+    print(f"(Stage graph spans: {spans})")
+    print(
+        f"(Stage graph: wall {summary['wall_s']:.1f}s vs serial {summary['serial_s']:.1f}s, "
+        f"saved {summary['saved_s']:.1f}s; critical path: {' -> '.join(summary['critical_path'])})"
     )
+    overlapped = [
+        f"{name} {seconds:.1f}s in {stage}" for stage, work in summary.get("overlapped", {}).items() for name, seconds in work.items()
+    ]
+    if overlapped:
+        print(f"(Stage graph: ran in background inside a stage, already in its span, not in serial: {', '.join(overlapped)})")
 
 
 def validate_handoff_outputs(transcript_path: str, captions_path: str):
@@ -217,11 +794,88 @@ def validate_handoff_outputs(transcript_path: str, captions_path: str):
         prev_ts = ts_ms
 
 
-def run_caption(metadata_path: str, output_path: str, model_name: str, batch_size: int | None):
+def run_caption(
+    metadata_path: str,
+    output_path: str,
+    model_name: str,
+    batch_size: int | None,
+    metadata: dict[str, Any] | None = None,
+    keyframes: dict[int, Any] | None = None,
+    dedup_threshold: float | None = None,
+    model_worker: Any = None,
+    tuning_path: str | None = None,
+    prefetch_workers: int = 1,
+    quantize: str = "none",
+    cascade: dict[str, Any] | None = None,
+    max_threads: int | None = None,
+    stream: Any = None,
+):
+    """
+    cascade: kwargs cascade_* cua VisualCaptioner (caption 2 tang), None = chi dung model_name.
+    max_threads: tran thread torch khi caption chay song song voi ASR (None = khong gioi han).
+    stream: KeyframeStream -> caption keyframe ngay khi extraction day vao (luon chay trong process).
+    """
+    in_memory = keyframes is not None and metadata is not None
+    if stream is not None and model_worker is not None:
+        print("(Streaming captions run in-process; model worker is not used for captioning)")
+        model_worker = None
+    if model_worker is not None:
+        result, timing = model_worker.caption(
+            model={
+                "model_name": model_name,
+                "tuning_path": tuning_path,
+                "prefetch_workers": prefetch_workers,
+                "quantize": quantize,
+                "max_threads": max_threads,
+                **(cascade or {}),
+            },
+            metadata_path=str(metadata_path),
+            output_path=str(output_path),
+            batch_size=batch_size,
+            dedup_threshold=dedup_threshold,
+            metadata=metadata if in_memory else None,
+            keyframes=keyframes if in_memory else None,
+        )
+        _print_model_timing("Caption", timing, model_worker.socket_path)
+        return result
+
     from extraction_perception.perception.caption import VisualCaptioner
 
-    captioner = VisualCaptioner(model_name=model_name)
-    return captioner.caption_from_metadata(metadata_path=str(metadata_path), output_path=str(output_path), batch_size=batch_size)
+    started = time.perf_counter()
+    captioner = VisualCaptioner(
+        model_name=model_name,
+        tuning_path=tuning_path,
+        prefetch_workers=prefetch_workers,
+        quantize=quantize,
+        max_threads=max_threads,
+        **(cascade or {}),
+    )
+    load_s = time.perf_counter() - started
+    started = time.perf_counter()
+    if stream is not None:
+        result = captioner.caption_stream(
+            stream=stream,
+            output_path=str(output_path),
+            batch_size=batch_size,
+            dedup_threshold=dedup_threshold,
+        )
+    elif in_memory:
+        result = captioner.caption_from_arrays(
+            metadata=metadata,
+            keyframes=keyframes,
+            output_path=str(output_path),
+            batch_size=batch_size,
+            dedup_threshold=dedup_threshold,
+        )
+    else:
+        result = captioner.caption_from_metadata(
+            metadata_path=str(metadata_path),
+            output_path=str(output_path),
+            batch_size=batch_size,
+            dedup_threshold=dedup_threshold,
+        )
+    _print_model_timing("Caption", {"load_s": load_s, "run_s": time.perf_counter() - started, "warm": False}, None)
+    return result
 
 
 def _run_reasoning_stage(config: Any, stage: str) -> dict[str, Any]:
@@ -246,12 +900,130 @@ def main() -> int:
     )
     stage = str(_resolve_value(args.stage, "VIDEO_SUMMARY_STAGE", file_config, "stage", "g8"))
 
-    scene_threshold = float(_resolve_value(args.scene_threshold, "VIDEO_SUMMARY_SCENE_THRESHOLD", file_config, "scene_threshold", 27.0))
+    from extraction_perception.extraction.scene_cuts import FAST_SCENE_DETECT_PRESET, default_scene_threshold
+
+    scene_detector = str(_resolve_value(args.scene_detector, "VIDEO_SUMMARY_SCENE_DETECTOR", file_config, "scene_detector", "content"))
+    scene_detect_mode = str(
+        _resolve_value(args.scene_detect_mode, "VIDEO_SUMMARY_SCENE_DETECT_MODE", file_config, "scene_detect_mode", "full")
+    )
+    scene_preset = FAST_SCENE_DETECT_PRESET if scene_detect_mode == "fast" else {}
+    scene_threshold_raw = _resolve_value(args.scene_threshold, "VIDEO_SUMMARY_SCENE_THRESHOLD", file_config, "scene_threshold", None)
+    scene_threshold = float(scene_threshold_raw) if scene_threshold_raw is not None else default_scene_threshold(scene_detector)
+    scene_analysis_width_raw = _resolve_value(
+        args.scene_analysis_width,
+        "VIDEO_SUMMARY_SCENE_ANALYSIS_WIDTH",
+        file_config,
+        "scene_analysis_width",
+        scene_preset.get("analysis_width"),
+    )
+    scene_analysis_width = int(scene_analysis_width_raw) if scene_analysis_width_raw is not None else None
+    scene_frame_skip = int(
+        _resolve_value(
+            args.scene_frame_skip,
+            "VIDEO_SUMMARY_SCENE_FRAME_SKIP",
+            file_config,
+            "scene_frame_skip",
+            scene_preset.get("frame_skip", 0),
+        )
+    )
+    scene_workers = int(_resolve_value(args.scene_workers, "VIDEO_SUMMARY_SCENE_WORKERS", file_config, "scene_workers", 1))
+    max_keyframes_per_minute_raw = _resolve_value(
+        args.max_keyframes_per_minute,
+        "VIDEO_SUMMARY_MAX_KEYFRAMES_PER_MINUTE",
+        file_config,
+        "max_keyframes_per_minute",
+        None,
+    )
+    max_keyframes_per_minute = float(max_keyframes_per_minute_raw) if max_keyframes_per_minute_raw is not None else None
+    long_scene_seconds_raw = _resolve_value(
+        args.long_scene_seconds, "VIDEO_SUMMARY_LONG_SCENE_SECONDS", file_config, "long_scene_seconds", None
+    )
+    long_scene_seconds = float(long_scene_seconds_raw) if long_scene_seconds_raw is not None else None
+    serial_audio_extraction = _coerce_bool(
+        _resolve_value(
+            args.serial_audio_extraction,
+            "VIDEO_SUMMARY_SERIAL_AUDIO_EXTRACTION",
+            file_config,
+            "serial_audio_extraction",
+            False,
+        )
+    )
+    serial_stages = _coerce_bool(
+        _resolve_value(args.serial_stages, "VIDEO_SUMMARY_SERIAL_STAGES", file_config, "serial_stages", False)
+    )
+    streaming = _coerce_bool(_resolve_value(args.streaming, "VIDEO_SUMMARY_STREAMING", file_config, "streaming", False))
+    stream_queue_size = int(
+        _resolve_value(args.stream_queue_size, "VIDEO_SUMMARY_STREAM_QUEUE_SIZE", file_config, "stream_queue_size", 16)
+    )
+    audio_mode = str(_resolve_value(args.audio_mode, "VIDEO_SUMMARY_AUDIO_MODE", file_config, "audio_mode", "file"))
+    keep_audio_wav = _coerce_bool(
+        _resolve_value(args.keep_audio_wav, "VIDEO_SUMMARY_KEEP_AUDIO_WAV", file_config, "keep_audio_wav", False)
+    )
+    keyframe_writers = int(
+        _resolve_value(
+            args.keyframe_writers,
+            "VIDEO_SUMMARY_KEYFRAME_WRITERS",
+            file_config,
+            "keyframe_writers",
+            0,
+        )
+    )
+    keyframe_handoff = str(
+        _resolve_value(args.keyframe_handoff, "VIDEO_SUMMARY_KEYFRAME_HANDOFF", file_config, "keyframe_handoff", "files")
+    )
+    keyframe_store = str(
+        _resolve_value(args.keyframe_store, "VIDEO_SUMMARY_KEYFRAME_STORE", file_config, "keyframe_store", "files")
+    )
+    write_keyframes = _coerce_bool(
+        _resolve_value(args.write_keyframes, "VIDEO_SUMMARY_WRITE_KEYFRAMES", file_config, "write_keyframes", False)
+    )
+    scene_stats = _coerce_bool(
+        _resolve_value(args.scene_stats, "VIDEO_SUMMARY_SCENE_STATS", file_config, "scene_stats", False)
+    )
+    extraction_cache = _coerce_bool(
+        _resolve_value(args.extraction_cache, "VIDEO_SUMMARY_EXTRACTION_CACHE", file_config, "extraction_cache", False)
+    )
+    extraction_cache_dir = str(
+        _resolve_value(
+            args.extraction_cache_dir,
+            "VIDEO_SUMMARY_EXTRACTION_CACHE_DIR",
+            file_config,
+            "extraction_cache_dir",
+            str(output_root / ".cache" / "extraction"),
+        )
+    )
+    extraction_cache_max_mb = int(
+        _resolve_value(
+            args.extraction_cache_max_mb,
+            "VIDEO_SUMMARY_EXTRACTION_CACHE_MAX_MB",
+            file_config,
+            "extraction_cache_max_mb",
+            4096,
+        )
+    )
+    asr_cache = _coerce_bool(_resolve_value(args.asr_cache, "VIDEO_SUMMARY_ASR_CACHE", file_config, "asr_cache", False))
+    asr_cache_dir = str(
+        _resolve_value(args.asr_cache_dir, "VIDEO_SUMMARY_ASR_CACHE_DIR", file_config, "asr_cache_dir", str(output_root / ".cache" / "asr"))
+    )
+    asr_cache_max_mb = int(_resolve_value(args.asr_cache_max_mb, "VIDEO_SUMMARY_ASR_CACHE_MAX_MB", file_config, "asr_cache_max_mb", 512))
     keyframe_resize = int(_resolve_value(args.keyframe_resize, "VIDEO_SUMMARY_KEYFRAME_RESIZE", file_config, "keyframe_resize", 448))
+    extraction_mode = str(
+        _resolve_value(args.extraction_mode, "VIDEO_SUMMARY_EXTRACTION_MODE", file_config, "extraction_mode", "two_pass")
+    )
     asr_model_size = str(_resolve_value(args.asr_model_size, "VIDEO_SUMMARY_ASR_MODEL_SIZE", file_config, "asr_model_size", "base"))
     asr_device = str(_resolve_value(args.asr_device, "VIDEO_SUMMARY_ASR_DEVICE", file_config, "asr_device", "cpu"))
     asr_compute_type = str(_resolve_value(args.asr_compute_type, "VIDEO_SUMMARY_ASR_COMPUTE_TYPE", file_config, "asr_compute_type", "int8"))
     asr_language = str(_resolve_value(args.asr_language, "VIDEO_SUMMARY_ASR_LANGUAGE", file_config, "asr_language", "vi"))
+    asr_workers = int(_resolve_value(args.asr_workers, "VIDEO_SUMMARY_ASR_WORKERS", file_config, "asr_workers", 1))
+    asr_chunk_seconds = float(
+        _resolve_value(args.asr_chunk_seconds, "VIDEO_SUMMARY_ASR_CHUNK_SECONDS", file_config, "asr_chunk_seconds", 300.0)
+    )
+    asr_cpu_threads_raw = _resolve_value(args.asr_cpu_threads, "VIDEO_SUMMARY_ASR_CPU_THREADS", file_config, "asr_cpu_threads", None)
+    asr_cpu_threads = int(asr_cpu_threads_raw) if asr_cpu_threads_raw is not None else None
+    asr_vad = _coerce_bool(_resolve_value(args.asr_vad, "VIDEO_SUMMARY_ASR_VAD", file_config, "asr_vad", False))
+    asr_vad_parameters = file_config.get("asr_vad_parameters")
+    if asr_vad_parameters is not None and not isinstance(asr_vad_parameters, dict):
+        raise RuntimeError("INVALID_ASR_VAD_PARAMETERS: asr_vad_parameters must be an object")
     caption_model = str(
         _resolve_value(
             args.caption_model,
@@ -269,6 +1041,71 @@ def main() -> int:
         None,
     )
     caption_batch_size = int(caption_batch_size_raw) if caption_batch_size_raw is not None else None
+    caption_dedup_threshold_raw = _resolve_value(
+        args.caption_dedup_threshold,
+        "VIDEO_SUMMARY_CAPTION_DEDUP_THRESHOLD",
+        file_config,
+        "caption_dedup_threshold",
+        None,
+    )
+    caption_dedup_threshold = float(caption_dedup_threshold_raw) if caption_dedup_threshold_raw is not None else None
+    caption_quantize = str(_resolve_value(args.caption_quantize, "VIDEO_SUMMARY_CAPTION_QUANTIZE", file_config, "caption_quantize", "none"))
+    caption_cascade_model = _resolve_value(
+        args.caption_cascade_model, "VIDEO_SUMMARY_CAPTION_CASCADE_MODEL", file_config, "caption_cascade_model", None
+    )
+    caption_cascade_quantize = str(
+        _resolve_value(
+            args.caption_cascade_quantize, "VIDEO_SUMMARY_CAPTION_CASCADE_QUANTIZE", file_config, "caption_cascade_quantize", "int8"
+        )
+    )
+    caption_cascade_min_logprob = float(
+        _resolve_value(
+            args.caption_cascade_min_logprob,
+            "VIDEO_SUMMARY_CAPTION_CASCADE_MIN_LOGPROB",
+            file_config,
+            "caption_cascade_min_logprob",
+            -1.2,
+        )
+    )
+    caption_cascade_min_words = int(
+        _resolve_value(
+            args.caption_cascade_min_words, "VIDEO_SUMMARY_CAPTION_CASCADE_MIN_WORDS", file_config, "caption_cascade_min_words", 4
+        )
+    )
+    caption_prefetch_workers = int(
+        _resolve_value(args.caption_prefetch_workers, "VIDEO_SUMMARY_CAPTION_PREFETCH_WORKERS", file_config, "caption_prefetch_workers", 1)
+    )
+    caption_autotune = _coerce_bool(
+        _resolve_value(args.caption_autotune, "VIDEO_SUMMARY_CAPTION_AUTOTUNE", file_config, "caption_autotune", False)
+    )
+    caption_tuning_file = str(
+        _resolve_value(
+            args.caption_tuning_file,
+            "VIDEO_SUMMARY_CAPTION_TUNING_FILE",
+            file_config,
+            "caption_tuning_file",
+            str(output_root / ".cache" / "caption_tuning.json"),
+        )
+    )
+    model_worker_socket = _resolve_value(
+        args.model_worker_socket,
+        "VIDEO_SUMMARY_MODEL_WORKER_SOCKET",
+        file_config,
+        "model_worker_socket",
+        None,
+    )
+    no_model_worker = _coerce_bool(
+        _resolve_value(args.no_model_worker, "VIDEO_SUMMARY_NO_MODEL_WORKER", file_config, "no_model_worker", False)
+    )
+    model_worker_timeout_s = float(
+        _resolve_value(
+            args.model_worker_timeout_s,
+            "VIDEO_SUMMARY_MODEL_WORKER_TIMEOUT_S",
+            file_config,
+            "model_worker_timeout_s",
+            3600.0,
+        )
+    )
 
     input_profile = str(
         _resolve_value(
@@ -391,42 +1228,201 @@ def main() -> int:
 
     if stage not in {"g3", "g5", "g8"}:
         raise RuntimeError(f"INVALID_STAGE: {stage}. Use g3, g5, or g8")
+    if scene_detect_mode not in {"full", "fast"}:
+        raise RuntimeError(f"INVALID_SCENE_DETECT_MODE: {scene_detect_mode}. Use full or fast")
+    if extraction_mode not in {"two_pass", "fused"}:
+        raise RuntimeError(f"INVALID_EXTRACTION_MODE: {extraction_mode}. Use two_pass or fused")
+    if audio_mode not in {"file", "memory"}:
+        raise RuntimeError(f"INVALID_AUDIO_MODE: {audio_mode}. Use file or memory")
+    if keyframe_handoff not in {"files", "memory"}:
+        raise RuntimeError(f"INVALID_KEYFRAME_HANDOFF: {keyframe_handoff}. Use files or memory")
+    if keyframe_store not in {"files", "packed"}:
+        raise RuntimeError(f"INVALID_KEYFRAME_STORE: {keyframe_store}. Use files or packed")
+    if caption_quantize not in {"none", "int8"}:
+        raise RuntimeError(f"INVALID_CAPTION_QUANTIZE: {caption_quantize}. Use none or int8")
+    if caption_cascade_quantize not in {"none", "int8"}:
+        raise RuntimeError(f"INVALID_CAPTION_CASCADE_QUANTIZE: {caption_cascade_quantize}. Use none or int8")
+    if caption_cascade_model and str(caption_cascade_model) == caption_model and caption_cascade_quantize == caption_quantize:
+        raise RuntimeError(
+            f"INVALID_CAPTION_CASCADE_MODEL: {caption_cascade_model} with quantize={caption_quantize} is the heavy tier itself. "
+            "Use a smaller model or a different --caption-cascade-quantize"
+        )
+    if max_keyframes_per_minute is not None and max_keyframes_per_minute < 1:
+        raise RuntimeError(f"INVALID_MAX_KEYFRAMES_PER_MINUTE: {max_keyframes_per_minute}. Use a value >= 1")
+    if long_scene_seconds is not None and long_scene_seconds <= 0:
+        raise RuntimeError(f"INVALID_LONG_SCENE_SECONDS: {long_scene_seconds}. Use a value > 0")
+    if stream_queue_size < 1:
+        raise RuntimeError(f"INVALID_STREAM_QUEUE_SIZE: {stream_queue_size}. Use a value >= 1")
+    if asr_cpu_threads is not None and asr_cpu_threads < 1:
+        raise RuntimeError(f"INVALID_ASR_CPU_THREADS: {asr_cpu_threads}. Use a value >= 1")
+    if model_worker_timeout_s <= 0:
+        raise RuntimeError(f"INVALID_MODEL_WORKER_TIMEOUT_S: {model_worker_timeout_s}. Use a value > 0")
 
     try:
         _preflight(video_path)
         output_root.mkdir(parents=True, exist_ok=True)
 
-        print("=== Module 1: Extraction ===")
-        extraction_result = run_video_pipeline(
-            video_path=str(video_path),
-            output_root=str(output_root),
-            scene_threshold=scene_threshold,
-            keyframe_resize=keyframe_resize,
-        )
-        audio_path = extraction_result["audio_path"]
-        video_name = video_path.stem
+        handoff_size = None
+        if keyframe_handoff == "memory" or streaming:
+            # Streaming caption dung dung mang handoff (giong nhau giua lan chay moi va cache hit)
+            from extraction_perception.perception.caption import caption_input_size
 
-        print("=== Module 2: Perception ===")
-        extract_transcripts_from_video(
-            video_path=str(audio_path),
-            output_root=str(output_root),
-            output_name=video_name,
-            model_size=asr_model_size,
-            device=asr_device,
-            compute_type=asr_compute_type,
-            language=asr_language,
-        )
+            handoff_size = caption_input_size(caption_model)
+            print(f"(Keyframes handed off in memory at {handoff_size}x{handoff_size})")
+        if streaming and extraction_mode != "fused":
+            print("(Streaming: scene detection and keyframe capture share one decode, using extraction_mode=fused)")
+            extraction_mode = "fused"
 
+        video_name = video_path.stem
         metadata_path = output_root / video_name / "extraction" / "scene_metadata.json"
         captions_path = output_root / video_name / "extraction" / "visual_captions.json"
         transcripts_path = output_root / video_name / "extraction" / "audio_transcripts.json"
+        model_worker = None if no_model_worker else _connect_model_worker(model_worker_socket, model_worker_timeout_s)
+        from extraction_perception.stage_graph import StageGraph, split_cpu_threads
+
+        # Chay song song: chia CPU giua nhanh ASR va nhanh visual (OpenCV + torch caption)
+        asr_threads, visual_threads = (None, None) if serial_stages else split_cpu_threads(asr_threads=asr_cpu_threads)
+
+        def _extract(on_audio_ready: Any = None, keyframe_sink: Any = None) -> dict[str, Any]:
+            print("=== Module 1: Extraction ===")
+            return run_video_pipeline(
+                video_path=str(video_path),
+                output_root=str(output_root),
+                scene_threshold=scene_threshold,
+                keyframe_resize=keyframe_resize,
+                extraction_mode=extraction_mode,
+                scene_detector=scene_detector,
+                scene_analysis_width=scene_analysis_width,
+                scene_frame_skip=scene_frame_skip,
+                scene_workers=scene_workers,
+                overlap_audio=not serial_audio_extraction,
+                audio_mode=audio_mode,
+                keep_audio_wav=keep_audio_wav,
+                write_keyframes=keyframe_handoff == "files" or write_keyframes,
+                handoff_size=handoff_size,
+                keyframe_writers=keyframe_writers,
+                cache_dir=extraction_cache_dir if extraction_cache else None,
+                cache_max_bytes=extraction_cache_max_mb * 1024 * 1024,
+                max_keyframes_per_minute=max_keyframes_per_minute,
+                long_scene_seconds=long_scene_seconds,
+                scene_stats=scene_stats,
+                keyframe_store=keyframe_store,
+                cv_threads=visual_threads,
+                on_audio_ready=on_audio_ready,
+                keyframe_sink=keyframe_sink,
+            )
+
+        def _transcribe(audio_path: str | None, audio: Any) -> Any:
+            print("=== Module 2: Perception (ASR) ===")
+            return extract_transcripts_from_video(
+                video_path=str(audio_path) if audio_path else "",
+                output_root=str(output_root),
+                output_name=video_name,
+                model_size=asr_model_size,
+                device=asr_device,
+                compute_type=asr_compute_type,
+                language=asr_language,
+                audio=audio,
+                workers=asr_workers,
+                chunk_seconds=asr_chunk_seconds,
+                vad=asr_vad,
+                vad_parameters=asr_vad_parameters,
+                model_worker=model_worker,
+                cache_dir=asr_cache_dir if asr_cache else None,
+                cache_max_bytes=asr_cache_max_mb * 1024 * 1024,
+                cpu_threads=asr_threads,
+            )
+
+        def _caption(extraction_result: dict[str, Any] | None, stream: Any = None) -> Any:
+            print("=== Module 2: Perception (Caption) ===")
+            result = run_caption(
+                metadata_path=str(metadata_path),
+                output_path=str(captions_path),
+                model_name=caption_model,
+                batch_size=caption_batch_size,
+                metadata=extraction_result["metadata"] if extraction_result else None,
+                keyframes=extraction_result["keyframes"] if extraction_result else None,
+                dedup_threshold=caption_dedup_threshold,
+                model_worker=model_worker,
+                tuning_path=caption_tuning_file if caption_autotune else None,
+                prefetch_workers=caption_prefetch_workers,
+                quantize=caption_quantize,
+                cascade={
+                    "cascade_model": str(caption_cascade_model),
+                    "cascade_quantize": caption_cascade_quantize,
+                    "cascade_min_logprob": caption_cascade_min_logprob,
+                    "cascade_min_words": caption_cascade_min_words,
+                }
+                if caption_cascade_model
+                else None,
+                max_threads=visual_threads,
+                stream=stream,
+            )
+            if extraction_result:
+                extraction_result["keyframes"] = None
+            return result
+
+        if serial_stages and not streaming:
+            extraction_result = _extract()
+            _transcribe(extraction_result["audio_path"], extraction_result["audio"])
+            # Giai phong buffer PCM truoc khi nap model caption
+            extraction_result["audio"] = None
+            _caption(extraction_result)
+        else:
+            graph = StageGraph()
+
+            def _on_audio_ready(audio_path: str | None, audio: Any) -> None:
+                graph.signal("audio", (audio_path, audio))
+
+            if streaming:
+                from extraction_perception.perception.keyframe_stream import KeyframeStream
+
+                # scenes -> keyframes -> caption qua hang doi co gioi han; caption khong doi extraction xong
+                stream = KeyframeStream(stream_queue_size)
+                print(f"(Streaming: keyframes flow to the captioner through a queue of {stream_queue_size})")
+
+                def _extract_streaming(_: dict[str, Any]) -> dict[str, Any]:
+                    try:
+                        result = _extract(_on_audio_ready, keyframe_sink=stream.put)
+                    except BaseException as exc:
+                        try:
+                            stream.close(exc)
+                        except RuntimeError:
+                            # Consumer da abort (KEYFRAME_STREAM_ABORTED): giu loi goc cua extraction
+                            pass
+                        raise
+                    stream.close()
+                    return result
+
+                def _caption_streaming(_: dict[str, Any]) -> Any:
+                    try:
+                        return _caption(None, stream)
+                    except BaseException as exc:
+                        stream.abort(exc)
+                        raise
+                    finally:
+                        graph.record_idle("caption", stream.consumer_wait_s)
+
+                graph.add("extraction", _extract_streaming)
+                graph.add("caption", _caption_streaming, streams_from=("extraction",))
+            else:
+                graph.add("extraction", lambda _: _extract(_on_audio_ready))
+                graph.add("caption", lambda inputs: _caption(inputs["extraction"]), deps=("extraction",))
+            graph.add_signal("audio", owner="extraction")
+            if serial_stages:
+                print("(Serial stages: ASR runs after streaming captioning)")
+                graph.add("asr", lambda inputs: _transcribe(*inputs["audio"]), deps=("audio", "caption"))
+            else:
+                print(f"(Stage graph: ASR || visual, CPU threads {asr_threads} ASR / {visual_threads} visual)")
+                graph.add("asr", lambda inputs: _transcribe(*inputs["audio"]), deps=("audio",))
+            outputs = graph.run()
+            outputs["extraction"]["audio"] = None
+            extraction_timings = outputs["extraction"].get("timings_ms") or {}
+            if not serial_audio_extraction and "audio" in extraction_timings:
+                # Audio nen da nam trong span extraction: bao cao rieng, khong cong lai vao tong tuan tu
+                graph.record_overlap("extraction", "audio", extraction_timings["audio"] / 1000)
+            _print_stage_graph(graph.summary())
 
-        run_caption(
-            metadata_path=str(metadata_path),
-            output_path=str(captions_path),
-            model_name=caption_model,
-            batch_size=caption_batch_size,
-        )
         validate_handoff_outputs(str(transcripts_path), str(captions_path))
         print("(Handoff validation passed)")
 
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 import json
+import os
 import random
 import subprocess
+import sys
 import tempfile
 import time
 from pathlib import Path
@@ -332,11 +334,749 @@ def benchmark_caption_batch() -> dict[str, Any]:
         }
 
 
+def _make_scene_test_video(path: Path, duration_s: int = 60, size: str = "1280x720", scenes: int = 12) -> None:
+    # Ghep nhieu nguon lavfi khac nhau de co scene cut that
+    sources = ["testsrc", "smptebars", "testsrc2", "smptehdbars", "rgbtestsrc", "color=c=navy"]
+    per_scene = max(1.0, duration_s / scenes)
+    inputs: list[str] = []
+    filters: list[str] = []
+    for i in range(scenes):
+        src = sources[i % len(sources)]
+        sep = ":" if "=" in src else "="
+        inputs.extend(["-f", "lavfi", "-i", f"{src}{sep}size={size}:rate=24:duration={per_scene:.3f}"])
+        filters.append(f"[{i}:v]format=yuv420p[v{i}]")
+    concat = ";".join(filters) + ";" + "".join(f"[v{i}]" for i in range(scenes)) + f"concat=n={scenes}:v=1:a=0[v]"
+    cmd = ["ffmpeg", "-y", *inputs, "-filter_complex", concat, "-map", "[v]", "-c:v", "libx264", "-pix_fmt", "yuv420p", str(path)]
+    _run_checked(cmd)
+
+
+def _read_keyframes(extraction_dir: Path, metadata: dict[str, Any]) -> list[bytes]:
+    return [(extraction_dir / frame["file_path"]).read_bytes() for frame in metadata["frames"]]
+
+
+def benchmark_fused_extraction() -> dict[str, Any]:
+    try:
+        from extraction_perception.extraction.extraction import VideoPreprocessor
+    except Exception as exc:
+        return {"status": "skipped", "reason": str(exc)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        source = root / "scenes.mp4"
+        _make_scene_test_video(source, duration_s=60)
+
+        two_pass = VideoPreprocessor(str(source), str(root / "two_pass"))
+        t0 = time.perf_counter()
+        timestamps = two_pass.detect_scenes()
+        two_pass_metadata = two_pass.extract_keyframes_and_metadata(timestamps)
+        two_pass_ms = (time.perf_counter() - t0) * 1000
+
+        fused = VideoPreprocessor(str(source), str(root / "fused"))
+        t1 = time.perf_counter()
+        _, fused_metadata = fused.detect_scenes_and_extract_keyframes()
+        fused_ms = (time.perf_counter() - t1) * 1000
+
+        parity = (
+            Path(two_pass.metadata_path).read_bytes() == Path(fused.metadata_path).read_bytes()
+            and _read_keyframes(Path(two_pass.extraction_dir), two_pass_metadata)
+            == _read_keyframes(Path(fused.extraction_dir), fused_metadata)
+        )
+
+        return {
+            "status": "ok",
+            "parity": parity,
+            "keyframes": two_pass_metadata["total_keyframes"],
+            "two_pass_ms": round(two_pass_ms, 2),
+            "fused_ms": round(fused_ms, 2),
+            "saved_ms": round(two_pass_ms - fused_ms, 2),
+            "speedup_x": round(two_pass_ms / fused_ms, 2) if fused_ms > 0 else None,
+        }
+
+
+def benchmark_parallel_scene_detection() -> dict[str, Any]:
+    try:
+        from extraction_perception.extraction.extraction import VideoPreprocessor
+        from extraction_perception.extraction.scene_cuts import compare_cut_lists
+    except Exception as exc:
+        return {"status": "skipped", "reason": str(exc)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        source = root / "long_scenes.mp4"
+        _make_scene_test_video(source, duration_s=240, scenes=48)
+        processor = VideoPreprocessor(str(source), str(root / "out"))
+
+        worker_counts = sorted({1, 2, 4, os.cpu_count() or 1})
+        baseline_cuts: list[int] = []
+        baseline_ms = 0.0
+        rows: list[dict[str, Any]] = []
+        for workers in worker_counts:
+            t0 = time.perf_counter()
+            scene_list = processor.detect_scene_list(workers=workers)
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+            cuts = [scene[0].get_frames() for scene in scene_list[1:]]
+            if workers == 1:
+                baseline_cuts = cuts
+                baseline_ms = elapsed_ms
+            match = compare_cut_lists(baseline_cuts, cuts, tolerance=1)
+            rows.append(
+                {
+                    "workers": workers,
+                    "elapsed_ms": round(elapsed_ms, 2),
+                    "speedup_x": round(baseline_ms / elapsed_ms, 2) if elapsed_ms > 0 else None,
+                    "cuts": len(cuts),
+                    "within_one_frame": match["missed"] == 0 and match["extra"] == 0,
+                }
+            )
+
+        return {"status": "ok", "cpu_count": os.cpu_count(), "runs": rows}
+
+
+def _extract_frames_read_all(video_path: Path, targets: list[tuple[int, float, int]]) -> list[Any]:
+    import cv2
+
+    cap = cv2.VideoCapture(str(video_path))
+    frames: list[Any] = []
+    target_pos = 0
+    frame_cursor = 0
+    while target_pos < len(targets):
+        success, frame = cap.read()
+        if not success:
+            break
+        if frame_cursor >= targets[target_pos][2]:
+            frames.append(cv2.resize(frame, (448, 448)))
+            target_pos += 1
+        frame_cursor += 1
+    cap.release()
+    return frames
+
+
+def benchmark_keyframe_seek() -> dict[str, Any]:
+    try:
+        import cv2
+
+        from extraction_perception.extraction.extraction import VideoPreprocessor
+    except Exception as exc:
+        return {"status": "skipped", "reason": str(exc)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        source = root / "long_scenes.mp4"
+        _make_scene_test_video(source, duration_s=240, scenes=48)
+        cap = cv2.VideoCapture(str(source))
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        cap.release()
+
+        result: dict[str, Any] = {"status": "ok"}
+        # sparse: 3 scene/phut, dense: 1 scene/giay
+        for label, gap_s in (("sparse", 20.0), ("dense", 1.0)):
+            timestamps = [gap_s / 2 + i * gap_s for i in range(int(230 / gap_s))]
+            targets = [(idx, ts, int(ts * fps)) for idx, ts in enumerate(timestamps)]
+
+            t0 = time.perf_counter()
+            old_frames = _extract_frames_read_all(source, targets)
+            old_ms = (time.perf_counter() - t0) * 1000
+
+            processor = VideoPreprocessor(str(source), str(root / label))
+            t1 = time.perf_counter()
+            metadata = processor.extract_keyframes_and_metadata(timestamps)
+            new_ms = (time.perf_counter() - t1) * 1000
+
+            result[label] = {
+                "targets": len(targets),
+                "strategy": VideoPreprocessor._choose_extract_strategy(targets, fps),
+                "parity": [cv2.imencode(".jpg", frame)[1].tobytes() for frame in old_frames]
+                == _read_keyframes(Path(processor.extraction_dir), metadata),
+                "old_ms": round(old_ms, 2),
+                "new_ms": round(new_ms, 2),
+                "speedup_x": round(old_ms / new_ms, 2) if new_ms > 0 else None,
+            }
+        return result
+
+
+def _read_wav_as_whisper_input(path: str) -> Any:
+    import wave
+
+    import numpy as np
+
+    # Tuong duong buoc decode cua faster_whisper khi nhan duong dan WAV 16kHz mono
+    with wave.open(path, "rb") as wav_file:
+        pcm = wav_file.readframes(wav_file.getnframes())
+    return np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def _measure_peak(fn: Any) -> tuple[Any, float, int]:
+    import tracemalloc
+
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    try:
+        value = fn()
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return value, elapsed_ms, peak
+
+
+def benchmark_audio_handoff() -> dict[str, Any]:
+    try:
+        import numpy as np
+
+        from extraction_perception.extraction.extraction import VideoPreprocessor
+    except Exception as exc:
+        return {"status": "skipped", "reason": str(exc)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        source = root / "talk.mp4"
+        duration_s = 600
+        _run_checked(
+            [
+                "ffmpeg",
+                "-y",
+                "-f", "lavfi", "-i", f"color=c=gray:size=320x240:rate=5:duration={duration_s}",
+                "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=44100:duration={duration_s}",
+                "-shortest",
+                "-c:v", "libx264",
+                "-c:a", "aac",
+                str(source),
+            ]
+        )
+
+        file_processor = VideoPreprocessor(str(source), str(root / "file"))
+
+        def _file_path() -> Any:
+            wav_path = file_processor.extract_audio()
+            return _read_wav_as_whisper_input(wav_path)
+
+        file_audio, file_ms, file_peak = _measure_peak(_file_path)
+        wav_bytes = Path(file_processor.audio_path).stat().st_size
+
+        memory_processor = VideoPreprocessor(str(source), str(root / "memory"))
+        memory_audio, memory_ms, memory_peak = _measure_peak(memory_processor.extract_audio_array)
+
+        return {
+            "status": "ok",
+            "audio_seconds": duration_s,
+            "parity": bool(np.array_equal(file_audio, memory_audio)),
+            "file_ms": round(file_ms, 2),
+            "memory_ms": round(memory_ms, 2),
+            "saved_ms": round(file_ms - memory_ms, 2),
+            "file_peak_mib": round(file_peak / (1024 * 1024), 2),
+            "memory_peak_mib": round(memory_peak / (1024 * 1024), 2),
+            # WAV duoc ghi roi doc lai mot lan: I/O dia = 2 x kich thuoc file
+            "file_disk_io_mib": round(2 * wav_bytes / (1024 * 1024), 2),
+            "memory_disk_io_mib": 0.0,
+            "memory_wav_written": Path(memory_processor.audio_path).exists(),
+        }
+
+
+def benchmark_keyframe_handoff() -> dict[str, Any]:
+    try:
+        import cv2
+        import numpy as np
+        from PIL import Image
+
+        from extraction_perception.extraction.extraction import VideoPreprocessor
+    except Exception as exc:
+        return {"status": "skipped", "reason": str(exc)}
+
+    # Input size cua BLIP base; khong can nap model de do phan encode/decode + resize
+    model_size = 384
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        source = root / "scenes.mp4"
+        _make_scene_test_video(source, duration_s=30, scenes=12)
+
+        # Decode truoc de chi do chi phi ban giao keyframe (giong nhau o moi che do)
+        cap = cv2.VideoCapture(str(source))
+        decoded = []
+        while len(decoded) < 120:
+            success, frame = cap.read()
+            if not success:
+                break
+            decoded.append(frame)
+        cap.release()
+
+        files = VideoPreprocessor(str(source), str(root / "files"))
+        files_metadata: list[dict[str, Any]] = []
+        t0 = time.perf_counter()
+        file_images = []
+        for idx, frame in enumerate(decoded):
+            files._persist_frame(idx, idx / 24.0, frame, files_metadata)
+        for frame_info in files_metadata:
+            # Buoc captioner cu: decode JPEG + convert RGB + resize ve input size cua processor
+            with Image.open(Path(files.extraction_dir) / frame_info["file_path"]) as img:
+                file_images.append(np.asarray(img.convert("RGB").resize((model_size, model_size), Image.BICUBIC)))
+        files_ms = (time.perf_counter() - t0) * 1000
+        jpeg_paths = list(Path(files.keyframe_dir).glob("*.jpg"))
+
+        memory = VideoPreprocessor(str(source), str(root / "memory"), write_keyframes=False, handoff_size=model_size)
+        memory_metadata: list[dict[str, Any]] = []
+        t1 = time.perf_counter()
+        for idx, frame in enumerate(decoded):
+            memory._persist_frame(idx, idx / 24.0, frame, memory_metadata)
+        memory_images = [memory.keyframes[frame_info["frame_id"]] for frame_info in memory_metadata]
+        memory_ms = (time.perf_counter() - t1) * 1000
+
+        mean_abs_diff = float(
+            np.mean([np.abs(a.astype(np.int16) - b.astype(np.int16)).mean() for a, b in zip(file_images, memory_images)])
+        )
+        return {
+            "status": "ok",
+            "keyframes": len(memory_images),
+            "same_metadata": files_metadata == memory_metadata,
+            "files_ms": round(files_ms, 2),
+            "memory_ms": round(memory_ms, 2),
+            "speedup_x": round(files_ms / memory_ms, 2) if memory_ms > 0 else None,
+            "jpeg_files_written": len(jpeg_paths),
+            "jpeg_mib_written": round(sum(path.stat().st_size for path in jpeg_paths) / (1024 * 1024), 2),
+            "memory_files_written": len(list(Path(memory.keyframe_dir).glob("*.jpg"))),
+            "mean_abs_pixel_diff": round(mean_abs_diff, 2),
+        }
+
+
+def benchmark_keyframe_writer() -> dict[str, Any]:
+    try:
+        from extraction_perception.extraction.extraction import VideoPreprocessor
+    except Exception as exc:
+        return {"status": "skipped", "reason": str(exc)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        source = root / "scenes.mp4"
+        _make_scene_test_video(source, duration_s=120, scenes=24)
+        # Target day (2 keyframe/giay) de encode JPEG chiem phan lon decode loop
+        timestamps = [0.25 + 0.5 * i for i in range(236)]
+
+        rows: list[dict[str, Any]] = []
+        baseline: tuple[dict[str, Any], list[bytes]] | None = None
+        for workers in sorted({0, 2, 4, os.cpu_count() or 1}):
+            processor = VideoPreprocessor(str(source), str(root / f"writers_{workers}"), keyframe_writers=workers)
+            t0 = time.perf_counter()
+            metadata = processor.extract_keyframes_and_metadata(timestamps)
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+            outputs = (metadata, _read_keyframes(Path(processor.extraction_dir), metadata))
+            if baseline is None:
+                baseline = outputs
+            rows.append(
+                {
+                    "writers": workers,
+                    "elapsed_ms": round(elapsed_ms, 2),
+                    "stall_ms": processor.keyframe_stats["stall_ms"],
+                    "drain_ms": processor.keyframe_stats["drain_ms"],
+                    "parity": outputs == baseline,
+                }
+            )
+
+        return {"status": "ok", "cpu_count": os.cpu_count(), "keyframes": len(timestamps), "runs": rows}
+
+
+def benchmark_keyframe_store() -> dict[str, Any]:
+    try:
+        from extraction_perception.extraction.extraction import VideoPreprocessor
+        from extraction_perception.extraction.keyframe_store import keyframe_loader
+    except Exception as exc:
+        return {"status": "skipped", "reason": str(exc)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        source = root / "scenes.mp4"
+        _make_scene_test_video(source, duration_s=120, scenes=24)
+        timestamps = [0.25 + 0.5 * i for i in range(236)]
+
+        rows: dict[str, Any] = {}
+        for store in ("files", "packed"):
+            processor = VideoPreprocessor(str(source), str(root / store), keyframe_store=store, scene_stats=False)
+            t0 = time.perf_counter()
+            metadata = processor.extract_keyframes_and_metadata(timestamps)
+            write_ms = (time.perf_counter() - t0) * 1000
+
+            load = keyframe_loader(metadata, processor.extraction_dir)
+            t0 = time.perf_counter()
+            for frame_info in metadata["frames"]:
+                load(frame_info)
+            read_ms = (time.perf_counter() - t0) * 1000
+
+            files = [path for path in Path(processor.extraction_dir).rglob("*") if path.is_file()]
+            rows[store] = {
+                "write_ms": round(write_ms, 2),
+                "read_all_ms": round(read_ms, 2),
+                "files": len(files),
+                "bytes": sum(path.stat().st_size for path in files),
+            }
+
+    return {"status": "ok", "keyframes": len(timestamps), "stores": rows}
+
+
+def _make_slide(index: int, size: int = 448) -> Any:
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(index)
+    img = Image.new("RGB", (size, size), color=(245, 245, 240))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle([0, 0, size, 60], fill=(rng.randint(0, 120), rng.randint(0, 120), rng.randint(80, 200)))
+    for line in range(rng.randint(3, 8)):
+        top = 90 + line * 40
+        draw.rectangle([30, top, 30 + rng.randint(120, size - 60), top + 18], fill=(40, 40, 40))
+    if rng.random() < 0.5:
+        left = rng.randint(40, size // 2)
+        draw.ellipse([left, size - 160, left + 120, size - 40], fill=(rng.randint(0, 255), 90, 60))
+    return img
+
+
+def benchmark_caption_dedup() -> dict[str, Any]:
+    try:
+        import io
+
+        from PIL import Image
+
+        from extraction_perception.perception.keyframe_dedup import dedup_stats, group_near_duplicates, image_signature
+    except Exception as exc:
+        return {"status": "skipped", "reason": str(exc)}
+
+    # Bai giang gia lap: 15 slide, moi slide 4-12 scene (camera/noi dung nho doi), co slide quay lai
+    rng = random.Random(7)
+    slides = [_make_slide(i) for i in range(15)]
+    sequence = [i for i in range(15) for _ in range(rng.randint(4, 12))] + [3, 3, 7, 7]
+    signatures: list[bytes] = []
+    for slide_idx in sequence:
+        img = slides[slide_idx].point(lambda value: max(0, min(255, value + rng.randint(-6, 6))))
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", quality=rng.randint(70, 95))
+        buffer.seek(0)
+        with Image.open(buffer) as decoded:
+            signatures.append(image_signature(decoded.convert("RGB")))
+
+    rows: list[dict[str, Any]] = []
+    for threshold in (1.0, 2.0, 4.0, 8.0, 12.0, 16.0):
+        representatives, assignment = group_near_duplicates(signatures, threshold)
+        # Nhom "sach" khi moi nhom chi chua mot slide goc
+        mixed_groups = sum(
+            1
+            for group in range(len(representatives))
+            if len({sequence[i] for i, g in enumerate(assignment) if g == group}) > 1
+        )
+        row = dedup_stats(len(signatures), len(representatives), threshold)
+        row["mixed_groups"] = mixed_groups
+        rows.append(row)
+
+    return {"status": "ok", "slides": len(slides), "keyframes": len(sequence), "thresholds": rows}
+
+
+def benchmark_parallel_asr() -> dict[str, Any]:
+    try:
+        from extraction_perception.extraction.whisper_module import SAMPLE_RATE, WhisperExtractor
+        from faster_whisper.audio import decode_audio
+    except Exception as exc:
+        return {"status": "skipped", "reason": str(exc)}
+
+    # Nen dung audio co loi noi that (BENCHMARK_ASR_AUDIO); mac dinh tone tong hop chi do duoc thoi gian
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        audio_path = os.environ.get("BENCHMARK_ASR_AUDIO", "")
+        if not audio_path:
+            audio_path = str(root / "tone.wav")
+            _run_checked(
+                [
+                    "ffmpeg", "-y",
+                    "-f", "lavfi", "-i", "sine=frequency=300:sample_rate=16000:duration=1200",
+                    "-af", "volume=enable='lt(mod(t,20),2)':volume=0",
+                    "-ac", "1", audio_path,
+                ]
+            )
+        audio = decode_audio(audio_path, sampling_rate=SAMPLE_RATE)
+
+        rows: list[dict[str, Any]] = []
+        baseline_s = 0.0
+        for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+            try:
+                extractor = WhisperExtractor(model_size="base", device="cpu", compute_type="int8", workers=workers, chunk_seconds=120.0)
+            except Exception as exc:
+                return {"status": "skipped", "reason": f"model init failed: {exc}"}
+            t0 = time.perf_counter()
+            transcripts = extractor.transcribe(audio=audio, output_root=str(root), output_name=f"asr_{workers}")
+            elapsed_s = time.perf_counter() - t0
+            if workers == 1:
+                baseline_s = elapsed_s
+            rows.append(
+                {
+                    "workers": workers,
+                    "wall_s": round(elapsed_s, 2),
+                    "speedup_x": round(baseline_s / elapsed_s, 2) if elapsed_s > 0 else None,
+                    "segments": len(transcripts),
+                    "chunks": extractor.last_run_stats.get("chunks", 1),
+                    "sorted": all(transcripts[i]["start"] <= transcripts[i + 1]["start"] for i in range(len(transcripts) - 1)),
+                }
+            )
+
+        return {
+            "status": "ok",
+            "cpu_count": os.cpu_count(),
+            "audio_seconds": round(len(audio) / SAMPLE_RATE, 1),
+            "runs": rows,
+        }
+
+
+def benchmark_model_worker() -> dict[str, Any]:
+    try:
+        from extraction_perception.extraction.whisper_module import SAMPLE_RATE, WhisperExtractor
+        from extraction_perception.model_worker import ModelWorkerClient, worker_supported
+        from faster_whisper.audio import decode_audio
+    except Exception as exc:
+        return {"status": "skipped", "reason": str(exc)}
+    if not worker_supported():
+        return {"status": "skipped", "reason": "AF_UNIX not available"}
+
+    model = {"model_size": "base", "device": "cpu", "compute_type": "int8"}
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        audio_path = str(root / "clip.wav")
+        _run_checked(["ffmpeg", "-y", "-f", "lavfi", "-i", "sine=frequency=300:sample_rate=16000:duration=30", "-ac", "1", audio_path])
+        audio = decode_audio(audio_path, sampling_rate=SAMPLE_RATE)
+
+        # Cold: nap model trong process moi lan chay (hanh vi khi khong co worker)
+        t0 = time.perf_counter()
+        extractor = WhisperExtractor(**model)
+        extractor.transcribe(audio=audio, output_root=str(root), output_name="cold")
+        cold_s = time.perf_counter() - t0
+        del extractor
+
+        socket_path = str(root / "worker.sock")
+        worker = subprocess.Popen(
+            [sys.executable, "-m", "extraction_perception.model_worker", "--socket", socket_path],
+            cwd=str(Path(__file__).resolve().parents[1]),
+            stdout=subprocess.DEVNULL,
+        )
+        try:
+            client = None
+            deadline = time.time() + 30
+            while client is None and time.time() < deadline:
+                time.sleep(0.1)
+                client = ModelWorkerClient.connect(socket_path)
+            if client is None:
+                return {"status": "skipped", "reason": "model worker did not start"}
+
+            rows = []
+            for run in range(3):
+                t0 = time.perf_counter()
+                _, timing = client.transcribe(model, "", "", str(root), f"warm_{run}", audio=audio)
+                rows.append({"run": run, "client_wall_s": round(time.perf_counter() - t0, 2), **timing})
+            client.shutdown()
+        finally:
+            worker.wait(timeout=30)
+
+        warm_s = rows[-1]["client_wall_s"]
+        return {
+            "status": "ok",
+            "audio_seconds": round(len(audio) / SAMPLE_RATE, 1),
+            "cold_in_process_s": round(cold_s, 2),
+            "worker_runs": rows,
+            "warm_speedup_x": round(cold_s / warm_s, 2) if warm_s > 0 else None,
+        }
+
+
+def benchmark_caption_autotune() -> dict[str, Any]:
+    try:
+        import torch
+        from extraction_perception.perception.caption import VisualCaptioner
+    except Exception as exc:
+        return {"status": "skipped", "reason": str(exc)}
+
+    images = [_make_slide(i, size=384) for i in range(32)]
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            cap = VisualCaptioner(tuning_path=str(Path(tmp) / "caption_tuning.json"))
+        except Exception as exc:
+            return {"status": "skipped", "reason": f"model init failed: {exc}"}
+        if cap.device != "cpu":
+            return {"status": "skipped", "reason": "autotune only runs on CPU"}
+
+        def fps(batch_size: int, threads: int) -> float:
+            torch.set_num_threads(threads)
+            t0 = time.perf_counter()
+            cap._caption_batch(list(range(len(images))), batch_size, lambda idx: images[idx])
+            return len(images) / (time.perf_counter() - t0)
+
+        default_batch, default_threads = cap.default_batch_size, torch.get_num_threads()
+        default_fps = fps(default_batch, default_threads)
+        t0 = time.perf_counter()
+        result = cap.autotune(images[:4])
+        probe_s = time.perf_counter() - t0
+        best = result["best"]
+        tuned_fps = fps(best["batch_size"], best["threads"])
+
+    return {
+        "status": "ok",
+        "cpu_count": os.cpu_count(),
+        "default": {"batch_size": default_batch, "threads": default_threads, "fps": round(default_fps, 2)},
+        "tuned": {"batch_size": best["batch_size"], "threads": best["threads"], "fps": round(tuned_fps, 2)},
+        "probe_s": round(probe_s, 1),
+        "probes": len(result["measurements"]),
+        "speedup_x": round(tuned_fps / default_fps, 2) if default_fps > 0 else None,
+    }
+
+
+def benchmark_caption_prefetch() -> dict[str, Any]:
+    try:
+        from extraction_perception.perception.caption import VisualCaptioner
+    except Exception as exc:
+        return {"status": "skipped", "reason": str(exc)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        (root / "keyframes").mkdir()
+        metadata: dict[str, Any] = {"frames": []}
+        for i in range(24):
+            name = f"frame_{i:03d}.jpg"
+            _make_slide(i, size=1280).save(root / "keyframes" / name, quality=95)
+            metadata["frames"].append({"frame_id": i + 1, "timestamp": _to_ts(i * 2000), "file_path": f"keyframes/{name}"})
+        metadata_path = root / "scene_metadata.json"
+        metadata_path.write_text(json.dumps(metadata), encoding="utf-8")
+
+        try:
+            cap = VisualCaptioner()
+        except Exception as exc:
+            return {"status": "skipped", "reason": f"model init failed: {exc}"}
+
+        rows = {}
+        outputs = {}
+        for workers in (0, 1, 2):
+            cap.prefetch_workers = workers
+            t0 = time.perf_counter()
+            outputs[workers] = cap.caption_from_metadata(str(metadata_path), str(root / f"captions_{workers}.json"), batch_size=4)
+            rows[workers] = {"wall_s": round(time.perf_counter() - t0, 2), **(cap.pipeline_stats or {})}
+
+    return {
+        "status": "ok",
+        "frames": len(metadata["frames"]),
+        "runs": rows,
+        "identical_output": outputs[0] == outputs[1] == outputs[2],
+        "speedup_x": round(rows[0]["wall_s"] / rows[1]["wall_s"], 2) if rows[1]["wall_s"] > 0 else None,
+    }
+
+
+def benchmark_caption_cascade() -> dict[str, Any]:
+    try:
+        from extraction_perception.perception.caption import VisualCaptioner
+    except Exception as exc:
+        return {"status": "skipped", "reason": str(exc)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        (root / "keyframes").mkdir()
+        metadata: dict[str, Any] = {"frames": []}
+        for i in range(24):
+            name = f"frame_{i:03d}.jpg"
+            _make_slide(i).save(root / "keyframes" / name, quality=95)
+            metadata["frames"].append({"frame_id": i + 1, "timestamp": _to_ts(i * 2000), "file_path": f"keyframes/{name}"})
+        metadata_path = root / "scene_metadata.json"
+        metadata_path.write_text(json.dumps(metadata), encoding="utf-8")
+
+        try:
+            single = VisualCaptioner(prefetch_workers=0)
+            cascade = VisualCaptioner(prefetch_workers=0, cascade_model=single.model_name)
+        except Exception as exc:
+            return {"status": "skipped", "reason": f"model init failed: {exc}"}
+
+        t0 = time.perf_counter()
+        single.caption_from_metadata(str(metadata_path), str(root / "single.json"), batch_size=4)
+        single_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        cascade.caption_from_metadata(str(metadata_path), str(root / "cascade.json"), batch_size=4)
+        cascade_s = time.perf_counter() - t0
+
+    return {
+        "status": "ok",
+        "frames": len(metadata["frames"]),
+        "single_s": round(single_s, 2),
+        "cascade_s": round(cascade_s, 2),
+        "cascade": cascade.cascade_stats,
+        "speedup_x": round(single_s / cascade_s, 2) if cascade_s > 0 else None,
+    }
+
+
+def benchmark_streaming_caption() -> dict[str, Any]:
+    try:
+        import threading
+
+        from extraction_perception.extraction.extraction import VideoPreprocessor
+        from extraction_perception.perception.caption import VisualCaptioner, caption_input_size
+        from extraction_perception.perception.keyframe_stream import KeyframeStream
+    except Exception as exc:
+        return {"status": "skipped", "reason": str(exc)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        source = root / "long.mp4"
+        _make_scene_test_video(source, duration_s=150, scenes=30)
+        try:
+            captioner = VisualCaptioner(prefetch_workers=0)
+            size = caption_input_size(captioner.model_name)
+        except Exception as exc:
+            return {"status": "skipped", "reason": f"model init failed: {exc}"}
+
+        # Batch: fused extraction xong moi caption (caption dau tien chi co sau khi decode het video)
+        t0 = time.perf_counter()
+        batch = VideoPreprocessor(str(source), str(root / "batch"), write_keyframes=False, handoff_size=size)
+        _, metadata = batch.detect_scenes_and_extract_keyframes()
+        extracted_s = time.perf_counter() - t0
+        batch_result = captioner.caption_from_arrays(metadata, batch.keyframes, str(root / "batch.json"), batch_size=4)
+        batch_s = time.perf_counter() - t0
+
+        # Streaming: keyframe vao hang doi co gioi han ngay khi scene dong lai, caption song song voi decode
+        stream = KeyframeStream()
+        streaming = VideoPreprocessor(
+            str(source), str(root / "stream"), write_keyframes=False, handoff_size=size, keyframe_sink=stream.put
+        )
+
+        def produce() -> None:
+            try:
+                streaming.detect_scenes_and_extract_keyframes()
+            except BaseException as exc:
+                stream.close(exc)
+                raise
+            stream.close()
+
+        producer = threading.Thread(target=produce, name="stream_extraction")
+        producer.start()
+        stream_result = captioner.caption_stream(stream, str(root / "stream.json"), batch_size=4)
+        producer.join()
+        stats = captioner.stream_stats or {}
+
+    return {
+        "status": "ok",
+        "keyframes": len(metadata["frames"]),
+        # Caption dau tien o che do batch khong the som hon luc extraction xong
+        "batch_first_caption_after_s": round(extracted_s, 2),
+        "batch_end_to_end_s": round(batch_s, 2),
+        "stream_first_caption_s": stats.get("first_caption_s"),
+        "stream_end_to_end_s": stats.get("end_to_end_s"),
+        "stream_producer_stall_s": stats.get("producer_stall_s"),
+        "same_captions": batch_result == stream_result,
+    }
+
+
 def main() -> int:
     report = {
         "matcher": benchmark_matcher(),
         "assembler": benchmark_assemble(),
         "caption": benchmark_caption_batch(),
+        "fused_extraction": benchmark_fused_extraction(),
+        "parallel_scene_detection": benchmark_parallel_scene_detection(),
+        "keyframe_seek": benchmark_keyframe_seek(),
+        "audio_handoff": benchmark_audio_handoff(),
+        "keyframe_handoff": benchmark_keyframe_handoff(),
+        "keyframe_writer": benchmark_keyframe_writer(),
+        "keyframe_store": benchmark_keyframe_store(),
+        "caption_dedup": benchmark_caption_dedup(),
+        "caption_autotune": benchmark_caption_autotune(),
+        "caption_prefetch": benchmark_caption_prefetch(),
+        "caption_cascade": benchmark_caption_cascade(),
+        "streaming_caption": benchmark_streaming_caption(),
+        "parallel_asr": benchmark_parallel_asr(),
+        "model_worker": benchmark_model_worker(),
     }
     print(json.dumps(report, ensure_ascii=False, indent=2))
     return 0
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from extraction_perception.perception.caption_parity import compare_caption_lists
+
+
+def _run_captioner(metadata_path: Path, model_name: str, quantize: str, batch_size: int, out_path: Path) -> tuple[list[str], float]:
+    from extraction_perception.extraction.keyframe_store import keyframe_loader
+    from extraction_perception.perception.caption import VisualCaptioner
+
+    captioner = VisualCaptioner(model_name=model_name, quantize=quantize, prefetch_workers=0)
+    metadata = json.loads(metadata_path.read_text(encoding="utf-8"))
+    # Lan generate dau co chi phi khoi tao: chay 1 frame truoc khi do
+    first = keyframe_loader(metadata, metadata_path.parent)(metadata["frames"][0])
+    captioner._caption_batch([0], 1, lambda _: first)
+
+    t0 = time.perf_counter()
+    results = captioner.caption_from_metadata(str(metadata_path), str(out_path), batch_size=batch_size)
+    elapsed_s = time.perf_counter() - t0
+    return [item["caption"] for item in results], elapsed_s
+
+
+def build_report(metadata_path: Path, model_name: str, quantize: str, batch_size: int) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        baseline, baseline_s = _run_captioner(metadata_path, model_name, "none", batch_size, root / "baseline.json")
+        candidate, candidate_s = _run_captioner(metadata_path, model_name, quantize, batch_size, root / "candidate.json")
+
+    frames = len(baseline)
+    baseline_fps = frames / baseline_s if baseline_s > 0 else None
+    candidate_fps = frames / candidate_s if candidate_s > 0 else None
+    return {
+        "metadata_path": str(metadata_path),
+        "model_name": model_name,
+        "batch_size": batch_size,
+        "baseline": {"quantize": "none", "elapsed_s": round(baseline_s, 2), "fps": round(baseline_fps or 0.0, 3)},
+        "candidate": {"quantize": quantize, "elapsed_s": round(candidate_s, 2), "fps": round(candidate_fps or 0.0, 3)},
+        "speedup_x": round(baseline_s / candidate_s, 2) if candidate_s > 0 else None,
+        "agreement": compare_caption_lists(baseline, candidate),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare quantized CPU captioning against the float32 BLIP baseline")
+    parser.add_argument("--metadata-path", type=Path, required=True, help="scene_metadata.json cua bo keyframe mau")
+    parser.add_argument("--caption-model", default="Salesforce/blip-image-captioning-base")
+    parser.add_argument("--quantize", default="int8", choices=["int8"])
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--out", type=Path, default=None)
+    args = parser.parse_args()
+
+    if not args.metadata_path.exists():
+        print(f"INPUT_METADATA_NOT_FOUND: {args.metadata_path}")
+        return 1
+
+    report = build_report(args.metadata_path, args.caption_model, args.quantize, args.batch_size)
+    payload = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(payload + "\n", encoding="utf-8")
+        print(f"Wrote caption parity report: {args.out}")
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
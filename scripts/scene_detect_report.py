@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from extraction_perception.extraction.scene_cuts import FAST_SCENE_DETECT_PRESET, compare_cut_lists
+
+DEFAULT_CANDIDATES = [
+    "content:auto:0",
+    f"content:{FAST_SCENE_DETECT_PRESET['analysis_width']}:{FAST_SCENE_DETECT_PRESET['frame_skip']}",
+    "hash:auto:0",
+    f"hash:{FAST_SCENE_DETECT_PRESET['analysis_width']}:{FAST_SCENE_DETECT_PRESET['frame_skip']}",
+    "histogram:auto:0",
+    f"histogram:{FAST_SCENE_DETECT_PRESET['analysis_width']}:{FAST_SCENE_DETECT_PRESET['frame_skip']}",
+]
+
+
+def _parse_candidate(spec: str) -> dict[str, Any]:
+    parts = spec.split(":")
+    if len(parts) != 3:
+        raise ValueError(f"Invalid candidate '{spec}', expected detector:analysis_width|auto:frame_skip")
+    detector, width, skip = parts
+    return {
+        "detector": detector,
+        "analysis_width": None if width == "auto" else int(width),
+        "frame_skip": int(skip),
+    }
+
+
+def _run_detection(processor: Any, config: dict[str, Any]) -> tuple[list[int], float]:
+    t0 = time.perf_counter()
+    scene_list = processor.detect_scene_list(threshold=None, **config)
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    # Cut = frame bat dau cua moi scene, tru scene dau tien
+    cuts = [scene[0].get_frames() for scene in scene_list[1:]]
+    return cuts, elapsed_ms
+
+
+def build_report(video_path: Path, candidates: list[str], tolerance_frames: int) -> dict[str, Any]:
+    from scenedetect import open_video
+
+    from extraction_perception.extraction.extraction import VideoPreprocessor
+
+    native_width = max(open_video(str(video_path)).frame_size)
+    with tempfile.TemporaryDirectory() as tmp:
+        # Do toc do decode that: khong dung lai diem scene da luu
+        processor = VideoPreprocessor(str(video_path), tmp, scene_stats=False)
+
+        baseline_config = {"detector": "content", "analysis_width": native_width, "frame_skip": 0}
+        baseline_cuts, baseline_ms = _run_detection(processor, baseline_config)
+
+        rows: list[dict[str, Any]] = []
+        for spec in candidates:
+            config = _parse_candidate(spec)
+            cuts, elapsed_ms = _run_detection(processor, config)
+            row = {"candidate": spec, "elapsed_ms": round(elapsed_ms, 2)}
+            row["speedup_x"] = round(baseline_ms / elapsed_ms, 2) if elapsed_ms > 0 else None
+            row.update(compare_cut_lists(baseline_cuts, cuts, tolerance=tolerance_frames))
+            rows.append(row)
+
+    return {
+        "video_path": str(video_path),
+        "tolerance_frames": tolerance_frames,
+        "baseline": {
+            "candidate": f"content:{native_width}:0",
+            "elapsed_ms": round(baseline_ms, 2),
+            "cuts": len(baseline_cuts),
+        },
+        "candidates": rows,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Compare fast scene-detection configs against the full-resolution ContentDetector baseline"
+    )
+    parser.add_argument("--video-path", type=Path, required=True)
+    parser.add_argument(
+        "--candidate",
+        action="append",
+        default=None,
+        help="detector:analysis_width|auto:frame_skip (co the lap lai). Mac dinh: content/hash/histogram x auto/fast",
+    )
+    parser.add_argument("--tolerance-frames", type=int, default=2)
+    parser.add_argument("--out", type=Path, default=None)
+    args = parser.parse_args()
+
+    if not args.video_path.exists():
+        print(f"INPUT_VIDEO_NOT_FOUND: {args.video_path}")
+        return 1
+
+    report = build_report(args.video_path, args.candidate or DEFAULT_CANDIDATES, args.tolerance_frames)
+    payload = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(payload + "\n", encoding="utf-8")
+        print(f"Wrote scene detect report: {args.out}")
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+
+def build_sweep(
+    video_path: Path,
+    output_root: Path,
+    detector: str,
+    thresholds: list[float],
+    analysis_width: int | None,
+    frame_skip: int,
+) -> dict[str, Any]:
+    from extraction_perception.extraction.extraction import VideoPreprocessor
+
+    processor = VideoPreprocessor(str(video_path), str(output_root), scene_stats=True)
+    rows: list[dict[str, Any]] = []
+    for threshold in thresholds:
+        # Lan dau (chua co scene_scores.bin) decode + luu diem; cac threshold sau tinh lai tu diem da luu
+        t0 = time.perf_counter()
+        scene_list = processor.detect_scene_list(threshold, detector, analysis_width, frame_skip)
+        rows.append(
+            {
+                "threshold": threshold,
+                "scenes": len(scene_list),
+                "elapsed_ms": round((time.perf_counter() - t0) * 1000, 2),
+            }
+        )
+    return {
+        "video_path": str(video_path),
+        "detector": detector,
+        "analysis_width": analysis_width,
+        "frame_skip": frame_skip,
+        "scene_stats_path": processor.scene_stats_path,
+        "thresholds": rows,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Sweep scene-detection thresholds using the stored per-frame scores")
+    parser.add_argument("--video-path", type=Path, required=True)
+    parser.add_argument("--output-root", type=Path, default=Path("Data/processed"))
+    parser.add_argument("--detector", default="content", choices=["content", "hash", "histogram"])
+    parser.add_argument("--thresholds", required=True, help="Danh sach threshold, vd 20,27,35")
+    parser.add_argument("--scene-analysis-width", type=int, default=None)
+    parser.add_argument("--scene-frame-skip", type=int, default=0)
+    parser.add_argument("--out", type=Path, default=None)
+    args = parser.parse_args()
+
+    if not args.video_path.exists():
+        print(f"INPUT_VIDEO_NOT_FOUND: {args.video_path}")
+        return 1
+
+    thresholds = [float(value) for value in args.thresholds.split(",") if value.strip()]
+    report = build_sweep(
+        args.video_path, args.output_root, args.detector, thresholds, args.scene_analysis_width, args.scene_frame_skip
+    )
+    payload = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(payload + "\n", encoding="utf-8")
+        print(f"Wrote scene threshold sweep: {args.out}")
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
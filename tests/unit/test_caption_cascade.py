@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import unittest
+
+from extraction_perception.perception.caption_cascade import cascade_stats, escalation_reason
+
+
+class CaptionCascadeTests(unittest.TestCase):
+    def test_confident_caption_stays_on_cheap_tier(self) -> None:
+        self.assertIsNone(escalation_reason("a man standing in front of a whiteboard", -0.4, -1.2, 4))
+        self.assertIsNone(escalation_reason("a slide with text", None, -1.2, 4))
+
+    def test_escalation_reasons(self) -> None:
+        self.assertEqual(escalation_reason("a man standing in front of a whiteboard", -1.8, -1.2, 4), "low_logprob")
+        self.assertEqual(escalation_reason("a laptop", -0.2, -1.2, 4), "short")
+        self.assertEqual(escalation_reason("a a a a a a", -0.2, -1.2, 4), "repetitive")
+
+    def test_stats_report_rate_time_and_heavy_only_estimate(self) -> None:
+        stats = cascade_stats(10, ["low_logprob", "short", "low_logprob"], cheap_s=2.0, heavy_s=3.0)
+
+        self.assertEqual(stats["escalated"], 3)
+        self.assertEqual(stats["escalation_rate"], 0.3)
+        self.assertEqual(stats["reasons"], {"low_logprob": 2, "short": 1})
+        self.assertEqual(stats["total_s"], 5.0)
+        self.assertEqual(stats["heavy_only_estimate_s"], 10.0)
+        self.assertIsNone(cascade_stats(4, [], 1.0, 0.0)["heavy_only_estimate_s"])
+
+
+if __name__ == "__main__":
+    unittest.main()
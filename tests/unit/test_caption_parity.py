@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import unittest
+
+from extraction_perception.perception.caption_parity import compare_caption_lists, token_f1
+
+
+class CaptionParityTests(unittest.TestCase):
+    def test_token_f1_ignores_case_and_punctuation(self) -> None:
+        self.assertEqual(token_f1("A man giving a talk.", "a man giving a talk"), 1.0)
+        self.assertAlmostEqual(token_f1("a slide with text", "a slide with a chart"), 2 * 0.6 * 0.75 / 1.35)
+        self.assertEqual(token_f1("a cat", "the dog"), 0.0)
+        self.assertEqual(token_f1("", ""), 1.0)
+
+    def test_compare_reports_agreement_and_worst_frames(self) -> None:
+        baseline = ["a man standing in front of a whiteboard", "a slide with text", "a laptop on a desk"]
+        candidate = ["A man standing in front of a whiteboard.", "a slide with a chart", "a laptop on a desk"]
+
+        report = compare_caption_lists(baseline, candidate)
+
+        self.assertEqual(report["exact_match"], 2)
+        self.assertEqual(report["exact_match_ratio"], 0.6667)
+        self.assertEqual([item["index"] for item in report["disagreements"]], [1])
+        self.assertLess(report["min_token_f1"], 1.0)
+
+    def test_length_mismatch_raises(self) -> None:
+        with self.assertRaises(ValueError):
+            compare_caption_lists(["a"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
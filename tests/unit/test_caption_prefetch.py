@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import threading
+import time
+import unittest
+
+from extraction_perception.perception.prefetch import prefetch_map
+
+
+class PrefetchMapTests(unittest.TestCase):
+    def test_preserves_order_with_uneven_prepare_times(self) -> None:
+        items = list(range(8))
+
+        def prepare(item: int) -> int:
+            time.sleep(0.004 * (8 - item))
+            return item * 10
+
+        for workers in (0, 1, 3):
+            output = [(item, prepared) for item, prepared, _ in prefetch_map(items, prepare, workers=workers, depth=3)]
+            self.assertEqual(output, [(item, item * 10) for item in items])
+
+    def test_in_flight_work_is_bounded_by_depth(self) -> None:
+        lock = threading.Lock()
+        started: list[int] = []
+        consumed: list[int] = []
+        max_ahead = 0
+
+        def prepare(item: int) -> int:
+            nonlocal max_ahead
+            with lock:
+                started.append(item)
+                max_ahead = max(max_ahead, item - (consumed[-1] if consumed else -1))
+            return item
+
+        for item, _, _ in prefetch_map(list(range(10)), prepare, workers=2, depth=2):
+            time.sleep(0.002)
+            with lock:
+                consumed.append(item)
+
+        # Item hien tai + toi da depth item phia truoc
+        self.assertLessEqual(max_ahead, 3)
+        self.assertEqual(sorted(started), list(range(10)))
+
+    def test_prepare_error_surfaces_at_its_item(self) -> None:
+        def prepare(item: int) -> int:
+            if item == 2:
+                raise RuntimeError("CAPTION_IMAGE_LOAD_FAILED: frame 2")
+            return item
+
+        seen = []
+        with self.assertRaises(RuntimeError):
+            for item, _, _ in prefetch_map([0, 1, 2, 3], prepare, workers=2, depth=2):
+                seen.append(item)
+        self.assertEqual(seen, [0, 1])
+
+    def test_wait_time_reflects_slow_prepare(self) -> None:
+        waits = [wait for _, _, wait in prefetch_map([0, 1], lambda item: time.sleep(0.02), workers=0)]
+
+        self.assertTrue(all(wait >= 0.015 for wait in waits))
+
+
+if __name__ == "__main__":
+    unittest.main()
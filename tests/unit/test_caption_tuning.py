@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from extraction_perception.perception.caption_tuning import (
+    candidate_batch_sizes,
+    candidate_thread_counts,
+    load_tuning,
+    save_tuning,
+    search_best_config,
+    tuning_key,
+)
+
+
+class CaptionTuningTests(unittest.TestCase):
+    def test_candidates(self) -> None:
+        self.assertEqual(candidate_batch_sizes(16), [1, 2, 4, 8, 16])
+        self.assertEqual(candidate_thread_counts(32), [32, 16, 8])
+        self.assertEqual(candidate_thread_counts(1), [1])
+
+    def test_search_picks_fastest_threads_then_batch(self) -> None:
+        # 16 thread nhanh nhat; fps tang toi batch 8 roi giam
+        batch_fps = {1: 1.0, 2: 1.8, 4: 3.0, 8: 4.0, 16: 3.5, 32: 3.0}
+        thread_factor = {32: 0.7, 16: 1.0, 8: 0.8}
+        calls = []
+
+        def measure(batch_size: int, threads: int) -> float:
+            calls.append((batch_size, threads))
+            return batch_fps[batch_size] * thread_factor[threads]
+
+        result = search_best_config(measure, candidate_batch_sizes(32), [32, 16, 8])
+
+        self.assertEqual(result["best"], {"batch_size": 8, "threads": 16, "fps": 4.0})
+        # Dung sau batch 16 (fps giam), khong do batch 32
+        self.assertNotIn((32, 16), calls)
+        self.assertEqual(len(result["measurements"]), len(calls))
+
+    def test_ties_prefer_smaller_batch(self) -> None:
+        result = search_best_config(lambda batch_size, threads: 2.0, [1, 2, 4, 8], [4])
+
+        self.assertEqual(result["best"]["batch_size"], 1)
+
+    def test_save_and_load_per_host_and_model(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "caption_tuning.json"
+            key = tuning_key("Salesforce/blip-image-captioning-base", "cpu", host="node-a")
+            other = tuning_key("Salesforce/blip-image-captioning-base", "cpu", host="node-b")
+            save_tuning(path, key, {"batch_size": 8, "threads": 16, "fps": 4.0}, [])
+            save_tuning(path, other, {"batch_size": 2, "threads": 4, "fps": 1.0}, [])
+
+            loaded = load_tuning(path, key)
+            self.assertIsNotNone(loaded)
+            assert loaded is not None
+            self.assertEqual((loaded["batch_size"], loaded["threads"]), (8, 16))
+            self.assertEqual(load_tuning(path, other)["batch_size"], 2)  # type: ignore[index]
+            self.assertIsNone(load_tuning(path, tuning_key("other-model", "cpu", host="node-a")))
+            self.assertIsNone(load_tuning(Path(tmp) / "missing.json", key))
+
+
+if __name__ == "__main__":
+    unittest.main()
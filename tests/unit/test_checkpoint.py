@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from extraction_perception.checkpoint import JsonlCheckpoint, read_jsonl_checkpoint
+
+KEY = {"frames": "abc", "model_name": "Salesforce/blip-image-captioning-base", "dedup_threshold": None}
+
+
+class JsonlCheckpointTests(unittest.TestCase):
+    def test_caption_records_resume_by_frame_id(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "visual_captions.partial.jsonl"
+            checkpoint = JsonlCheckpoint(path, KEY, label="Caption checkpoint")
+            checkpoint.resume()
+            checkpoint.append({"frame_id": 1, "timestamp": "00:00:00.000", "caption": "a slide"})
+            checkpoint.append({"frame_id": 2, "timestamp": "00:00:04.000", "caption": "a man talking"})
+            checkpoint.close()
+
+            resumed = JsonlCheckpoint(path, KEY, label="Caption checkpoint")
+            done = {record["frame_id"]: record["caption"] for record in resumed.resume()}
+            resumed.close()
+
+            self.assertEqual(done, {1: "a slide", 2: "a man talking"})
+            self.assertEqual(len(read_jsonl_checkpoint(path)), 2)
+
+    def test_closed_checkpoint_rejects_writes(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            checkpoint = JsonlCheckpoint(Path(tmp) / "c.partial.jsonl", KEY)
+            with self.assertRaises(RuntimeError):
+                checkpoint.append({"frame_id": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import shutil
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Any
+
+
+def _ffmpeg(*args: str) -> None:
+    subprocess.run(["ffmpeg", "-hide_banner", "-loglevel", "error", "-y", *args], check=True)
+
+
+def _write_clip(path: Path, with_audio: bool = True) -> None:
+    """Clip 3 scene (3 nguon test noi nhau), 10 fps; with_audio=False thi khong co audio stream nen ffmpeg audio that bai."""
+    scenes = "".join(
+        f"{source}=size=96x64:rate=10:duration=2[s{idx}];" for idx, source in enumerate(("testsrc2", "smptebars", "rgbtestsrc"))
+    )
+    video = ["-f", "lavfi", "-i", f"{scenes}[s0][s1][s2]concat=n=3,format=yuv420p[out0]"]
+    audio = ["-f", "lavfi", "-i", "sine=frequency=440:sample_rate=44100"] if with_audio else []
+    codecs = ["-c:v", "libx264"] + (["-c:a", "aac"] if with_audio else [])
+    _ffmpeg(*video, *audio, "-t", "6", *codecs, str(path))
+
+
+def _visual_outputs(result: dict[str, Any], output_root: Path, video_name: str) -> tuple[dict, str, dict[str, str]]:
+    extraction_dir = output_root / video_name / "extraction"
+    keyframes = {
+        path.name: hashlib.sha256(path.read_bytes()).hexdigest() for path in sorted(extraction_dir.glob("keyframes/*.jpg"))
+    }
+    metadata_text = (extraction_dir / "scene_metadata.json").read_text(encoding="utf-8")
+    return result["metadata"], metadata_text, keyframes
+
+
+@unittest.skipUnless(
+    shutil.which("ffmpeg") and importlib.util.find_spec("cv2") and importlib.util.find_spec("scenedetect"),
+    "ffmpeg/opencv/scenedetect not installed",
+)
+class OverlappedAudioPipelineTests(unittest.TestCase):
+    maxDiff = None
+    """Job audio chay nen (overlap_audio) khong doi ket qua visual va van bao loi ffmpeg nhu khi chay tuan tu."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._tmp = tempfile.TemporaryDirectory()
+        cls.root = Path(cls._tmp.name)
+        cls.video_path = cls.root / "clip.mp4"
+        cls.silent_video_path = cls.root / "silent.mp4"
+        _write_clip(cls.video_path)
+        _write_clip(cls.silent_video_path, with_audio=False)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls._tmp.cleanup()
+
+    def _run(self, name: str, video_path: Path, **kwargs: Any) -> dict[str, Any]:
+        from main import run_video_pipeline
+
+        return run_video_pipeline(
+            video_path=str(video_path),
+            output_root=str(self.root / name),
+            scene_threshold=27.0,
+            keyframe_resize=336,
+            **kwargs,
+        )
+
+    def test_overlapped_audio_keeps_visual_result(self) -> None:
+        for audio_mode in ("file", "memory"):
+            with self.subTest(audio_mode=audio_mode):
+                serial = self._run(f"serial_{audio_mode}", self.video_path, overlap_audio=False, audio_mode=audio_mode)
+                overlapped = self._run(f"overlap_{audio_mode}", self.video_path, overlap_audio=True, audio_mode=audio_mode)
+
+                self.assertEqual(
+                    _visual_outputs(overlapped, self.root / f"overlap_{audio_mode}", "clip"),
+                    _visual_outputs(serial, self.root / f"serial_{audio_mode}", "clip"),
+                )
+                self.assertGreaterEqual(overlapped["metadata"]["total_keyframes"], 2)
+                if audio_mode == "memory":
+                    self.assertEqual(overlapped["audio"].tobytes(), serial["audio"].tobytes())
+                else:
+                    self.assertEqual(Path(overlapped["audio_path"]).read_bytes(), Path(serial["audio_path"]).read_bytes())
+
+    def test_overlapped_audio_ffmpeg_failure_is_pipeline_error(self) -> None:
+        for audio_mode in ("file", "memory"):
+            with self.subTest(audio_mode=audio_mode):
+                with self.assertRaisesRegex(RuntimeError, "(?s)^EXTRACT_AUDIO_FFMPEG_FAILED: .*does not contain any stream"):
+                    self._run(f"silent_serial_{audio_mode}", self.silent_video_path, overlap_audio=False, audio_mode=audio_mode)
+                with self.assertRaisesRegex(RuntimeError, "(?s)^EXTRACT_AUDIO_FFMPEG_FAILED: .*does not contain any stream"):
+                    self._run(f"silent_overlap_{audio_mode}", self.silent_video_path, overlap_audio=True, audio_mode=audio_mode)
+
+                # Nhanh visual van chay xong truoc khi loi audio duoc nem ra
+                self.assertEqual(
+                    _visual_outputs({"metadata": None}, self.root / f"silent_overlap_{audio_mode}", "silent"),
+                    _visual_outputs({"metadata": None}, self.root / f"silent_serial_{audio_mode}", "silent"),
+                )
+
+
+@unittest.skipUnless(
+    shutil.which("ffmpeg") and importlib.util.find_spec("cv2") and importlib.util.find_spec("numpy"),
+    "ffmpeg/opencv/numpy not installed",
+)
+class AudioArrayTests(unittest.TestCase):
+    """extract_audio_array (pipe ffmpeg) phai khop duong WAV; PCM .npy cua cache phai doc lai nguyen ven."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._tmp = tempfile.TemporaryDirectory()
+        cls.root = Path(cls._tmp.name)
+        cls.video_path = cls.root / "clip.mp4"
+        _write_clip(cls.video_path)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls._tmp.cleanup()
+
+    def _processor(self, name: str) -> Any:
+        from extraction_perception.extraction.extraction import VideoPreprocessor
+
+        return VideoPreprocessor(str(self.video_path), str(self.root / name))
+
+    def test_piped_array_matches_wav_path(self) -> None:
+        import numpy as np
+
+        wav_processor = self._processor("wav")
+        wav_processor.extract_audio()
+        from_wav = wav_processor.load_audio_array()
+        piped = self._processor("pipe").extract_audio_array()
+
+        self.assertEqual(piped.dtype, np.float32)
+        self.assertEqual(piped.ndim, 1)
+        # Clip 6 giay, 16 kHz mono
+        self.assertAlmostEqual(len(piped) / 16000, 6.0, delta=0.1)
+        self.assertEqual(len(piped), len(from_wav))
+        # Cung bo resample/convert s16le cua ffmpeg: lech toi da 1 muc luong tu int16
+        np.testing.assert_allclose(piped, from_wav, rtol=0, atol=1 / 32768)
+        self.assertGreater(float(np.abs(piped).max()), 0.1)
+
+    def test_keep_wav_writes_the_returned_samples(self) -> None:
+        import numpy as np
+
+        processor = self._processor("keep_wav")
+        piped = processor.extract_audio_array(keep_wav=True)
+
+        np.testing.assert_array_equal(processor.load_audio_array(), piped)
+
+    def test_pcm_npy_round_trip(self) -> None:
+        import numpy as np
+
+        processor = self._processor("pcm")
+        audio = processor.extract_audio_array()
+        processor.save_audio_pcm(audio)
+        restored = processor.load_audio_pcm()
+
+        self.assertEqual(Path(processor.audio_pcm_path()).suffix, ".npy")
+        self.assertEqual(np.load(processor.audio_pcm_path()).dtype, np.int16)
+        self.assertEqual(restored.dtype, np.float32)
+        # Mau tu ffmpeg deu la int16 / 32768 nen round-trip khong mat gi
+        np.testing.assert_array_equal(restored, audio)
+
+    def test_pcm_npy_round_trip_quantizes_arbitrary_floats(self) -> None:
+        import numpy as np
+
+        processor = self._processor("pcm_float")
+        audio = np.random.default_rng(3).uniform(-0.99, 0.99, 16000).astype(np.float32)
+        processor.save_audio_pcm(audio)
+
+        np.testing.assert_allclose(processor.load_audio_pcm(), audio, rtol=0, atol=0.5 / 32768 + 1e-7)
+
+
+if __name__ == "__main__":
+    unittest.main()
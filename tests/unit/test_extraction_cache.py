@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import json
+import tempfile
+from array import array
+import time
+import unittest
+from pathlib import Path
+
+from extraction_perception.extraction.extraction_cache import (
+    ExtractionCache,
+    audio_fingerprint,
+    extraction_cache_key,
+    transcript_cache_key,
+    video_fingerprint,
+)
+
+
+def _write(path: Path, payload: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(payload)
+
+
+class ExtractionCacheTests(unittest.TestCase):
+    def test_fingerprint_depends_on_content_not_name(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            _write(root / "a.mp4", b"video-bytes")
+            _write(root / "b.mp4", b"video-bytes")
+            _write(root / "c.mp4", b"video-bytez")
+
+            self.assertEqual(video_fingerprint(str(root / "a.mp4")), video_fingerprint(str(root / "b.mp4")))
+            self.assertNotEqual(video_fingerprint(str(root / "a.mp4")), video_fingerprint(str(root / "c.mp4")))
+
+    def test_default_fingerprint_sees_edits_between_sampled_blocks(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            payload = bytearray(13 * 1024 * 1024)
+            _write(root / "a.mp4", bytes(payload))
+            payload[5 * 1024 * 1024] = 1
+            _write(root / "b.mp4", bytes(payload))
+
+            self.assertNotEqual(video_fingerprint(str(root / "a.mp4")), video_fingerprint(str(root / "b.mp4")))
+            # Che do lay mau khong doc byte nay: chi con mtime/inode phan biet 2 file
+            self.assertNotEqual(
+                video_fingerprint(str(root / "a.mp4"), full_hash=False),
+                video_fingerprint(str(root / "b.mp4"), full_hash=False),
+            )
+
+    def test_key_changes_with_params(self) -> None:
+        base = extraction_cache_key("abc", {"scene_threshold": 27.0, "keyframe_resize": 448})
+        self.assertEqual(base, extraction_cache_key("abc", {"keyframe_resize": 448, "scene_threshold": 27.0}))
+        self.assertNotEqual(base, extraction_cache_key("abc", {"scene_threshold": 30.0, "keyframe_resize": 448}))
+        self.assertNotEqual(base, extraction_cache_key("abc", {"scene_threshold": 27.0, "keyframe_resize": 336}))
+
+    def test_audio_fingerprint_depends_on_samples_only(self) -> None:
+        samples = array("f", [0.0, 0.25, -0.5, 0.125])
+
+        self.assertEqual(audio_fingerprint(samples), audio_fingerprint(array("f", samples)))
+        self.assertNotEqual(audio_fingerprint(samples), audio_fingerprint(array("f", [0.0, 0.25, -0.5, 0.0])))
+        self.assertNotEqual(audio_fingerprint(samples), audio_fingerprint(array("d", samples)))
+
+    def test_transcript_key_changes_with_model_and_language(self) -> None:
+        params = {"model_size": "base", "compute_type": "int8", "language": "vi"}
+        key = transcript_cache_key("pcm", params)
+
+        self.assertEqual(key, transcript_cache_key("pcm", dict(params)))
+        self.assertNotEqual(key, transcript_cache_key("pcm", dict(params, language="en")))
+        self.assertNotEqual(key, transcript_cache_key("pcm", dict(params, compute_type="float16")))
+        self.assertNotEqual(key, extraction_cache_key("pcm", params))
+
+    def test_store_then_restore_round_trip(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            src = root / "run1"
+            _write(src / "scene_metadata.json", b'{"total_keyframes": 1}')
+            _write(src / "keyframes/frame_00_00_01_000.jpg", b"jpg")
+            _write(src / "audio/audio_16k.wav", b"wav")
+            files = ["scene_metadata.json", "keyframes/frame_00_00_01_000.jpg", "audio/audio_16k.wav"]
+
+            cache = ExtractionCache(str(root / "cache"))
+            self.assertFalse(cache.restore("k1", str(root / "run2"), ["scene_metadata.json"]))
+            cache.store("k1", str(src), files)
+            self.assertTrue(cache.restore("k1", str(root / "run2"), ["scene_metadata.json", "audio/audio_16k.wav"]))
+
+            for rel in files:
+                self.assertEqual((src / rel).read_bytes(), (root / "run2" / rel).read_bytes())
+            self.assertEqual(cache.stats()["run"], {"hits": 1, "misses": 1, "stores": 1, "evictions": 0})
+
+    def test_missing_required_artifact_is_a_miss(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            _write(root / "src/scene_metadata.json", b"{}")
+            cache = ExtractionCache(str(root / "cache"))
+            cache.store("k1", str(root / "src"), ["scene_metadata.json"])
+
+            self.assertFalse(cache.restore("k1", str(root / "dst"), ["scene_metadata.json", "audio/audio_16k.wav"]))
+            self.assertFalse((root / "dst").exists())
+
+    def test_lru_eviction_keeps_recently_used_entries(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            _write(root / "src/blob.bin", b"x" * 1000)
+            # Moi entry ~1000 byte + manifest: ngan sach chi du cho 2 entry
+            cache = ExtractionCache(str(root / "cache"), max_bytes=2 * 1000 + 2 * 400)
+
+            cache.store("old", str(root / "src"), ["blob.bin"])
+            time.sleep(0.01)
+            cache.store("mid", str(root / "src"), ["blob.bin"])
+            time.sleep(0.01)
+            self.assertTrue(cache.restore("old", str(root / "dst"), ["blob.bin"]))
+            time.sleep(0.01)
+            cache.store("new", str(root / "src"), ["blob.bin"])
+
+            keys = {entry["key"] for entry in cache.entries()}
+            self.assertEqual(keys, {"old", "new"})
+            self.assertEqual(cache.stats()["run"]["evictions"], 1)
+
+    def test_total_stats_persist_across_instances(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            ExtractionCache(str(root / "cache")).restore("missing", str(root / "dst"), [])
+            second = ExtractionCache(str(root / "cache"))
+            second.restore("missing", str(root / "dst"), [])
+
+            self.assertEqual(second.stats()["run"]["misses"], 1)
+            self.assertEqual(second.stats()["total"]["misses"], 2)
+            self.assertEqual(json.loads((root / "cache/stats.json").read_text(encoding="utf-8"))["misses"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import unittest
+
+from extraction_perception.extraction.frame_budget import cap_per_minute, plan_keyframe_budget, sample_scenes
+
+
+class FrameBudgetTests(unittest.TestCase):
+    def test_no_budget_keeps_scene_midpoints(self) -> None:
+        scenes = [(0.0, 4.0), (4.0, 10.0)]
+        timestamps, stats = plan_keyframe_budget(scenes)
+
+        self.assertEqual(timestamps, [2.0, 7.0])
+        self.assertEqual(stats["long_scene_extra"], 0)
+        self.assertEqual(stats["dense_dropped"], 0)
+
+    def test_long_scene_gets_one_sample_per_interval(self) -> None:
+        self.assertEqual(sample_scenes([(0.0, 250.0)], long_scene_seconds=100.0), [62.5, 187.5])
+        self.assertEqual(sample_scenes([(0.0, 90.0)], long_scene_seconds=100.0), [45.0])
+
+    def test_dense_minute_is_capped_and_spread(self) -> None:
+        montage = [i * 0.5 for i in range(120)]  # 120 keyframe trong phut dau
+        kept = cap_per_minute(montage + [61.0, 70.0], max_per_minute=6)
+
+        self.assertEqual(len(kept), 8)
+        self.assertEqual(kept[:6], [5.0, 15.0, 25.0, 35.0, 45.0, 55.0])
+        self.assertEqual(kept[6:], [61.0, 70.0])
+
+    def test_keyframe_count_scales_with_duration(self) -> None:
+        montage = [(i * 0.5, (i + 1) * 0.5) for i in range(600)]  # 5 phut, 600 scene
+        lecture = [(0.0, 3600.0)]  # 1 gio, 1 scene
+
+        montage_ts, montage_stats = plan_keyframe_budget(montage, max_per_minute=4, long_scene_seconds=60.0)
+        lecture_ts, lecture_stats = plan_keyframe_budget(lecture, max_per_minute=4, long_scene_seconds=60.0)
+
+        self.assertEqual(len(montage_ts), 20)
+        self.assertEqual(montage_stats["dense_dropped"], 580)
+        self.assertEqual(len(lecture_ts), 60)
+        self.assertEqual(lecture_stats["long_scene_extra"], 59)
+        self.assertEqual(lecture_stats["keyframes_per_minute"], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
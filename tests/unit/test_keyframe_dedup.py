@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import importlib.util
+import random
+import time
+import unittest
+
+from extraction_perception.perception.keyframe_dedup import (
+    SignatureIndex,
+    dedup_stats,
+    group_near_duplicates,
+    signature_distance,
+)
+
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+
+def _sig(*values: int) -> bytes:
+    return bytes(values)
+
+
+class KeyframeDedupTests(unittest.TestCase):
+    def test_signature_distance_is_mean_abs_difference(self) -> None:
+        self.assertEqual(signature_distance(_sig(10, 20, 30, 40), _sig(10, 20, 30, 40)), 0.0)
+        self.assertEqual(signature_distance(_sig(10, 20, 30, 40), _sig(14, 16, 30, 40)), 2.0)
+        with self.assertRaises(ValueError):
+            signature_distance(_sig(1, 2), _sig(1, 2, 3))
+
+    def test_groups_recurring_slide_with_first_representative(self) -> None:
+        slide_a = _sig(200, 200, 20, 20)
+        slide_a_noisy = _sig(203, 198, 22, 20)
+        slide_b = _sig(20, 20, 200, 200)
+        signatures = [slide_a, slide_a_noisy, slide_b, slide_a]
+
+        representatives, assignment = group_near_duplicates(signatures, max_distance=4.0)
+
+        self.assertEqual(representatives, [0, 2])
+        self.assertEqual(assignment, [0, 0, 1, 0])
+
+    def test_threshold_boundary_is_inclusive(self) -> None:
+        signatures = [_sig(0, 0), _sig(6, 0)]
+        self.assertEqual(group_near_duplicates(signatures, max_distance=3.0)[0], [0])
+        self.assertEqual(group_near_duplicates(signatures, max_distance=2.9)[0], [0, 1])
+
+    def test_zero_threshold_merges_only_identical_signatures(self) -> None:
+        representatives, assignment = group_near_duplicates([_sig(5), _sig(5), _sig(4)], max_distance=0.0)
+
+        self.assertEqual(representatives, [0, 2])
+        self.assertEqual(assignment, [0, 0, 1])
+
+    def test_assigns_to_closest_representative(self) -> None:
+        signatures = [_sig(0), _sig(30), _sig(20)]
+        representatives, assignment = group_near_duplicates(signatures, max_distance=20.0)
+
+        self.assertEqual(representatives, [0, 1])
+        self.assertEqual(assignment, [0, 1, 1])
+
+    def test_size_mismatch_is_rejected(self) -> None:
+        index = SignatureIndex(max_distance=8.0)
+        index.add(_sig(1, 2, 3, 4))
+        with self.assertRaisesRegex(ValueError, "DEDUP_SIGNATURE_SIZE_MISMATCH"):
+            index.nearest(_sig(1, 2))
+
+    @unittest.skipUnless(HAS_NUMPY, "numpy is required for the vectorised index")
+    def test_vectorised_grouping_scales_and_matches_pairwise(self) -> None:
+        rng = random.Random(7)
+        slides = [rng.randbytes(256) for _ in range(1500)]
+        noise = [rng.randbytes(256) for _ in range(16)]
+
+        def noisy(base: bytes) -> bytes:
+            jitter = rng.choice(noise)
+            return bytes(min(255, max(0, value + jitter[pos] % 25 - 12)) for pos, value in enumerate(base))
+
+        # Nua dau toan slide khac nhau (truong hop xau nhat: moi frame thanh dai dien moi), nua sau lap lai co nhieu
+        signatures = slides + [noisy(rng.choice(slides)) for _ in range(1500)]
+
+        started = time.perf_counter()
+        representatives, assignment = group_near_duplicates(signatures, max_distance=8.0)
+        elapsed = time.perf_counter() - started
+
+        # Vong Python tung cap mat ~90s cho 3000 signature
+        self.assertLess(elapsed, 10.0)
+        self.assertEqual(representatives, list(range(1500)))
+        self.assertEqual(len(assignment), 3000)
+
+        subset = signatures[:60] + signatures[1500:1560]
+        for max_distance in (0.0, 4.0, 6.0, 8.0):
+            pairwise = SignatureIndex(max_distance)
+            pairwise._np = None
+            expected = [pairwise.assign(signature) for signature in subset]
+            vectorised = SignatureIndex(max_distance)
+            self.assertEqual([vectorised.assign(signature) for signature in subset], expected)
+
+    def test_dedup_stats(self) -> None:
+        stats = dedup_stats(total=20, unique=4, max_distance=8.0)
+
+        self.assertEqual(stats["skipped"], 16)
+        self.assertEqual(stats["skipped_ratio"], 0.8)
+        self.assertEqual(stats["reduction_x"], 5.0)
+        self.assertEqual(dedup_stats(0, 0, 8.0)["skipped_ratio"], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
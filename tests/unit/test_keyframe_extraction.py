@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import shutil
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Scene dai ngan xen ke: scene 90 frame vuot lookback nho trong test miss
+SCENE_LENGTHS = (20, 45, 20, 90, 30, 25)
+
+
+def _digest(data: bytes) -> str:
+    # So sanh digest thay vi bytes: khi lech, assertEqual khong phai diff ca frame
+    return hashlib.sha256(data).hexdigest()
+
+
+def _write_scene_video(path: Path, scene_lengths: tuple[int, ...] = SCENE_LENGTHS, fps: float = 25.0) -> None:
+    """Moi scene mot texture rieng + nhieu nhe moi frame; MJPG de frame decode giong nhau giua cac backend."""
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(7)
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), fps, (96, 64))
+    for scene, length in enumerate(scene_lengths):
+        texture = rng.integers(0, 256, (8, 12, 3), dtype=np.uint8)
+        base = cv2.resize(texture, (96, 64), interpolation=cv2.INTER_NEAREST).astype(np.int16) + 10 * (scene % 3)
+        for _ in range(length):
+            writer.write(np.clip(base + rng.integers(-5, 6, base.shape), 0, 255).astype(np.uint8))
+    writer.release()
+
+
+@unittest.skipUnless(
+    importlib.util.find_spec("scenedetect") and importlib.util.find_spec("cv2"), "scenedetect/opencv not installed"
+)
+class FusedExtractionParityTests(unittest.TestCase):
+    """Fused (mot lan decode) phai ra scene_metadata.json, JPEG va keyframe handoff giong het two_pass."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._tmp = tempfile.TemporaryDirectory()
+        cls.video_path = Path(cls._tmp.name) / "scenes.avi"
+        _write_scene_video(cls.video_path)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls._tmp.cleanup()
+
+    def _processor(self, name: str) -> object:
+        from extraction_perception.extraction.extraction import VideoPreprocessor
+
+        return VideoPreprocessor(str(self.video_path), str(Path(self._tmp.name) / name), handoff_size=32)
+
+    def _outputs(self, processor: object) -> tuple[str, dict[str, str], dict[int, str]]:
+        extraction_dir = Path(processor.extraction_dir)  # type: ignore[attr-defined]
+        metadata = Path(processor.metadata_path).read_text(encoding="utf-8")  # type: ignore[attr-defined]
+        jpegs = {path.name: _digest(path.read_bytes()) for path in sorted((extraction_dir / "keyframes").glob("*.jpg"))}
+        handoff = {frame_id: _digest(array.tobytes()) for frame_id, array in processor.keyframes.items()}  # type: ignore[attr-defined]
+        return metadata, jpegs, handoff
+
+    def _two_pass(self) -> tuple[str, dict[str, str], dict[int, str]]:
+        processor = self._processor("two_pass")
+        timestamps = processor.detect_scenes(27.0, "content")  # type: ignore[attr-defined]
+        processor.extract_keyframes_and_metadata(timestamps)  # type: ignore[attr-defined]
+        return self._outputs(processor)
+
+    def _assert_fused_matches(self, name: str, **kwargs: object) -> None:
+        expected = self._two_pass()
+        processor = self._processor(name)
+        processor.detect_scenes_and_extract_keyframes(27.0, **kwargs)  # type: ignore[attr-defined]
+        actual = self._outputs(processor)
+
+        self.assertEqual(actual[0], expected[0])
+        self.assertEqual(actual[1], expected[1])
+        self.assertEqual(actual[2], expected[2])
+        # Co nhieu scene that: so sanh tren khong tam thuong
+        self.assertGreaterEqual(len(expected[1]), len(SCENE_LENGTHS) - 1)
+
+    def test_fused_metadata_matches_two_pass(self) -> None:
+        self._assert_fused_matches("fused")
+
+    def test_lookback_misses_are_reread_identically(self) -> None:
+        # Buffer 4 frame: midpoint cua moi scene dai hon deu bi lo va phai doc bu tu video goc
+        self._assert_fused_matches("fused_small_lookback", lookback_frames=4)
+
+    def test_fused_writer_pool_matches_two_pass(self) -> None:
+        from extraction_perception.extraction.extraction import VideoPreprocessor
+
+        expected = self._two_pass()
+        processor = VideoPreprocessor(
+            str(self.video_path), str(Path(self._tmp.name) / "fused_pool"), handoff_size=32, keyframe_writers=3
+        )
+        processor.detect_scenes_and_extract_keyframes(27.0)
+        self.assertEqual(self._outputs(processor), expected)
+
+
+@unittest.skipUnless(
+    importlib.util.find_spec("scenedetect") and importlib.util.find_spec("cv2"), "scenedetect/opencv not installed"
+)
+class KeyframeWriterPoolTests(unittest.TestCase):
+    """Ghi keyframe qua thread pool phai ra cung thu tu/metadata nhu inline va khong nuot loi cua writer."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._tmp = tempfile.TemporaryDirectory()
+        cls.video_path = Path(cls._tmp.name) / "scenes.avi"
+        _write_scene_video(cls.video_path)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls._tmp.cleanup()
+
+    def _extract(self, name: str, keyframe_writers: int, **kwargs: object) -> tuple[object, dict]:
+        from extraction_perception.extraction.extraction import VideoPreprocessor
+
+        processor = VideoPreprocessor(
+            str(self.video_path),
+            str(Path(self._tmp.name) / name),
+            handoff_size=32,
+            keyframe_writers=keyframe_writers,
+            keyframe_queue_size=2,
+            **kwargs,
+        )
+        timestamps = processor.detect_scenes(27.0, "content")
+        return processor, processor.extract_keyframes_and_metadata(timestamps)
+
+    def test_writer_pool_matches_inline(self) -> None:
+        for store in ("files", "packed"):
+            with self.subTest(keyframe_store=store):
+                inline, inline_metadata = self._extract(f"inline_{store}", 0, keyframe_store=store)
+                pooled, pooled_metadata = self._extract(f"pool_{store}", 3, keyframe_store=store)
+                inline_dir = Path(inline.extraction_dir)  # type: ignore[attr-defined]
+                pooled_dir = Path(pooled.extraction_dir)  # type: ignore[attr-defined]
+
+                self.assertEqual(pooled_metadata, inline_metadata)
+                self.assertEqual(
+                    [frame["frame_id"] for frame in pooled_metadata["frames"]],
+                    list(range(1, pooled_metadata["total_keyframes"] + 1)),
+                )
+                self.assertEqual(
+                    (pooled_dir / "scene_metadata.json").read_text(encoding="utf-8"),
+                    (inline_dir / "scene_metadata.json").read_text(encoding="utf-8"),
+                )
+                outputs = sorted(path.relative_to(inline_dir) for path in inline_dir.rglob("*") if path.is_file())
+                self.assertEqual(sorted(path.relative_to(pooled_dir) for path in pooled_dir.rglob("*") if path.is_file()), outputs)
+                for rel in outputs:
+                    self.assertEqual(_digest((pooled_dir / rel).read_bytes()), _digest((inline_dir / rel).read_bytes()), str(rel))
+                self.assertEqual(
+                    {frame_id: _digest(array.tobytes()) for frame_id, array in pooled.keyframes.items()},  # type: ignore[attr-defined]
+                    {frame_id: _digest(array.tobytes()) for frame_id, array in inline.keyframes.items()},  # type: ignore[attr-defined]
+                )
+
+    def test_writer_error_reaches_caller(self) -> None:
+        from extraction_perception.extraction.extraction import VideoPreprocessor
+
+        original = VideoPreprocessor._write_prepared
+
+        def _failing_write(processor: object, idx: int, entry: dict, prepared: object) -> None:
+            if idx == 1:
+                raise OSError("disk full")
+            original(processor, idx, entry, prepared)
+
+        for writers in (0, 2):
+            with self.subTest(keyframe_writers=writers):
+                name = f"failing_{writers}"
+                with mock.patch.object(VideoPreprocessor, "_write_prepared", _failing_write):
+                    with self.assertRaisesRegex(OSError, "disk full"):
+                        self._extract(name, writers)
+                # Loi writer khong de lai scene_metadata.json cua lan chay hong
+                self.assertEqual(list((Path(self._tmp.name) / name).rglob("scene_metadata.json")), [])
+
+    def test_pool_raises_first_writer_error_on_next_submit(self) -> None:
+        import threading
+
+        from extraction_perception.extraction.extraction import _KeyframeWriterPool
+
+        pool = _KeyframeWriterPool(workers=1, queue_size=1)
+        failed = threading.Event()
+
+        def _fail() -> None:
+            failed.set()
+            raise ValueError("encode failed")
+
+        try:
+            pool.submit(_fail)
+            failed.wait(5)
+            # Slot chi duoc tra sau khi loi da ghi nhan: submit ke tiep chac chan thay loi
+            with self.assertRaisesRegex(ValueError, "encode failed"):
+                pool.submit(lambda: None)
+                pool.submit(lambda: None)
+            with self.assertRaisesRegex(ValueError, "encode failed"):
+                pool.drain()
+        finally:
+            pool.close()
+
+
+# Clip ffmpeg cho test seek: 10 fps -> nguong seek = SEEK_MIN_GAP_SECONDS * 10 frame
+SEEK_CLIP_FPS = 10
+SEEK_CLIP_SECONDS = 30
+
+
+def _write_ffmpeg_clip(path: Path) -> None:
+    """H.264 GOP 25 co B-frame: seek cua backend phai decode tu I-frame, moi frame mot noi dung khac."""
+    subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "lavfi", "-i", f"testsrc2=size=96x64:rate={SEEK_CLIP_FPS}",
+            "-t", str(SEEK_CLIP_SECONDS), "-c:v", "libx264", "-g", "25", "-pix_fmt", "yuv420p", str(path),
+        ],
+        check=True,
+    )
+
+
+@unittest.skipUnless(
+    shutil.which("ffmpeg") and importlib.util.find_spec("cv2") and importlib.util.find_spec("scenedetect"),
+    "ffmpeg/opencv/scenedetect not installed",
+)
+class SeekExtractionParityTests(unittest.TestCase):
+    """Seek va grab tuan tu phai ra cung frame_id, timestamp va pixel cho moi kieu target."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._tmp = tempfile.TemporaryDirectory()
+        cls.video_path = Path(cls._tmp.name) / "clip.mp4"
+        _write_ffmpeg_clip(cls.video_path)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls._tmp.cleanup()
+
+    def _extract(self, name: str, frames: list[int], strategy: str) -> tuple[dict, dict[str, str], dict[int, str]]:
+        from extraction_perception.extraction.extraction import VideoPreprocessor
+
+        processor = VideoPreprocessor(str(self.video_path), str(Path(self._tmp.name) / name), handoff_size=32)
+        timestamps = [frame / SEEK_CLIP_FPS for frame in frames]
+        with mock.patch.object(VideoPreprocessor, "_choose_extract_strategy", return_value=strategy):
+            metadata = processor.extract_keyframes_and_metadata(timestamps)
+        keyframes_dir = Path(processor.extraction_dir) / "keyframes"
+        jpegs = {path.name: _digest(path.read_bytes()) for path in sorted(keyframes_dir.glob("*.jpg"))}
+        handoff = {frame_id: _digest(array.tobytes()) for frame_id, array in processor.keyframes.items()}
+        return metadata, jpegs, handoff
+
+    def _assert_same_frames(self, name: str, frames: list[int]) -> None:
+        sequential = self._extract(f"{name}_sequential", frames, "sequential")
+        seek = self._extract(f"{name}_seek", frames, "seek")
+
+        self.assertEqual(sequential[0]["total_keyframes"], len(frames))
+        self.assertEqual(seek[0], sequential[0])
+        self.assertEqual(seek[1], sequential[1])
+        self.assertEqual(seek[2], sequential[2])
+
+    def test_sparse_targets_match_sequential(self) -> None:
+        self._assert_same_frames("sparse", [0, 70, 140, 210, 280])
+
+    def test_dense_targets_match_sequential(self) -> None:
+        self._assert_same_frames("dense", list(range(3, 200, 7)))
+
+    def test_targets_at_seek_gap_boundary_match_sequential(self) -> None:
+        from extraction_perception.extraction.extraction import SEEK_MIN_GAP_SECONDS
+
+        gap = int(SEEK_MIN_GAP_SECONDS * SEEK_CLIP_FPS)
+        # Khoang cach dung bang nguong (seek), ngay duoi nguong (grab) va ngay tren nguong, xen ke frame khong phai I-frame
+        self._assert_same_frames("boundary", [gap, 2 * gap - 1, 3 * gap - 1, 4 * gap, 5 * gap + 1])
+
+    def test_choose_strategy_threshold(self) -> None:
+        from extraction_perception.extraction.extraction import SEEK_MIN_GAP_SECONDS, VideoPreprocessor
+
+        gap = int(SEEK_MIN_GAP_SECONDS * SEEK_CLIP_FPS)
+        at_threshold = [(idx, 0.0, (idx + 1) * gap) for idx in range(5)]
+        below_threshold = at_threshold[:-1] + [(4, 0.0, 5 * gap - 1)]
+
+        self.assertEqual(VideoPreprocessor._choose_extract_strategy(at_threshold, SEEK_CLIP_FPS), "seek")
+        self.assertEqual(VideoPreprocessor._choose_extract_strategy(below_threshold, SEEK_CLIP_FPS), "sequential")
+        self.assertEqual(VideoPreprocessor._choose_extract_strategy([], SEEK_CLIP_FPS), "sequential")
+        self.assertEqual(VideoPreprocessor._choose_extract_strategy(at_threshold, 0), "sequential")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import importlib.util
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+SCENE_METADATA_SCHEMA = Path(__file__).resolve().parents[2] / "contracts" / "v1" / "template" / "scene_metadata.schema.json"
+
+
+@unittest.skipUnless(importlib.util.find_spec("numpy"), "numpy not installed")
+class PackedKeyframeStoreTests(unittest.TestCase):
+    def test_out_of_order_writes_read_back_as_memmap_views(self) -> None:
+        import numpy as np
+
+        from extraction_perception.extraction.keyframe_store import (
+            PackedKeyframeWriter,
+            keyframe_loader,
+            packed_store_info,
+            write_store_descriptor,
+        )
+
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = PackedKeyframeWriter(Path(tmp) / "keyframes.pack", 4, 6)
+            frames = [np.full((4, 6, 3), value, dtype=np.uint8) for value in (10, 20, 30)]
+            for pack_index in (2, 0, 1):
+                writer.write(pack_index, frames[pack_index])
+            writer.close()
+            write_store_descriptor(tmp, writer.store_info(), {i + 1: i for i in range(3)})
+            metadata = {
+                "total_keyframes": 3,
+                "frames": [{"frame_id": i + 1, "timestamp": "00:00:00.000", "file_path": "keyframes.pack"} for i in range(3)],
+            }
+
+            load = keyframe_loader(metadata, tmp)
+            images = [load(frame_info) for frame_info in metadata["frames"]]
+
+            self.assertEqual(packed_store_info(metadata, tmp)["shape"], [3, 4, 6, 3])  # type: ignore[index]
+            self.assertEqual([int(image[0, 0, 0]) for image in images], [10, 20, 30])
+            self.assertIsInstance(images[0].base, np.memmap)
+            del images, load
+
+    def test_shape_mismatch_is_rejected(self) -> None:
+        import numpy as np
+
+        from extraction_perception.extraction.keyframe_store import PackedKeyframeWriter
+
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = PackedKeyframeWriter(Path(tmp) / "keyframes.pack", 4, 4)
+            with self.assertRaises(ValueError):
+                writer.write(0, np.zeros((4, 5, 3), dtype=np.uint8))
+            writer.close()
+
+    def test_header_is_validated_against_metadata(self) -> None:
+        import numpy as np
+
+        from extraction_perception.extraction.keyframe_store import (
+            PACK_HEADER_BYTES,
+            PackedKeyframeWriter,
+            open_packed_keyframes,
+            read_pack_header,
+        )
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "keyframes.pack"
+            writer = PackedKeyframeWriter(path, 2, 2)
+            writer.write(1, np.ones((2, 2, 3), dtype=np.uint8))
+            writer.close()
+            info = writer.store_info()
+
+            self.assertEqual(read_pack_header(path), (1, (2, 2, 3), 2))
+            self.assertEqual(path.stat().st_size, PACK_HEADER_BYTES + 2 * 12)
+
+            with self.assertRaisesRegex(RuntimeError, "KEYFRAME_PACK_INVALID: .*header shape"):
+                open_packed_keyframes(dict(info, shape=[3, 2, 2, 3]), tmp)
+
+            with path.open("r+b") as f:
+                f.truncate(PACK_HEADER_BYTES + 12)
+            with self.assertRaisesRegex(RuntimeError, "KEYFRAME_PACK_INVALID: .*truncated"):
+                open_packed_keyframes(info, tmp)
+
+            path.write_bytes(b"\0" * PACK_HEADER_BYTES)
+            with self.assertRaisesRegex(RuntimeError, "KEYFRAME_PACK_INVALID: .*magic"):
+                open_packed_keyframes(info, tmp)
+
+    def test_stale_sidecar_does_not_apply_to_file_layout(self) -> None:
+        from extraction_perception.extraction.keyframe_store import packed_store_info, write_store_descriptor
+
+        with tempfile.TemporaryDirectory() as tmp:
+            write_store_descriptor(tmp, {"format": "packed", "path": "keyframes.pack"}, {1: 0})
+            metadata = {"frames": [{"frame_id": 1, "timestamp": "00:00:00.000", "file_path": "keyframes/frame_1.jpg"}]}
+            self.assertIsNone(packed_store_info(metadata, tmp))
+
+            write_store_descriptor(tmp, None, {})
+            self.assertFalse((Path(tmp) / "keyframe_store.json").exists())
+
+    def test_in_memory_metadata_has_no_loader(self) -> None:
+        from extraction_perception.extraction.keyframe_store import keyframe_loader
+
+        metadata = {
+            "frames": [{"frame_id": 1, "timestamp": "00:00:00.000"}],
+            "keyframe_store": {"format": "memory", "shape": [384, 384, 3], "channels": "RGB"},
+        }
+        with self.assertRaisesRegex(RuntimeError, "KEYFRAME_STORE_IN_MEMORY"):
+            keyframe_loader(metadata, "unused")
+
+
+@unittest.skipUnless(
+    all(importlib.util.find_spec(name) for name in ("cv2", "numpy", "scenedetect", "jsonschema")),
+    "cv2/numpy/scenedetect/jsonschema not installed",
+)
+class SceneMetadataContractTests(unittest.TestCase):
+    """scene_metadata.json la deliverable lien module: moi layout keyframe phai pass contracts/v1."""
+
+    def _extract(self, root: Path, **kwargs: object) -> tuple[object, dict]:
+        from extraction_perception.extraction.extraction import VideoPreprocessor
+
+        source = root.parent / "clip.avi"
+        if not source.exists():
+            _write_clip(source)
+        processor = VideoPreprocessor(str(source), str(root / "out"), scene_stats=False, **kwargs)  # type: ignore[arg-type]
+        metadata = processor.extract_keyframes_and_metadata([0.2, 1.0, 1.8])
+        return processor, metadata
+
+    def _assert_v1(self, metadata_path: str) -> None:
+        import jsonschema
+
+        with open(metadata_path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        schema = json.loads(SCENE_METADATA_SCHEMA.read_text(encoding="utf-8"))
+        jsonschema.Draft202012Validator(schema).validate(payload)
+
+    def test_file_and_packed_stores_write_v1_metadata(self) -> None:
+        import numpy as np
+
+        from extraction_perception.extraction.keyframe_store import keyframe_loader
+
+        with tempfile.TemporaryDirectory() as tmp:
+            images = {}
+            for store in ("files", "packed"):
+                processor, metadata = self._extract(Path(tmp) / store, keyframe_store=store)
+                self._assert_v1(processor.metadata_path)  # type: ignore[attr-defined]
+                load = keyframe_loader(metadata, processor.extraction_dir)  # type: ignore[attr-defined]
+                images[store] = [np.asarray(load(frame_info)) for frame_info in metadata["frames"]]
+
+            self.assertEqual(len(images["packed"]), 3)
+            for jpeg, raw in zip(images["files"], images["packed"]):
+                # JPEG nen co sai so nho so voi anh raw trong pack
+                self.assertLess(float(np.abs(jpeg.astype(np.int16) - raw.astype(np.int16)).mean()), 4.0)
+
+    def test_memory_handoff_does_not_write_v1_metadata(self) -> None:
+        from extraction_perception.extraction.keyframe_store import keyframe_loader
+
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp) / "run"
+            files_processor, _ = self._extract(root)
+            processor, metadata = self._extract(root, write_keyframes=False, handoff_size=32)
+
+            # Frame khong co file_path: ghi ra file rieng, xoa scene_metadata.json cu cua lan chay files
+            self.assertFalse(Path(files_processor.metadata_path).exists())  # type: ignore[attr-defined]
+            self.assertTrue(processor.metadata_path.endswith("scene_metadata.memory.json"))  # type: ignore[attr-defined]
+            self.assertEqual(sorted(processor.keyframes), [1, 2, 3])  # type: ignore[attr-defined]
+            self.assertNotIn("file_path", metadata["frames"][0])
+            with self.assertRaisesRegex(RuntimeError, "KEYFRAME_STORE_IN_MEMORY"):
+                keyframe_loader(metadata, processor.extraction_dir)  # type: ignore[attr-defined]
+
+
+def _write_clip(path: Path) -> None:
+    import cv2
+    import numpy as np
+
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10.0, (64, 48))
+    for index in range(24):
+        writer.write(np.full((48, 64, 3), 10 * index, dtype=np.uint8))
+    writer.release()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import threading
+import unittest
+
+from extraction_perception.perception.keyframe_stream import KeyframeStream
+
+
+def _frame(frame_id: int) -> dict:
+    return {"frame_id": frame_id, "timestamp": f"00:00:{frame_id:02d}.000"}
+
+
+class KeyframeStreamTests(unittest.TestCase):
+    def test_batches_until_closed(self) -> None:
+        stream = KeyframeStream(maxsize=8)
+        for frame_id in range(1, 6):
+            stream.put(_frame(frame_id), f"img{frame_id}")
+        stream.close()
+
+        first = stream.get_batch(2, max_wait_s=0.0)
+        second = stream.get_batch(4, max_wait_s=0.0)
+
+        self.assertEqual([info["frame_id"] for info, _ in first or []], [1, 2])
+        self.assertEqual([image for _, image in second or []], ["img3", "img4", "img5"])
+        self.assertIsNone(stream.get_batch(2))
+        self.assertEqual(stream.stats()["keyframes"], 5)
+
+    def test_full_queue_blocks_producer_until_consumed(self) -> None:
+        stream = KeyframeStream(maxsize=2)
+        produced: list[int] = []
+
+        def produce() -> None:
+            for frame_id in range(1, 5):
+                stream.put(_frame(frame_id), None)
+                produced.append(frame_id)
+            stream.close()
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        producer.join(timeout=0.3)
+        # Hang doi 2 cho: producer bi chan o keyframe thu 3 cho toi khi consumer lay bot
+        self.assertTrue(producer.is_alive())
+        self.assertEqual(produced, [1, 2])
+
+        received: list[int] = []
+        while (batch := stream.get_batch(3, max_wait_s=0.05)) is not None:
+            received.extend(info["frame_id"] for info, _ in batch)
+        producer.join(timeout=5)
+        self.assertEqual(received, [1, 2, 3, 4])
+        self.assertGreater(stream.stats()["producer_stall_s"], 0.0)
+
+    def test_producer_error_reaches_consumer(self) -> None:
+        stream = KeyframeStream()
+        stream.put(_frame(1), None)
+        stream.close(RuntimeError("EXTRACT_FAILED: boom"))
+
+        # Extraction da loi thi khong caption not cac keyframe con trong hang doi
+        with self.assertRaisesRegex(RuntimeError, "KEYFRAME_STREAM_PRODUCER_FAILED: EXTRACT_FAILED"):
+            stream.get_batch(4)
+
+    def test_abort_unblocks_producer(self) -> None:
+        stream = KeyframeStream(maxsize=1)
+        stream.put(_frame(1), None)
+        errors: list[BaseException] = []
+
+        def produce() -> None:
+            try:
+                stream.put(_frame(2), None)
+            except RuntimeError as exc:
+                errors.append(exc)
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        stream.abort(ValueError("caption model failed"))
+        producer.join(timeout=5)
+
+        self.assertFalse(producer.is_alive())
+        self.assertIn("KEYFRAME_STREAM_ABORTED", str(errors[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
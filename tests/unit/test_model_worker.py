@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import io
+import socket
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from extraction_perception.model_worker import (
+    ModelRegistry,
+    ModelWorkerClient,
+    ModelWorkerServer,
+    recv_message,
+    send_message,
+    worker_supported,
+)
+
+
+class ModelWorkerProtocolTests(unittest.TestCase):
+    def test_message_roundtrip_without_arrays(self) -> None:
+        stream = io.BytesIO()
+        send_message(stream, {"op": "transcribe", "args": {"language": "vi", "output_name": "bai giang"}})
+        stream.seek(0)
+
+        header, arrays = recv_message(stream)
+
+        self.assertEqual(header, {"op": "transcribe", "args": {"language": "vi", "output_name": "bai giang"}})
+        self.assertEqual(arrays, {})
+
+    def test_truncated_message_raises(self) -> None:
+        stream = io.BytesIO(b'{"op": "ping", "arrays": [{"name": "a", "dtype": "<f4", "shape": [4], "nbytes": 16}]}\n1234')
+
+        with self.assertRaises(RuntimeError):
+            recv_message(stream)
+
+    def test_unknown_model_kind_is_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            ModelRegistry().get("ocr", {})
+
+
+@unittest.skipUnless(worker_supported(), "AF_UNIX not available")
+class ModelWorkerServerTests(unittest.TestCase):
+    def test_connect_returns_none_without_worker(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertIsNone(ModelWorkerClient.connect(str(Path(tmp) / "missing.sock")))
+
+    def test_ping_and_error_response_over_socket(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            socket_path = str(Path(tmp) / "worker.sock")
+            server = ModelWorkerServer(socket_path)
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                client = ModelWorkerClient.connect(socket_path)
+                self.assertIsNotNone(client)
+                assert client is not None
+
+                response, _ = client.request({"op": "ping"})
+                self.assertEqual(response["models"], [])
+                with self.assertRaisesRegex(RuntimeError, "MODEL_WORKER_FAILED"):
+                    client.request({"op": "reload"})
+
+                client.shutdown()
+                thread.join(timeout=5)
+                self.assertFalse(thread.is_alive())
+            finally:
+                server.server_close()
+            self.assertFalse(Path(socket_path).exists())
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                with self.assertRaises(OSError):
+                    sock.connect(socket_path)
+
+    def test_asr_and_caption_jobs_run_concurrently(self) -> None:
+        # Moi job chi xong khi job kia dang chay: server tuan tu thi barrier timeout
+        barrier = threading.Barrier(2, timeout=5)
+        with tempfile.TemporaryDirectory() as tmp:
+            server, thread = _start_server(tmp, _FakeRegistry(barrier))
+            try:
+                client = ModelWorkerClient(server.socket_path, timeout_s=10)
+                results: dict[str, object] = {}
+                jobs = [
+                    threading.Thread(
+                        target=lambda: results.update(
+                            asr=client.transcribe({"model_size": "tiny"}, "", "vi", str(Path(tmp) / "out"), "video")[0]
+                        )
+                    ),
+                    threading.Thread(
+                        target=lambda: results.update(
+                            caption=client.caption(
+                                {"model_name": "blip"}, str(Path(tmp) / "meta.json"), str(Path(tmp) / "cap.json"), 4
+                            )[0]
+                        )
+                    ),
+                ]
+                for job in jobs:
+                    job.start()
+                for job in jobs:
+                    job.join(timeout=10)
+                self.assertEqual(results, {"asr": [{"text": "asr"}], "caption": [{"caption": "frame"}]})
+                client.shutdown()
+                thread.join(timeout=5)
+            finally:
+                server.server_close()
+
+    def test_output_path_outside_allowed_root_is_rejected(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as other:
+            registry = _FakeRegistry(None)
+            server, thread = _start_server(tmp, registry)
+            try:
+                client = ModelWorkerClient(server.socket_path, timeout_s=10)
+                with self.assertRaisesRegex(RuntimeError, "MODEL_WORKER_PATH_OUTSIDE_ROOT"):
+                    client.caption({"model_name": "blip"}, str(Path(tmp) / "meta.json"), str(Path(other) / "cap.json"), 4)
+                with self.assertRaisesRegex(RuntimeError, "MODEL_WORKER_PATH_OUTSIDE_ROOT"):
+                    client.transcribe({"model_size": "tiny"}, "", "vi", str(Path(tmp) / ".." / "escape"), "video")
+                # Tu choi truoc khi nap model
+                self.assertEqual(registry.loaded(), [])
+                client.shutdown()
+                thread.join(timeout=5)
+            finally:
+                server.server_close()
+
+
+class _FakeModel:
+    def __init__(self, barrier: threading.Barrier | None):
+        self.barrier = barrier
+
+    def _wait(self) -> None:
+        if self.barrier is not None:
+            self.barrier.wait()
+
+    def transcribe(self, **kwargs: object) -> list[dict[str, str]]:
+        self._wait()
+        return [{"text": "asr"}]
+
+    def caption_from_metadata(self, **kwargs: object) -> list[dict[str, str]]:
+        self._wait()
+        return [{"caption": "frame"}]
+
+
+class _FakeRegistry(ModelRegistry):
+    def __init__(self, barrier: threading.Barrier | None):
+        super().__init__()
+        self.barrier = barrier
+
+    def _load(self, kind: str, config: dict) -> _FakeModel:
+        return _FakeModel(self.barrier)
+
+
+def _start_server(root: str, registry: ModelRegistry) -> tuple[ModelWorkerServer, threading.Thread]:
+    server = ModelWorkerServer(str(Path(root) / "worker.sock"), registry=registry, allowed_root=root)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, thread
+
+
+if __name__ == "__main__":
+    unittest.main()
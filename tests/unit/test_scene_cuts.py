@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import unittest
+
+from extraction_perception.extraction.scene_cuts import (
+    compare_cut_lists,
+    default_scene_threshold,
+    plan_chunks,
+    stitch_chunk_cuts,
+)
+
+
+class SceneCutsTests(unittest.TestCase):
+    def test_compare_cut_lists_within_tolerance(self) -> None:
+        report = compare_cut_lists([10, 50, 90], [11, 52, 120], tolerance=2)
+        self.assertEqual(report["matched"], 2)
+        self.assertEqual(report["missed"], 1)
+        self.assertEqual(report["extra"], 1)
+        self.assertEqual(report["max_offset_frames"], 2)
+        self.assertAlmostEqual(report["precision"], 0.6667)
+
+    def test_compare_cut_lists_matches_each_cut_once(self) -> None:
+        report = compare_cut_lists([10], [9, 10, 11], tolerance=1)
+        self.assertEqual(report["matched"], 1)
+        self.assertEqual(report["extra"], 2)
+
+    def test_default_threshold_per_detector(self) -> None:
+        self.assertEqual(default_scene_threshold("content"), 27.0)
+        with self.assertRaises(ValueError):
+            default_scene_threshold("adaptive")
+
+    def test_plan_chunks_limits_worker_count_for_short_video(self) -> None:
+        self.assertEqual(plan_chunks(1000, 8, 400), [(0, 500), (500, None)])
+        self.assertEqual(plan_chunks(100, 4, 400), [(0, None)])
+
+    def test_stitch_removes_boundary_duplicates(self) -> None:
+        chunks = [
+            {"start": 0, "end": 100, "cuts": [40, 99, 130]},
+            {"start": 100, "end": None, "cuts": [70, 100, 130, 170]},
+        ]
+        self.assertEqual(stitch_chunk_cuts(chunks, min_scene_len=15), [40, 99, 130, 170])
+
+    def test_stitch_recovers_cut_missed_by_owner_chunk(self) -> None:
+        chunks = [
+            {"start": 0, "end": 100, "cuts": [40, 110]},
+            {"start": 100, "end": None, "cuts": [160]},
+        ]
+        self.assertEqual(stitch_chunk_cuts(chunks, min_scene_len=15), [40, 110, 160])
+
+    def test_stitch_enforces_min_scene_len_across_chunks(self) -> None:
+        chunks = [
+            {"start": 0, "end": 100, "cuts": [95]},
+            {"start": 100, "end": None, "cuts": [105, 150]},
+        ]
+        self.assertEqual(stitch_chunk_cuts(chunks, min_scene_len=15), [95, 150])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import importlib.util
+import math
+import tempfile
+import unittest
+from pathlib import Path
+
+from extraction_perception.extraction.scene_stats import cuts_from_scores, read_scene_stats, stats_match, write_scene_stats
+
+META = {"video": "abc", "detector": "hash", "analysis_width": None, "frame_skip": 0, "min_scene_len": 15}
+
+
+class SceneStatsTests(unittest.TestCase):
+    def test_round_trip_keeps_scores_and_meta(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "scene_scores.bin"
+            write_scene_stats(path, dict(META, fps=25.0, end_frame=4), [0, 1, 2, 3], [math.nan, 0.1, 0.5, 0.25])
+
+            meta, frames, scores = read_scene_stats(path)  # type: ignore[misc]
+
+            self.assertEqual(list(frames), [0, 1, 2, 3])
+            self.assertTrue(math.isnan(scores[0]))
+            self.assertEqual(list(scores)[1:], [0.1, 0.5, 0.25])
+            self.assertEqual(meta["end_frame"], 4)
+            self.assertTrue(stats_match(meta, META))
+            self.assertFalse(stats_match(meta, dict(META, frame_skip=1)))
+
+    def test_missing_or_truncated_file_is_ignored(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "scene_scores.bin"
+            self.assertIsNone(read_scene_stats(path))
+            write_scene_stats(path, META, range(100), [0.0] * 100)
+            path.write_bytes(path.read_bytes()[:-8])
+            self.assertIsNone(read_scene_stats(path))
+
+    def test_hash_and_histogram_cuts_follow_threshold_and_min_len(self) -> None:
+        frames = list(range(60))
+        hash_scores = [math.nan] + [0.0] * 59
+        hash_scores[20] = 0.5
+        hash_scores[25] = 0.5  # < 15 frame sau cut truoc: bo
+        hash_scores[40] = 0.3
+
+        self.assertEqual(cuts_from_scores("hash", frames, hash_scores, 0.395), [20])
+        self.assertEqual(cuts_from_scores("hash", frames, hash_scores, 0.25), [20, 40])
+
+        correlations = [math.nan] + [1.0] * 59
+        correlations[30] = 0.9
+        # threshold lon hon = it nhay hon (cut khi correlation <= 1 - threshold)
+        self.assertEqual(cuts_from_scores("histogram", frames, correlations, 0.05), [30])
+        self.assertEqual(cuts_from_scores("histogram", frames, correlations, 0.2), [])
+
+    @unittest.skipUnless(importlib.util.find_spec("scenedetect"), "scenedetect not installed")
+    def test_content_cuts_use_flash_filter(self) -> None:
+        frames = list(range(80))
+        scores = [0.0] * 80
+        scores[30] = 40.0
+        scores[35] = 40.0  # flash ngay sau cut: bi gop boi FlashFilter
+        scores[60] = 20.0
+
+        self.assertEqual(cuts_from_scores("content", frames, scores, 27.0), [30])
+        self.assertEqual(cuts_from_scores("content", frames, scores, 15.0), [30, 60])
+
+
+
+def _write_synthetic_video(path: Path) -> None:
+    """12 scene x 20 frame, moi scene mot texture/do sang rieng (chenh lech to nho khac nhau) + nhieu nhe moi frame."""
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(3)
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 25.0, (96, 64))
+    for scene in range(12):
+        texture = rng.integers(0, 256, (8, 12, 3), dtype=np.uint8)
+        base = cv2.resize(texture, (96, 64), interpolation=cv2.INTER_NEAREST).astype(np.int16)
+        base = base // (1 + scene % 4) + 20 * (scene % 3)
+        for _ in range(20):
+            frame = np.clip(base + rng.integers(-6, 7, base.shape), 0, 255).astype(np.uint8)
+            writer.write(frame)
+    writer.release()
+
+
+@unittest.skipUnless(
+    importlib.util.find_spec("scenedetect") and importlib.util.find_spec("cv2"), "scenedetect/opencv not installed"
+)
+class SceneStatsReplayTests(unittest.TestCase):
+    """Cut tinh lai tu sidecar phai trung cut cua scenedetect chay lai tu dau, moi detector va nhieu threshold."""
+
+    THRESHOLDS = {"content": (8.0, 27.0, 60.0), "hash": (0.2, 0.395, 0.6), "histogram": (0.02, 0.05, 0.3)}
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._tmp = tempfile.TemporaryDirectory()
+        cls.video_path = Path(cls._tmp.name) / "scenes.avi"
+        _write_synthetic_video(cls.video_path)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls._tmp.cleanup()
+
+    def _fresh_cuts(self, detector: str, threshold: float) -> list[int]:
+        from extraction_perception.extraction.extraction import VideoPreprocessor
+
+        processor = VideoPreprocessor(str(self.video_path), str(Path(self._tmp.name) / "fresh"), scene_stats=False)
+        return [scene[0].get_frames() for scene in processor.detect_scene_list(threshold, detector)[1:]]
+
+    def _assert_replay_matches(self, detector: str) -> None:
+        from extraction_perception.extraction.extraction import VideoPreprocessor
+
+        processor = VideoPreprocessor(str(self.video_path), str(Path(self._tmp.name) / detector), scene_stats=True)
+        processor.detect_scene_list(self.THRESHOLDS[detector][1], detector)
+        meta, frames, scores = read_scene_stats(processor.scene_stats_path)  # type: ignore[misc]
+        self.assertEqual(len(frames), 240)
+
+        replayed = {}
+        for threshold in self.THRESHOLDS[detector]:
+            replayed[threshold] = cuts_from_scores(detector, frames, scores, threshold, int(meta["min_scene_len"]))
+            self.assertEqual(replayed[threshold], self._fresh_cuts(detector, threshold), f"{detector} @ {threshold}")
+        # Video co cut that va threshold lam doi ket qua: so sanh tren khong tam thuong
+        self.assertGreater(max(len(cuts) for cuts in replayed.values()), 0)
+        self.assertGreater(len({tuple(cuts) for cuts in replayed.values()}), 1)
+
+    def test_default_detection_records_nothing(self) -> None:
+        from unittest import mock
+
+        from extraction_perception.extraction import extraction
+        from extraction_perception.extraction.extraction import VideoPreprocessor
+
+        processor = VideoPreprocessor(str(self.video_path), str(Path(self._tmp.name) / "default"))
+        # Mac dinh khong gan StatsManager (edge moi frame) va khong hash video
+        with mock.patch.object(extraction, "video_fingerprint", side_effect=AssertionError("hashed")):
+            processor.detect_scene_list(27.0, "content")
+            processor.detect_scenes_and_extract_keyframes(27.0)
+        self.assertFalse(Path(processor.scene_stats_path).exists())
+
+    def test_content_replay_matches_fresh_detection(self) -> None:
+        self._assert_replay_matches("content")
+
+    def test_hash_replay_matches_fresh_detection(self) -> None:
+        self._assert_replay_matches("hash")
+
+    def test_histogram_replay_matches_fresh_detection(self) -> None:
+        self._assert_replay_matches("histogram")
+
+
+if __name__ == "__main__":
+    unittest.main()
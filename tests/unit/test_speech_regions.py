@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from extraction_perception.extraction.speech_regions import (
+    SpeechTimeline,
+    load_speech_regions,
+    normalize_regions,
+    speech_stats,
+)
+
+
+class SpeechRegionTests(unittest.TestCase):
+    def test_normalize_sorts_merges_and_drops_empty(self) -> None:
+        regions = [(10.0, 12.0), (2.0, 4.0), (3.5, 5.0), (7.0, 7.0)]
+
+        self.assertEqual(normalize_regions(regions), [(2.0, 5.0), (10.0, 12.0)])
+
+    def test_to_source_maps_concat_time_back_to_video_time(self) -> None:
+        timeline = SpeechTimeline([(2.0, 5.0), (10.0, 12.0)])
+
+        self.assertEqual(timeline.speech_seconds, 5.0)
+        self.assertEqual(timeline.to_source(0.0), 2.0)
+        self.assertEqual(timeline.to_source(4.0), 11.0)
+        # Bien giua 2 vung: start thuoc vung sau, end thuoc vung truoc
+        self.assertEqual(timeline.to_source(3.0), 10.0)
+        self.assertEqual(timeline.to_source(3.0, is_end=True), 5.0)
+        self.assertEqual(timeline.to_source(99.0), 12.0)
+
+    def test_to_concat_inverts_to_source(self) -> None:
+        timeline = SpeechTimeline([(2.0, 5.0), (10.0, 12.0)])
+
+        self.assertEqual(timeline.to_concat(11.0), 4.0)
+        self.assertEqual(timeline.to_source(timeline.to_concat(3.5)), 3.5)
+        # Trong khoang lang hoac truoc vung dau: nhay toi dau vung ke tiep tren audio ghep
+        self.assertEqual(timeline.to_concat(7.0), 3.0)
+        self.assertEqual(timeline.to_concat(1.0), 0.0)
+        self.assertEqual(timeline.to_concat(20.0), 5.0)
+
+    def test_remap_segments_keeps_text_and_order(self) -> None:
+        timeline = SpeechTimeline([(60.0, 70.0), (100.0, 110.0)])
+        segments = [
+            {"start": 1.0, "end": 10.0, "text": "mot"},
+            {"start": 10.0, "end": 12.5, "text": "hai"},
+        ]
+
+        remapped = timeline.remap_segments(segments)
+
+        self.assertEqual([(s["start"], s["end"], s["text"]) for s in remapped], [(61.0, 70.0, "mot"), (100.0, 102.5, "hai")])
+
+    def test_speech_stats_reports_skipped_ratio(self) -> None:
+        stats = speech_stats([(0.0, 30.0), (60.0, 90.0)], total_seconds=120.0)
+
+        self.assertEqual(stats["speech_seconds"], 60.0)
+        self.assertEqual(stats["skipped_seconds"], 60.0)
+        self.assertEqual(stats["skipped_ratio"], 0.5)
+        self.assertEqual(speech_stats([], 0.0)["skipped_ratio"], 0.0)
+
+    def test_load_sidecar_regions(self) -> None:
+        payload = {"regions": [{"start": "00:00:01.250", "end": "00:01:02.000"}]}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "speech_regions.json"
+            path.write_text(json.dumps(payload), encoding="utf-8")
+
+            self.assertEqual(load_speech_regions(str(path)), [(1.25, 62.0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import threading
+import unittest
+
+from extraction_perception.stage_graph import StageGraph, critical_path, split_cpu_threads
+
+
+class StageGraphTests(unittest.TestCase):
+    def test_independent_branches_run_concurrently(self) -> None:
+        # asr chi xong khi extraction dang chay: neu graph chay tuan tu thi barrier timeout
+        barrier = threading.Barrier(2, timeout=5)
+        graph = StageGraph()
+
+        def extraction(_: dict) -> str:
+            graph.signal("audio", "pcm")
+            barrier.wait()
+            return "keyframes"
+
+        def asr(inputs: dict) -> str:
+            barrier.wait()
+            return f"text<{inputs['audio']}>"
+
+        graph.add("extraction", extraction)
+        graph.add_signal("audio", owner="extraction")
+        graph.add("asr", asr, deps=("audio",))
+        graph.add("caption", lambda inputs: f"captions<{inputs['extraction']}>", deps=("extraction",))
+        outputs = graph.run()
+
+        self.assertEqual(outputs["asr"], "text<pcm>")
+        self.assertEqual(outputs["caption"], "captions<keyframes>")
+        summary = graph.summary()
+        self.assertEqual(set(summary["spans"]), {"extraction", "audio", "asr", "caption"})
+        self.assertEqual(summary["critical_path"][-1], max(summary["spans"], key=lambda name: summary["spans"][name][1]))
+
+    def test_failure_skips_dependents_and_fails_pending_signal(self) -> None:
+        ran: list[str] = []
+        graph = StageGraph()
+
+        def extraction(_: dict) -> None:
+            raise RuntimeError("EXTRACT_FAILED: boom")
+
+        graph.add("extraction", extraction)
+        graph.add_signal("audio", owner="extraction")
+        graph.add("asr", lambda inputs: ran.append("asr"), deps=("audio",))
+        graph.add("caption", lambda inputs: ran.append("caption"), deps=("extraction",))
+
+        with self.assertRaisesRegex(RuntimeError, "EXTRACT_FAILED"):
+            graph.run()
+        self.assertEqual(ran, [])
+        self.assertNotIn("asr", graph.spans)
+
+    def test_streaming_stage_idle_is_not_counted_as_serial_work(self) -> None:
+        graph = StageGraph()
+        graph.add("extraction", lambda _: "keyframes")
+        graph.add("caption", lambda _: "captions", streams_from=("extraction",))
+        graph.run()
+        graph.spans.update({"extraction": (0.0, 10.0), "caption": (0.0, 12.0)})
+        graph.record_idle("caption", 8.0)
+
+        summary = graph.summary()
+        self.assertEqual(summary["serial_s"], 14.0)
+        self.assertEqual(summary["critical_path"], ["extraction", "caption"])
+
+    def test_work_overlapped_inside_a_stage_is_reported_separately(self) -> None:
+        graph = StageGraph()
+        graph.add("extraction", lambda _: "keyframes")
+        graph.add_signal("audio", owner="extraction")
+        graph.add("asr", lambda _: "transcript", deps=("audio",))
+        graph.spans.update({"extraction": (0.0, 10.0), "audio": (0.0, 4.0), "asr": (4.0, 9.0)})
+        graph.wall_s = 10.0
+        # ffmpeg audio 4s chay nen trong 10s cua extraction: span extraction da gom no mot lan
+        graph.record_overlap("extraction", "audio", 4.0)
+
+        summary = graph.summary()
+        self.assertEqual(summary["serial_s"], 15.0)
+        self.assertEqual(summary["saved_s"], 5.0)
+        self.assertEqual(summary["overlapped"], {"extraction": {"audio": 4.0}})
+
+    def test_unknown_dependency_is_rejected(self) -> None:
+        graph = StageGraph()
+        with self.assertRaisesRegex(ValueError, "STAGE_UNKNOWN_DEPENDENCY"):
+            graph.add("caption", lambda inputs: None, deps=("extraction",))
+
+    def test_critical_path_and_thread_split(self) -> None:
+        spans = {"extraction": (0.0, 6.0), "audio": (0.0, 0.5), "asr": (0.5, 9.0), "caption": (6.0, 8.0)}
+        deps = {"asr": ("audio",), "caption": ("extraction",)}
+
+        self.assertEqual(critical_path(spans, deps), ["audio", "asr"])
+        self.assertEqual(split_cpu_threads(8), (4, 4))
+        self.assertEqual(split_cpu_threads(8, asr_threads=2), (2, 6))
+        self.assertEqual(split_cpu_threads(1), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
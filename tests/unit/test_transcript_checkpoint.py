@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from extraction_perception.extraction.transcript_checkpoint import TranscriptCheckpoint, read_transcript_checkpoint
+
+KEY = {"source": "memory:320000", "model_size": "base", "language": "vi"}
+
+
+class TranscriptCheckpointTests(unittest.TestCase):
+    def test_segments_are_readable_while_run_is_in_progress(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "audio_transcripts.partial.jsonl"
+            checkpoint = TranscriptCheckpoint(path, KEY)
+            self.assertEqual(checkpoint.resume(), [])
+            checkpoint.append({"start": 0.0, "end": 2.5, "text": " Xin chao"})
+
+            self.assertEqual(read_transcript_checkpoint(path), [{"start": 0.0, "end": 2.5, "text": " Xin chao"}])
+            checkpoint.close()
+
+    def test_resume_drops_truncated_tail_and_continues(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "audio_transcripts.partial.jsonl"
+            checkpoint = TranscriptCheckpoint(path, KEY)
+            checkpoint.resume()
+            checkpoint.append({"start": 0.0, "end": 2.0, "text": "mot"})
+            checkpoint.append({"start": 2.0, "end": 4.5, "text": "hai"})
+            checkpoint.close()
+            with open(path, "a", encoding="utf-8") as handle:
+                handle.write('{"start": 4.5, "end"')
+
+            resumed = TranscriptCheckpoint(path, KEY)
+            done = resumed.resume()
+            resumed.append({"start": 4.5, "end": 6.0, "text": "ba"})
+            resumed.close()
+
+            self.assertEqual([item["text"] for item in done], ["mot", "hai"])
+            self.assertEqual(resumed.resume_from, 6.0)
+            self.assertEqual([item["text"] for item in read_transcript_checkpoint(path)], ["mot", "hai", "ba"])
+
+    def test_key_mismatch_starts_over(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "audio_transcripts.partial.jsonl"
+            checkpoint = TranscriptCheckpoint(path, KEY)
+            checkpoint.resume()
+            checkpoint.append({"start": 0.0, "end": 2.0, "text": "mot"})
+            checkpoint.close()
+
+            other = TranscriptCheckpoint(path, dict(KEY, model_size="small"))
+            self.assertEqual(other.resume(), [])
+            self.assertEqual(other.resume_from, 0.0)
+            other.remove()
+
+            self.assertFalse(path.exists())
+            self.assertEqual(read_transcript_checkpoint(path), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from extraction_perception.extraction.transcript_chunks import (
+    choose_split_points,
+    plan_audio_chunks,
+    stitch_chunk_segments,
+)
+from main import validate_handoff_outputs
+
+
+def _ts(seconds: float) -> str:
+    total_ms = int(round(seconds * 1000))
+    return f"{total_ms // 3_600_000:02}:{total_ms % 3_600_000 // 60_000:02}:{total_ms % 60_000 // 1000:02}.{total_ms % 1000:03}"
+
+
+class TranscriptChunkTests(unittest.TestCase):
+    def test_split_points_snap_to_quietest_frame_near_boundary(self) -> None:
+        energies = [1.0] * 30
+        energies[8] = 0.01
+        # Moc thu 2 tinh tu diem cat truoc (8 + 10), nen frame 22 nam ngoai cua so +-3
+        energies[19] = 0.02
+        energies[22] = 0.0
+
+        self.assertEqual(choose_split_points(energies, frame_seconds=1.0, chunk_seconds=10.0, search_seconds=3.0), [8.0, 19.0])
+
+    def test_short_tail_is_merged_into_previous_chunk(self) -> None:
+        self.assertEqual(choose_split_points([1.0] * 14, frame_seconds=1.0, chunk_seconds=10.0, search_seconds=0.0), [])
+        self.assertEqual(choose_split_points([1.0] * 16, frame_seconds=1.0, chunk_seconds=10.0, search_seconds=0.0), [10.0])
+
+    def test_plan_chunks_adds_clipped_overlap(self) -> None:
+        chunks = plan_audio_chunks(25.0, [10.0, 20.0], overlap_seconds=1.0)
+
+        self.assertEqual([(c["owned_start"], c["owned_end"]) for c in chunks], [(0.0, 10.0), (10.0, 20.0), (20.0, 25.0)])
+        self.assertEqual((chunks[0]["clip_start"], chunks[0]["clip_end"]), (0.0, 11.0))
+        self.assertEqual((chunks[2]["clip_start"], chunks[2]["clip_end"]), (19.0, 25.0))
+
+    def test_stitch_offsets_and_removes_overlap_duplicates(self) -> None:
+        chunks = [
+            {
+                "owned_start": 0.0,
+                "owned_end": 10.0,
+                "clip_start": 0.0,
+                "segments": [
+                    {"start": 0.5, "end": 4.0, "text": " Xin chao cac ban."},
+                    {"start": 8.0, "end": 10.6, "text": "Hom nay hoc ve video."},
+                ],
+            },
+            {
+                "owned_start": 10.0,
+                "owned_end": 20.0,
+                "clip_start": 9.0,
+                # Segment dau lap lai phan overlap (trung diem 9.55s thuoc chunk truoc)
+                "segments": [
+                    {"start": 0.0, "end": 1.1, "text": "hom nay hoc ve video"},
+                    {"start": 1.2, "end": 5.0, "text": "Hom nay hoc ve video"},
+                    {"start": 5.5, "end": 5.5, "text": "Tiep theo"},
+                    {"start": 6.0, "end": 7.0, "text": "   "},
+                ],
+            },
+        ]
+
+        stitched = stitch_chunk_segments(chunks)
+
+        self.assertEqual([item["text"] for item in stitched], ["Xin chao cac ban.", "Hom nay hoc ve video.", "Tiep theo"])
+        self.assertAlmostEqual(stitched[2]["start"], 14.5)
+        self.assertGreater(stitched[2]["end"], stitched[2]["start"])
+
+    def test_stitched_output_passes_handoff_validation(self) -> None:
+        chunks = [
+            {"owned_start": 0.0, "owned_end": 5.0, "clip_start": 0.0, "segments": [{"start": 1.0, "end": 5.4, "text": "a b"}]},
+            {"owned_start": 5.0, "owned_end": 9.0, "clip_start": 4.0, "segments": [
+                {"start": 0.2, "end": 1.4, "text": "A, b!"},
+                {"start": 2.0, "end": 2.0, "text": "c"},
+                {"start": 1.6, "end": 3.0, "text": "d"},
+            ]},
+        ]
+        stitched = stitch_chunk_segments(chunks)
+        transcripts = [{"start": _ts(item["start"]), "end": _ts(item["end"]), "text": item["text"]} for item in stitched]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            transcript_path = Path(tmp) / "audio_transcripts.json"
+            captions_path = Path(tmp) / "visual_captions.json"
+            transcript_path.write_text(json.dumps(transcripts), encoding="utf-8")
+            captions_path.write_text(json.dumps([{"timestamp": "00:00:01.000", "caption": "x"}]), encoding="utf-8")
+            validate_handoff_outputs(str(transcript_path), str(captions_path))
+
+        self.assertEqual([item["text"] for item in stitched], ["a b", "d", "c"])
+
+
+if __name__ == "__main__":
+    unittest.main()